@@ -0,0 +1,183 @@
+"""
+Strategy loop jitter with the public feed inline vs on a thread vs in a process (src/strategy/ws_feeds/ingestion.py)
+
+A synthetic Bybit orderbook.500 feed sends bursts of delta frames. While it runs, a 1 ms strategy tick takes a
+snapshot and measures how late it woke up, which is also the delay an order ack on that loop would see.
+
+Run from the repo root: python -m benchmarks.feed_jitter
+"""
+
+import asyncio
+import os
+import threading
+import time
+from multiprocessing import get_context
+
+import numpy as np
+import orjson
+
+from src.exchanges.bybit.websockets.handlers.orderbook import OrderBookBybit
+from src.marketstate import BYBIT_BID, MarketState
+from src.shard.shm import InstrumentBlock
+
+LEVELS = 50
+TICK = 0.001
+DURATION = 3.0
+BURST_SIZE = 200
+BURST_GAP = 0.02
+
+
+def make_frames(count: int, seed: int = 0) -> list[bytes]:
+    """
+    A snapshot then {count} deltas of a few levels each, around a drifting mid
+    """
+    rng = np.random.default_rng(seed)
+    mid = 30000.0
+
+    asks = [[f"{mid + 0.1 * (i + 1):.1f}", f"{rng.uniform(0.1, 5):.3f}"] for i in range(500)]
+    bids = [[f"{mid - 0.1 * i:.1f}", f"{rng.uniform(0.1, 5):.3f}"] for i in range(500)]
+    frames = [{"topic": "orderbook.500.BTCUSDT", "type": "snapshot", "data": {"a": asks, "b": bids, "u": 1}}]
+
+    def levels(mid: float, sign: int, n: int) -> list:
+        # Either a new size or a removal (0) somewhere in the first 200 ticks
+        return [
+            [f"{mid + sign * 0.1 * int(rng.integers(1, 200)):.1f}", f"{rng.choice([0, rng.uniform(0.1, 5)]):.3f}"]
+            for _ in range(n)
+        ]
+
+    for u in range(2, count + 2):
+        mid += rng.normal(0, 0.05)
+        n = int(rng.integers(1, 20))
+        data = {"a": levels(mid, 1, n), "b": levels(mid, -1, n), "u": u}
+        frames.append({"topic": "orderbook.500.BTCUSDT", "type": "delta", "data": data})
+
+    return [orjson.dumps(frame) for frame in frames]
+
+
+def frame_at(frames: list[bytes], i: int) -> bytes:
+    """
+    Cycles through the deltas once past the end, the snapshot only comes first
+    """
+    return frames[i] if i < len(frames) else frames[1 + (i - 1) % (len(frames) - 1)]
+
+
+def apply(frame: bytes, book: OrderBookBybit, market: MarketState) -> None:
+    """
+    What the feed does per frame: parse, update the book, write the bba
+    """
+    book.process_data(orjson.loads(frame))
+    bid, ask = book.bids[0], book.asks[0]
+    market.set_bba(BYBIT_BID, bid[0], bid[1], ask[0], ask[1])
+
+
+def produce(name: str | None, frames: list[bytes], stop: float) -> None:
+    """
+    Feeds bursts of frames until {stop}, publishing into the block {name} if given
+    """
+    book = OrderBookBybit()
+    block = InstrumentBlock.attach(name, LEVELS, 16) if name else None
+    market = MarketState(block.market, block.market_seq) if block else MarketState()
+    i = 0
+
+    while time.time() < stop:
+        for _ in range(BURST_SIZE):
+            apply(frame_at(frames, i), book, market)
+            i += 1
+
+            if block is not None:
+                block.bybit_book.publish(book)
+
+        time.sleep(BURST_GAP)
+
+
+async def inline_produce(frames: list[bytes], stop: float, book: OrderBookBybit, market: MarketState) -> None:
+    i = 0
+
+    while time.time() < stop:
+        # A socket with a backlog hands frames over without suspending, the burst runs in one go
+        for _ in range(BURST_SIZE):
+            apply(frame_at(frames, i), book, market)
+            i += 1
+
+        await asyncio.sleep(BURST_GAP)
+
+
+async def strategy(stop: float, market: MarketState, poll=None) -> np.ndarray:
+    """
+    1 ms tick, returns how late each wake-up was (us)
+    """
+    lateness = []
+    loop = asyncio.get_running_loop()
+
+    while time.time() < stop:
+        expected = loop.time() + TICK
+        await asyncio.sleep(TICK)
+        lateness.append(loop.time() - expected)
+
+        if poll is not None:
+            poll()
+        market.snapshot()
+
+    return np.array(lateness) * 1e6
+
+
+async def run_mode(mode: str, frames: list[bytes]) -> np.ndarray:
+    stop = time.time() + DURATION
+    market = MarketState()
+
+    if mode == "inline":
+        book = OrderBookBybit()
+        lateness, _ = await asyncio.gather(strategy(stop, market), inline_produce(frames, stop, book, market))
+        return lateness
+
+    name = f"smm_bench_{os.getpid()}"
+    block = InstrumentBlock.create(name, LEVELS, 16)
+    local_book = OrderBookBybit()
+    feed_market = MarketState(block.market, block.market_seq)
+    bba_slots = np.arange(8)
+
+    # What FeedIngestion does per wake-up: reload the book if it moved, copy the bbas under the seqlock
+    def poll():
+        block.bybit_book.load_into(local_book)
+        market.set_many(bba_slots, feed_market.snapshot().values[bba_slots])
+
+    try:
+        if mode == "thread":
+            worker = threading.Thread(target=produce, args=(name, frames, stop), daemon=True)
+        else:
+            worker = get_context("spawn").Process(target=produce, args=(name, frames, stop), daemon=True)
+
+        worker.start()
+        lateness = await strategy(stop, market, poll)
+        worker.join()
+        return lateness
+    finally:
+        block.close()
+
+
+def main() -> None:
+    frames = make_frames(5000)
+
+    # Warm the book kernels
+    book, market = OrderBookBybit(), MarketState()
+    for frame in frames[:200]:
+        apply(frame, book, market)
+
+    start = time.perf_counter()
+    for frame in frames[:2000]:
+        apply(frame, book, market)
+    per_frame = (time.perf_counter() - start) / 2000 * 1e6
+
+    print(
+        f"{per_frame:.1f} us per frame, bursts of {BURST_SIZE} every {BURST_GAP * 1e3:.0f} ms, {TICK * 1e3:.0f} ms tick"
+    )
+    print(f"{'mode':>8} {'ticks':>6} {'p50 us':>8} {'p99 us':>8} {'p99.9 us':>9} {'max us':>8}")
+
+    for mode in ("inline", "thread", "process"):
+        lateness = asyncio.run(run_mode(mode, frames))
+        p50, p99, p999 = np.percentile(lateness, [50, 99, 99.9])
+        print(f"{mode:>8} {len(lateness):>6} {p50:>8.0f} {p99:>8.0f} {p999:>9.0f} {lateness.max():>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Ladder matcher (src/strategy/diff.py match_side): request counts on known shifts, and time per call
+
+Run from the repo root: python -m benchmarks.ladder_matching
+"""
+
+import time
+
+import numpy as np
+
+from src.strategy.diff import match_side
+
+# (live prices, desired prices, price tolerance, expected (amends, cancels, creates)), sizes all match
+CASES = (
+    # Nearest live order of the second level is taken, the next free one is still within tolerance
+    ([10, 13], [10, 11], 5, (0, 0, 0)),
+    ([200, 205, 210], [203, 204, 206], 100, (0, 0, 0)),
+    ([1, 2, 3], [1, 2, 3], 0, (0, 0, 0)),
+    # Ladder shifted out of tolerance, both orders move, one level is new
+    ([1, 5], [2, 3, 4], 0, (2, 0, 1)),
+    ([1, 2, 3], [2], 0, (0, 2, 0)),
+    ([], [1, 2], 0, (0, 0, 2)),
+)
+
+ANY_QTY = np.iinfo(np.int64).max
+
+# (live prices, live sizes, desired prices, desired sizes, price tolerances, qty tolerances, expected counts)
+SIZED_CASES = (
+    # 28 is the nearest order of level 28 but needs a qty amend, level 29 keeps it as it is instead
+    ([0, 15, 18, 28], [3, 1, 1, 3], [25, 28, 29, 36], [1, 2, 1, 2], [0, 0, 2, 2], [0, 0, ANY_QTY, ANY_QTY], (3, 0, 0)),
+)
+
+
+def match(cur: list, new: list, tol, cur_qty: list = None, new_qty: list = None, qty_tol: list = None) -> tuple:
+    n, m = len(cur), len(new)
+    return match_side(
+        np.array(cur, np.int64),
+        np.ones(n, np.int64) if cur_qty is None else np.array(cur_qty, np.int64),
+        np.ones(n, np.bool_),
+        np.array(new, np.int64),
+        np.ones(m, np.int64) if new_qty is None else np.array(new_qty, np.int64),
+        np.broadcast_to(np.asarray(tol, np.int64), m).copy(),
+        np.zeros(m, np.int64) if qty_tol is None else np.array(qty_tol, np.int64),
+    )
+
+
+def main() -> None:
+    for cur, new, tol, expected in CASES:
+        amend_cur, _, cancel_cur, create_new = match(cur, new, tol)
+        counts = (len(amend_cur), len(cancel_cur), len(create_new))
+        assert counts == expected, (cur, new, tol, counts)
+
+    for cur, cur_qty, new, new_qty, tol, qty_tol, expected in SIZED_CASES:
+        amend_cur, _, cancel_cur, create_new = match(cur, new, tol, cur_qty, new_qty, qty_tol)
+        counts = (len(amend_cur), len(cancel_cur), len(create_new))
+        assert counts == expected, (cur, new, counts)
+
+    rng = np.random.default_rng(0)
+    print(f"{'levels':>8} {'us/call':>8}")
+
+    for levels in (10, 50, 200):
+        cur = np.sort(rng.choice(10 * levels, levels, replace=False))
+        new = np.sort(rng.choice(10 * levels, levels, replace=False))
+        args = (cur, np.ones(levels, np.int64), np.ones(levels, np.bool_), new, np.ones(levels, np.int64))
+        tols = (np.full(levels, 3, np.int64), np.zeros(levels, np.int64))
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            match_side(*args, *tols)
+        print(f"{levels:>8} {(time.perf_counter() - start) * 1e3:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Compiled quote kernels (src/strategy/quotes.py) vs the Python/NumPy ladder path they replaced
+
+Run from the repo root: python -m benchmarks.quote_generation
+"""
+
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.strategy.quotes import QuoteBuffers, binance_quotes, bybit_quotes
+from src.utils.jit_funcs import linspace, nabs, nsqrt
+from src.utils.rounding import AWAY, DOWN, rounder
+
+
+def legacy_skew(skew: float, ss) -> tuple[float, float]:
+    skew = np.float64(skew)
+    bid_skew = np.where(skew >= 0, np.clip(skew, 0, 1), 0)
+    ask_skew = np.where(skew < 0, np.clip(skew, -1, 0), 0)
+
+    bid_skew[ss.inventory_delta < 0] += ss.inventory_delta
+    ask_skew[ss.inventory_delta > 0] -= ss.inventory_delta
+
+    bid_skew[ss.inventory_delta < -ss.inventory_extreme] = 1
+    ask_skew[ss.inventory_delta > ss.inventory_extreme] = 1
+
+    return nabs(float(bid_skew)), nabs(float(ask_skew))
+
+
+def legacy_bybit(skew: float, ss) -> list:
+    """
+    Bybit MarketMaker.generate_orders before the kernel, features excluded
+    """
+    bid_skew, ask_skew = legacy_skew(skew, ss)
+    max_orders = ss.num_orders
+    best_bid_price = ss.bybit_bba[0][0]
+    best_ask_price = ss.bybit_bba[1][0]
+    base_range = ss.volatility_value / 2
+
+    if bid_skew >= 1 or ask_skew >= 1:
+        num_bids = max_orders if bid_skew >= 1 else None
+        num_asks = max_orders if ask_skew >= 1 else None
+        bid_prices = (
+            linspace(best_bid_price, best_bid_price - ss.bybit_tick_size * num_bids, num_bids) if num_bids else None
+        )
+        ask_prices = (
+            linspace(best_ask_price, best_ask_price + ss.bybit_tick_size * num_asks, num_asks) if num_asks else None
+        )
+        const = np.median([ss.minimum_order_size, ss.maximum_order_size / 2])
+        bid_quantities = np.full(num_bids, const) if num_bids else None
+        ask_quantities = np.full(num_asks, const) if num_asks else None
+
+    else:
+        num_bids = int((max_orders / 2) * (1 + max(bid_skew, ask_skew)))
+        num_asks = max_orders - num_bids
+        bid_lower = best_bid_price - (base_range * (1 - bid_skew))
+        ask_upper = best_ask_price + (base_range * (1 - ask_skew))
+
+        if bid_skew >= ask_skew:
+            best_bid_price = best_ask_price - ss.bybit_tick_size
+            best_ask_price += ss.target_spread
+        else:
+            best_ask_price = best_bid_price + ss.bybit_tick_size
+            best_bid_price -= ss.target_spread
+
+        bid_prices = linspace(best_bid_price, bid_lower, num_bids)
+        ask_prices = linspace(best_ask_price, ask_upper, num_asks)
+
+        bid_min = ss.minimum_order_size * (1 + nsqrt(bid_skew, 1))
+        ask_min = ss.minimum_order_size * (1 + nsqrt(ask_skew, 1))
+        bid_quantities = linspace(
+            bid_min if bid_skew >= ask_skew else ss.minimum_order_size, ss.maximum_order_size * (1 - bid_skew), num_bids
+        )
+        ask_quantities = linspace(
+            ask_min if ask_skew > bid_skew else ss.minimum_order_size, ss.maximum_order_size * (1 - ask_skew), num_asks
+        )
+
+    orders = []
+
+    if num_bids:
+        bid_p = ss.bybit_ticks.side_steps(bid_prices, "Buy", AWAY).tolist()
+        bid_q = ss.bybit_lots.to_steps(bid_quantities, DOWN).tolist()
+        orders.extend(["Buy", p, q] for p, q in zip(bid_p, bid_q))
+
+    if num_asks:
+        ask_p = ss.bybit_ticks.side_steps(ask_prices, "Sell", AWAY).tolist()
+        ask_q = ss.bybit_lots.to_steps(ask_quantities, DOWN).tolist()
+        orders.extend(["Sell", p, q] for p, q in zip(ask_p, ask_q))
+
+    return orders
+
+
+def legacy_binance(skew: float, ss) -> list:
+    """
+    Binance MarketMaker.market_maker before the kernel, features excluded
+    """
+    bid_skew, ask_skew = legacy_skew(skew, ss)
+    max_orders = ss.num_orders
+    best_bid_price = ss.bybit_bba[0][0]
+    best_ask_price = ss.bybit_bba[1][0]
+    base_range = ss.volatility_value / 2
+    const = np.median([ss.minimum_order_size, ss.maximum_order_size / 2])
+
+    if bid_skew >= 1:
+        num_bids, num_asks = max_orders, None
+        bid_prices = linspace(best_bid_price, best_bid_price - ss.bybit_tick_size * num_bids, num_bids)
+        bid_quantities = np.array([const] * num_bids)
+
+    elif ask_skew >= 1:
+        num_bids, num_asks = None, max_orders
+        ask_prices = linspace(best_ask_price, best_ask_price + ss.bybit_tick_size * num_asks, num_asks)
+        ask_quantities = np.array([const] * num_asks)
+
+    else:
+        if bid_skew >= ask_skew:
+            best_bid_price = best_ask_price - ss.bybit_tick_size
+            best_ask_price = best_bid_price + ss.target_spread
+            num_bids = int((max_orders / 2) * (1 + bid_skew))
+            num_asks = max_orders - num_bids
+        else:
+            best_ask_price = best_bid_price + ss.bybit_tick_size
+            best_bid_price = best_ask_price - ss.target_spread
+            num_asks = int(max_orders / 2 * (1 + ask_skew))
+            num_bids = max_orders - num_asks
+
+        bid_lower = best_bid_price - (base_range * (1 - bid_skew))
+        ask_upper = best_ask_price + (base_range * (1 - ask_skew))
+        bid_prices = linspace(best_bid_price, bid_lower, num_bids)
+        ask_prices = linspace(best_ask_price, ask_upper, num_asks)
+
+        if bid_skew >= ask_skew:
+            bid_min = ss.minimum_order_size * (1 + nsqrt(bid_skew, 1))
+            bid_quantities = linspace(bid_min, ss.maximum_order_size * (1 - bid_skew), num_bids)
+            ask_quantities = linspace(ss.minimum_order_size, ss.maximum_order_size, num_asks)
+        else:
+            ask_min = ss.minimum_order_size * (1 + nsqrt(ask_skew, 1))
+            ask_quantities = linspace(ask_min, ss.maximum_order_size * (1 - ask_skew), num_asks)
+            bid_quantities = linspace(ss.minimum_order_size, ss.maximum_order_size, num_bids)
+
+    orders = []
+
+    if num_bids:
+        bid_p = ss.bybit_ticks.side_steps(bid_prices, "Buy", AWAY).tolist()
+        bid_q = ss.bybit_lots.to_steps(bid_quantities, DOWN).tolist()
+        orders.extend(["Buy", p, q] for p, q in zip(bid_p, bid_q))
+
+    if num_asks:
+        ask_p = ss.bybit_ticks.side_steps(ask_prices, "Sell", AWAY).tolist()
+        ask_q = ss.bybit_lots.to_steps(ask_quantities, DOWN).tolist()
+        orders.extend(["Sell", p, q] for p, q in zip(ask_p, ask_q))
+
+    # Listed the two closest levels of each side first, the ladder itself is the same
+    return orders
+
+
+def kernel_bybit(skew: float, ss, buffers: QuoteBuffers) -> list:
+    buffers.reserve(2 * ss.num_orders)
+    num_bids, num_asks = bybit_quotes(
+        ss.bybit_bba[0, 0],
+        ss.bybit_bba[1, 0],
+        ss.volatility_value,
+        skew,
+        ss.inventory_delta,
+        ss.inventory_extreme,
+        ss.bybit_ticks.step,
+        ss.bybit_lots.step,
+        ss.target_spread,
+        ss.minimum_order_size,
+        ss.maximum_order_size,
+        ss.num_orders,
+        buffers.prices,
+        buffers.sizes,
+    )
+    return buffers.orders(num_bids, num_asks)
+
+
+def kernel_binance(skew: float, ss, buffers: QuoteBuffers) -> list:
+    buffers.reserve(ss.num_orders)
+    num_bids, num_asks = binance_quotes(
+        ss.bybit_bba[0, 0],
+        ss.bybit_bba[1, 0],
+        ss.volatility_value,
+        skew,
+        ss.inventory_delta,
+        ss.inventory_extreme,
+        ss.bybit_ticks.step,
+        ss.bybit_lots.step,
+        ss.target_spread,
+        ss.minimum_order_size,
+        ss.maximum_order_size,
+        ss.num_orders,
+        buffers.prices,
+        buffers.sizes,
+    )
+    return buffers.orders(num_bids, num_asks)
+
+
+def make_state(num_orders: int):
+    return SimpleNamespace(
+        bybit_bba=np.array([[30000.0, 1.5], [30000.1, 2.0]]),
+        bybit_tick_size=0.1,
+        bybit_ticks=rounder(0.1),
+        bybit_lots=rounder(0.001),
+        volatility_value=60.0,
+        inventory_delta=0.02,
+        inventory_extreme=0.5,
+        target_spread=0.3,
+        minimum_order_size=0.01,
+        maximum_order_size=0.2,
+        num_orders=num_orders,
+    )
+
+
+def side(order: list) -> str:
+    """
+    Sort key that groups a ladder by side and keeps each side's level order
+    """
+    return order[0]
+
+
+def timeit(fn, *args, repeat: int = 2000) -> float:
+    """
+    Median per call (us) over {repeat} calls
+    """
+    times = np.empty(repeat)
+
+    for i in range(repeat):
+        start = time.perf_counter_ns()
+        fn(*args)
+        times[i] = time.perf_counter_ns() - start
+
+    return float(np.median(times)) / 1e3
+
+
+def main() -> None:
+    skews = (-0.4, -0.05, 0.0, 0.3, 0.6, 1.0)
+    buffers = QuoteBuffers()
+
+    # Compile, and check the kernels reproduce the legacy ladders
+    for num_orders in (4, 10, 50):
+        ss = make_state(num_orders)
+        for skew in skews:
+            for legacy_fn, kernel_fn in ((legacy_bybit, kernel_bybit), (legacy_binance, kernel_binance)):
+                try:
+                    legacy = legacy_fn(skew, ss)
+                except ZeroDivisionError:
+                    # linspace() can't build a single level ladder, the kernel quotes it at the side's start price
+                    continue
+                assert sorted(kernel_fn(skew, ss, buffers), key=side) == sorted(legacy, key=side), (num_orders, skew)
+
+    print(f"{'num_orders':>10} {'legacy us':>10} {'bybit us':>10} {'binance us':>11} {'speedup':>8}")
+
+    for num_orders in (10, 20, 50, 100, 200):
+        ss = make_state(num_orders)
+        legacy = np.mean([timeit(legacy_bybit, skew, ss) for skew in skews])
+        bybit = np.mean([timeit(kernel_bybit, skew, ss, buffers) for skew in skews])
+        binance = np.mean([timeit(kernel_binance, skew, ss, buffers) for skew in skews])
+        print(f"{num_orders:>10} {legacy:>10.1f} {bybit:>10.1f} {binance:>11.1f} {legacy / bybit:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,21 +2,64 @@ import asyncio
 
 from src.strategy.bybit.bybit_core import Strategy as BybitStrategy
 from src.strategy.binance.binance_core import Strategy as BinanceStrategy
+from src.strategy.multi.multi_core import Strategy as MultiStrategy
+from src.shard.supervisor import Supervisor
 
 from src.sharedstate import SharedState
+from src.simulator.server import use_local_exchange
+from src.exchanges.bybit.order.gateway import OrderGateway
+from src.utils.metrics import MetricsServer
+from src.utils.runtime import LoopLagMonitor, run, tune_gc
 
 
-async def main():
+async def main(sharedstate: SharedState):
 
-    sharedstate = SharedState()
+    # Point all Bybit endpoints at the local simulator if configured \
+    if sharedstate.local_exchange:
+        use_local_exchange(sharedstate.local_exchange)
     
     tasks = []
+
+    # Sharded across processes, the supervisor owns the shared memory and the child processes \
+    supervisor = Supervisor(sharedstate) if sharedstate.instruments and sharedstate.shard_workers else None
     
-    # Refresh parameters \
-    tasks.append(asyncio.create_task(sharedstate.refresh_parameters()))
+    # Refresh parameters (the multi-instrument strategy refreshes its instruments itself) \
+    if not sharedstate.instruments:
+        tasks.append(asyncio.create_task(sharedstate.refresh_parameters()))
+
+    # Event loop lag watchdog, names the task behind any stall \
+    monitor = None
+    if sharedstate.loop_lag_interval:
+        monitor = LoopLagMonitor(sharedstate.loop_lag_interval, sharedstate.loop_lag_threshold)
+        tasks.append(asyncio.create_task(monitor.run(), name="LoopLagMonitor"))
+
+    # Latency metrics, served locally and/or printed periodically \
+    if sharedstate.metrics_port:
+        metrics = MetricsServer(port=sharedstate.metrics_port)
+        metrics.add("latency", sharedstate.latency.summary)
+        metrics.add("transport", OrderGateway.get(sharedstate).latency_stats)
+        metrics.add("requote", lambda: {
+            "signals": sharedstate.requote.signals,
+            "wakeups": sharedstate.requote.wakeups,
+            "requotes": sharedstate.requote.requotes,
+        })
+        if supervisor is not None:
+            metrics.add("portfolio", supervisor.portfolio)
+        if monitor is not None:
+            metrics.add("loop_lag", monitor.summary)
+        await metrics.start()
+
+    if sharedstate.latency_report_interval:
+        tasks.append(asyncio.create_task(sharedstate.latency.report(sharedstate.latency_report_interval)))
 
-    # Add correct data feed and strategy choice \
-    if sharedstate.primary_data_feed == 'BINANCE':
+    # Add correct data feed and strategy choice, every configured instrument from this process if any \
+    if supervisor is not None:
+        tasks.append(asyncio.create_task(supervisor.run()))
+
+    elif sharedstate.instruments:
+        tasks.append(asyncio.create_task(MultiStrategy(sharedstate).run()))
+
+    elif sharedstate.primary_data_feed == 'BINANCE':
         tasks.append(asyncio.create_task(BinanceStrategy(sharedstate).run()))
 
     elif sharedstate.primary_data_feed == 'BYBIT':
@@ -26,11 +69,16 @@ async def main():
         print("Invalid exchange selected, choices are 'BINANCE' or 'BYBIT'")
         raise NotImplementedError
 
+    # Everything built so far lives for the whole run, keep it out of the collector's way \
+    tune_gc(sharedstate.gc_freeze, sharedstate.gc_threshold, sharedstate.gc_disable_gen2)
+
     # Run tasks \
     await asyncio.gather(*tasks)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # Settings are read before the loop exists, they pick the loop \
+    sharedstate = SharedState()
+    run(main(sharedstate), sharedstate.use_uvloop)
 
 
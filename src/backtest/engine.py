@@ -0,0 +1,148 @@
+import itertools
+import time
+
+import orjson
+import yaml
+
+from src.backtest.exchange import SimExchange
+from src.recorder.replay import ReplayDriver
+from src.sharedstate import SharedState
+from src.strategy.binance.binance_mm import MarketMaker as BinanceMarketMaker
+from src.strategy.bybit.bybit_mm import MarketMaker as BybitMarketMaker
+from src.strategy.diff import Diff
+from src.strategy.ws_feeds.binancemarketdata import BinanceMarketData
+from src.strategy.ws_feeds.bybitmarketdata import BybitMarketData
+
+
+class Backtest:
+    """
+    Event-driven backtest of the live MarketMaker + Diff against a recorded session
+
+    _______________________________________________________________
+
+    -> Recorded frames (see src/recorder) are pushed through the live feed handlers into the SharedState \n
+    -> The simulation clock is the frames' receive time, the strategy runs every {tick_interval}s of it \n
+    -> Diff talks to a SimExchange instead of Bybit, which fills from the replayed Bybit trades
+    """
+
+    def __init__(
+        self,
+        sharedstate: SharedState,
+        directory: str,
+        tick_interval: float = 0.005,
+        warmup: float = 10.0,
+        **exchange_kwargs,
+    ) -> None:
+        self.ss = sharedstate
+        self.tick_interval = tick_interval
+        self.warmup = warmup
+
+        # Feature windows (trade flow, book depletion) age by the replay clock, not the wall clock
+        self.now = 0.0
+        self.ss.clock = lambda: self.now
+
+        self.exchange = SimExchange(self.ss, **exchange_kwargs)
+        self.diff = Diff(self.ss, order=self.exchange.order)
+
+        self.bybit_feed = BybitMarketData(self.ss)
+        self.driver = ReplayDriver(directory)
+        self.driver.add_feed("bybit_public", self.on_bybit_frame)
+
+        if self.ss.primary_data_feed == "BINANCE":
+            self.market_maker = BinanceMarketMaker(self.ss)
+            self.generate_orders = self.market_maker.market_maker
+
+            # The Binance diff book is rebuilt from the recorded REST snapshots, never a live one
+            self.binance_feed = BinanceMarketData(self.ss)
+            self.binance_feed.replay(self.driver)
+
+        else:
+            self.market_maker = BybitMarketMaker(self.ss)
+            self.generate_orders = self.market_maker.generate_orders
+
+    def on_bybit_frame(self, frame) -> None:
+        recv = orjson.loads(frame)
+
+        if "success" in recv:
+            return
+
+        feed = self.bybit_feed
+        stream = feed.topic_stream_map.get(recv["topic"])
+        handler = feed.topic_handler_map.get(stream)
+
+        if handler:
+            handler(recv)
+
+        if stream == "Trades":
+            self.exchange.on_trades(recv["data"])
+
+    async def run(self) -> dict:
+        events = 0
+        ticks = 0
+        next_tick = None
+        start = time.perf_counter()
+
+        for recv_ns, feed, frame in self.driver.records():
+            now = recv_ns / 1e9
+            self.now = now
+
+            if next_tick is None:
+                next_tick = now + self.warmup
+
+            self.exchange.advance(now)
+            self.driver.handlers[feed](frame)
+            events += 1
+
+            if now >= next_tick:
+                new_orders = self.generate_orders(self.ss.market.snapshot())
+                await self.diff.diff(new_orders)
+                next_tick = now + self.tick_interval
+                ticks += 1
+
+        elapsed = time.perf_counter() - start
+
+        return {
+            "pnl": self.exchange.pnl(),
+            "position": self.exchange.position,
+            "fees": self.exchange.fees,
+            "volume": self.exchange.volume,
+            "fills": self.exchange.fills,
+            "requests": self.exchange.requests,
+            "requests_saved": self.diff.requests_saved,
+            "rejects": self.exchange.rejects,
+            "events": events,
+            "ticks": ticks,
+            "events_per_sec": events / elapsed if elapsed > 0 else 0.0,
+        }
+
+
+async def sweep(directory: str, grid: dict, **backtest_kwargs) -> list[dict]:
+    """
+    Runs one backtest per combination of parameters.yaml overrides in the grid
+
+    _______________________________________________________________
+
+    -> grid maps parameters.yaml keys to lists of values, e.g. {"target_spread": [10, 20], "buffer": [50, 100]} \n
+    -> Each run gets a fresh SharedState, results are returned with their overrides attached
+    """
+    with open(SharedState.PARAM_DIR, "r") as f:
+        base_settings = yaml.safe_load(f)
+
+    results = []
+
+    for values in itertools.product(*grid.values()):
+        overrides = dict(zip(grid.keys(), values))
+
+        ss = SharedState()
+        ss.load_settings({**base_settings, **overrides})
+
+        result = await Backtest(ss, directory, **backtest_kwargs).run()
+        results.append({**overrides, **result})
+
+    return results
+
+
+# Usage
+# ss = SharedState()
+# print(asyncio.run(Backtest(ss, ss.record_dir).run()))
+# print(asyncio.run(sweep(ss.record_dir, {"target_spread": [10, 20, 40], "number_of_orders": [6, 10]})))
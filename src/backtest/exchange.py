@@ -0,0 +1,276 @@
+import heapq
+
+from src.sharedstate import SharedState
+
+
+class SimOrder:
+    """
+    Drop-in for Order that routes every request to a SimExchange instead of Bybit
+    """
+
+    def __init__(self, exchange) -> None:
+        self.exchange = exchange
+        self.store = exchange.ss.current_orders
+        self.ticks = exchange.ss.bybit_ticks
+        self.lots = exchange.ss.bybit_lots
+
+    async def submit_limit(self, order: tuple) -> dict:
+        side, price, qty = order
+        orderId = self.exchange.request_create(side, self.ticks.to_value(price), self.lots.to_value(qty))
+
+        # Sim orderIds are known up front, so they double as the orderLinkId
+        self.store.pending_new(orderId, side, price, qty)
+        self.store.acknowledge(orderId, orderId)
+        return {"orderId": orderId}
+
+    async def submit_batch(self, orders: list) -> None:
+        for order in orders:
+            await self.submit_limit(order)
+
+    async def amend(self, order: tuple) -> None:
+        orderId, price, qty = order
+        self.store.pending_amend(orderId, price, qty)
+        self.exchange.request_amend(orderId, self.ticks.to_value(price), self.lots.to_value(qty))
+
+    async def amend_batch(self, orders: list) -> None:
+        for order in orders:
+            await self.amend(order)
+
+    async def cancel(self, orderId: str) -> None:
+        self.store.pending_cancel(orderId)
+        self.exchange.request_cancel(orderId)
+
+    async def cancel_batch(self, orderIds: list) -> None:
+        for orderId in orderIds:
+            await self.cancel(orderId)
+
+    async def cancel_all(self) -> None:
+        self.store.pending_cancel_all()
+        self.exchange.request_cancel_all()
+
+
+class SimExchange:
+    """
+    Simulated Bybit matching for our own PostOnly limit orders against replayed market data
+
+    _______________________________________________________________
+
+    -> Requests reach the exchange {order_latency}s after they are sent, acks reach the SharedState {ack_latency}s later \n
+    -> PostOnly orders that would cross the replayed book's touch are rejected \n
+    -> A new (or repriced/upsized) order joins the back of the queue at its level, trades at that price eat the queue first \n
+    -> Trades through an order's price fill it completely \n
+    -> Matching runs on float prices/sizes like the replayed feed, acks convert back to ticks/lots for the OrderStore
+    """
+
+    def __init__(
+        self,
+        sharedstate: SharedState,
+        order_latency: float = 0.010,
+        ack_latency: float = 0.005,
+        maker_fee: float = 0.0002,
+    ) -> None:
+        self.ss = sharedstate
+        self.book = self.ss.bybit_book
+        self.order_latency = order_latency
+        self.ack_latency = ack_latency
+        self.maker_fee = maker_fee
+
+        self.now = 0.0
+        self._events = []
+        self._seq = 0
+        self._next_id = 0
+        self._sim_order = SimOrder(self)
+
+        # orderId -> [side, price, qty, qty queued ahead of us]
+        self.orders = {}
+
+        # Account
+        self.position = 0.0
+        self.cash = 0.0
+        self.fees = 0.0
+        self.last_price = 0.0
+
+        # Counters
+        self.requests = 0
+        self.rejects = 0
+        self.fills = 0
+        self.volume = 0.0
+
+    def order(self, sharedstate: SharedState) -> SimOrder:
+        """
+        Factory with the same call signature as Order, pass it as Diff(ss, order=exchange.order)
+        """
+        return self._sim_order
+
+    def _schedule(self, delay: float, fn, *args) -> None:
+        self._seq += 1
+        heapq.heappush(self._events, (self.now + delay, self._seq, fn, args))
+
+    def advance(self, now: float) -> None:
+        """
+        Runs every request/ack due up to the given simulation time
+        """
+        events = self._events
+
+        while events and events[0][0] <= now:
+            due, _, fn, args = heapq.heappop(events)
+            self.now = due
+            fn(*args)
+
+        self.now = now
+
+    # Strategy side \
+
+    def request_create(self, side: str, price: float, qty: float) -> str:
+        self._next_id += 1
+        orderId = f"sim-{self._next_id}"
+        self.requests += 1
+        self._schedule(self.order_latency, self._create, orderId, side, price, qty)
+        return orderId
+
+    def request_amend(self, orderId: str, price: float, qty: float) -> None:
+        self.requests += 1
+        self._schedule(self.order_latency, self._amend, orderId, price, qty)
+
+    def request_cancel(self, orderId: str) -> None:
+        self.requests += 1
+        self._schedule(self.order_latency, self._cancel, orderId)
+
+    def request_cancel_all(self) -> None:
+        self.requests += 1
+        self._schedule(self.order_latency, self._cancel_all)
+
+    # Exchange side \
+
+    def _crosses(self, side: str, price: float) -> bool:
+        if side == "Buy":
+            return self.book.ask_count > 0 and price >= self.book.best_ask
+        return self.book.bid_count > 0 and price <= self.book.best_bid
+
+    def _level_qty(self, side: str, price: float) -> float:
+        return self.book.bid_qty_at(price) if side == "Buy" else self.book.ask_qty_at(price)
+
+    def _create(self, orderId: str, side: str, price: float, qty: float) -> None:
+        if self._crosses(side, price):
+            self.rejects += 1
+            self._schedule(self.ack_latency, self._ack_closed, orderId)
+            return
+
+        self.orders[orderId] = [side, price, qty, self._level_qty(side, price)]
+        self._schedule(self.ack_latency, self._ack_open, orderId, side, price, qty)
+
+    def _amend(self, orderId: str, price: float, qty: float) -> None:
+        order = self.orders.get(orderId)
+
+        if order is None:
+            self.rejects += 1
+            self._schedule(self.ack_latency, self._ack_closed, orderId)
+            return
+
+        # Like Bybit, a PostOnly amend that would cross cancels the order
+        if self._crosses(order[0], price):
+            self.rejects += 1
+            self._cancel(orderId)
+            return
+
+        # Repricing or adding size loses queue priority
+        if price != order[1] or qty > order[2]:
+            order[3] = self._level_qty(order[0], price)
+
+        order[1] = price
+        order[2] = qty
+        self._schedule(self.ack_latency, self._ack_open, orderId, order[0], price, qty)
+
+    def _cancel(self, orderId: str) -> None:
+        if self.orders.pop(orderId, None) is None:
+            self.rejects += 1
+
+        self._schedule(self.ack_latency, self._ack_closed, orderId)
+
+    def _cancel_all(self) -> None:
+        for orderId in list(self.orders):
+            self._cancel(orderId)
+
+    def on_trades(self, trades: list) -> None:
+        """
+        Matches replayed public trades (Bybit publicTrade data) against resting orders
+        """
+        for trade in trades:
+            price = float(trade["p"])
+            size = float(trade["v"])
+            self.last_price = price
+
+            # Taker buys lift asks, taker sells hit bids
+            resting_side = "Sell" if trade["S"] == "Buy" else "Buy"
+
+            for orderId, order in list(self.orders.items()):
+                side, order_price, qty, queue = order
+
+                if side != resting_side:
+                    continue
+
+                through = order_price < price if side == "Sell" else order_price > price
+
+                if through:
+                    self._fill(orderId, order, qty)
+
+                elif order_price == price:
+                    queue -= size
+                    order[3] = max(queue, 0.0)
+
+                    if queue < 0:
+                        self._fill(orderId, order, min(-queue, qty))
+
+    def _fill(self, orderId: str, order: list, qty: float) -> None:
+        side, price = order[0], order[1]
+        notional = price * qty
+
+        if side == "Buy":
+            self.position += qty
+            self.cash -= notional
+        else:
+            self.position -= qty
+            self.cash += notional
+
+        self.fees += notional * self.maker_fee
+        self.fills += 1
+        self.volume += notional
+
+        order[2] -= qty
+        if order[2] <= 0:
+            del self.orders[orderId]
+
+        self._schedule(self.ack_latency, self._ack_fill, orderId, side, price, qty, order[2])
+
+    # Private feed side (what the bot sees) \
+
+    def _ticks(self, price: float) -> int:
+        return self.ss.bybit_ticks.to_step(price)
+
+    def _lots(self, qty: float) -> int:
+        return self.ss.bybit_lots.to_step(qty)
+
+    def _ack_open(self, orderId: str, side: str, price: float, qty: float) -> None:
+        if orderId in self.orders:
+            self.ss.current_orders.update(orderId, orderId, side, self._ticks(price), self._lots(qty), "New")
+
+    def _ack_closed(self, orderId: str) -> None:
+        self.ss.current_orders.remove(orderId)
+
+    def _ack_fill(self, orderId: str, side: str, price: float, qty: float, remaining: float) -> None:
+        self.ss.execution_feed.appendleft({orderId: {"side": side, "price": price, "qty": qty}})
+
+        if remaining <= 0:
+            self.ss.current_orders.remove(orderId)
+        elif orderId in self.ss.current_orders:
+            self.ss.current_orders.update(
+                orderId, orderId, side, self._ticks(price), self._lots(remaining), "PartiallyFilled"
+            )
+
+        self.ss.inventory_delta = self.position * price / self.ss.account_size
+
+    def pnl(self) -> float:
+        """
+        Realized + unrealized PnL (quote), marked at the last trade, net of fees
+        """
+        return self.cash + self.position * self.last_price - self.fees
@@ -1,34 +1,169 @@
-import numpy as np
+import asyncio
+from collections import deque
+
+import orjson
+
+from src.exchanges.common.booksync import BaseBookSync
 from src.exchanges.common.localorderbook import BaseOrderBook
-from src.sharedstate import SharedState
+from src.marketstate import BINANCE_BID
+
+# SharedState is not imported here, it imports this module to build its books
 
 
 class OrderBookBinance(BaseOrderBook):
     def process_snapshot(self, snapshot):
-        self.asks = np.array(snapshot["asks"], dtype=float)
-        self.bids = np.array(snapshot["bids"], dtype=float)
+        super().process_snapshot(snapshot["asks"], snapshot["bids"])
+
+    def splice_snapshot(self, snapshot):
+        super().splice_snapshot(snapshot["asks"], snapshot["bids"])
 
     def process_data(self, recv):
         recv_data = recv["data"]
+        self.update_book(recv_data["a"], recv_data["b"])
+
+
+class BinanceBookSync(BaseBookSync):
+    """
+    Keeps an OrderBookBinance consistent with the diff depth stream using the U/u update ids
+
+    _______________________________________________________________
+
+    -> Diffs are buffered while a REST snapshot loads, then replayed from lastUpdateId + 1 \n
+    -> The first sync (or one after a reconnect) loads a full snapshot of {depth} levels \n
+    -> A gap afterwards only fetches the top {resync_depth} levels and splices them in, deeper levels are kept \n
+    -> A snapshot the buffered diffs don't connect to is retried after a growing delay, after {max_retries} of them
+       the sequence is dropped and the next diff starts over from a full snapshot \n
+    -> Each loaded snapshot goes to {recorder} (if set) as {"stream", "full", "data"}, a replay feeds them back
+       through load_recorded() in place of REST calls (see replaying)
+    """
+
+    def __init__(
+        self, book: OrderBookBinance, snapshot, depth: int = 500, resync_depth: int = 100, max_retries: int = 5
+    ) -> None:
+        super().__init__(book)
+        self.snapshot = snapshot  # Coroutine function, (limit) -> REST orderbook snapshot
+        self.depth = depth
+        self.resync_depth = resync_depth
+        self.max_retries = max_retries
+        self.buffer = deque(maxlen=1000)
+
+        # Recording and replay of the snapshots, stream is the depth stream's name the records are tagged with
+        self.recorder = None
+        self.stream = ""
+        self.replaying = False  # Never fetches, waits for the next recorded snapshot instead
+
+    def reset(self) -> None:
+        super().reset()
+        self.buffer.clear()
+
+    def _apply(self, data) -> None:
+        self.book.update_book(data["a"], data["b"])
+        self._mark_updated(data["u"])
+
+    def _replay_buffer(self) -> bool:
+        """
+        Applies buffered diffs on top of the snapshot, False if they don't connect to it
+        """
+        while self.buffer:
+            data = self.buffer.popleft()
+
+            if data["u"] <= self.last_update_id:
+                continue
+
+            if data["U"] > self.last_update_id + 1:
+                self.buffer.appendleft(data)
+                return False
+
+            self._apply(data)
+
+        return True
+
+    async def _resync(self) -> None:
+        retries = 0
+
+        while True:
+            full = self.last_update_id == 0
+
+            try:
+                snapshot = await self.snapshot(self.depth if full else self.resync_depth)
+            except Exception as e:
+                print(f"Binance orderbook snapshot failed: {e}")
+                await asyncio.sleep(1)
+                continue
+
+            if self.recorder is not None:
+                self.recorder.record(orjson.dumps({"stream": self.stream, "full": full, "data": snapshot}))
+
+            if self._load(snapshot, full):
+                return
+
+            retries += 1
+
+            if retries >= self.max_retries:
+                print(f"Binance orderbook snapshot didn't connect to the stream {retries} times, starting over")
+                self.reset()
+                return
+
+            # The REST snapshot can lag the stream, give it time to catch up with the buffered diffs
+            await asyncio.sleep(0.25 * retries)
+
+    def _load(self, snapshot, full: bool) -> bool:
+        """
+        Loads (or splices in) a snapshot and the buffered diffs on top, False if they don't connect to it
+        """
+        if full:
+            self.book.process_snapshot(snapshot)
+        else:
+            self.book.splice_snapshot(snapshot)
+            self.resyncs += 1
+
+        self._mark_updated(snapshot["lastUpdateId"])
+
+        if self._replay_buffer():
+            self.synced = True
+            return True
+
+        self.gaps += 1
+        return False
+
+    def _schedule_resync(self) -> None:
+        if not self.replaying:
+            super()._schedule_resync()
+
+    def load_recorded(self, recv: dict) -> None:
+        """
+        Replays one recorded snapshot, diffs recorded before it are already buffered as they were live
+        """
+        self._load(recv["data"], recv["full"])
+
+    def process(self, recv) -> None:
+        data = recv["data"]
+
+        if not self.synced:
+            self.buffer.append(data)
+            self._schedule_resync()
+            return
+
+        if data["u"] <= self.last_update_id:
+            return
 
-        asks = np.array(recv_data["a"], dtype=float)
-        bids = np.array(recv_data["b"], dtype=float)
+        if data["U"] != self.last_update_id + 1:
+            self.buffer.append(data)
+            self._on_gap()
+            return
 
-        self.asks = self.update_book(self.asks, asks)
-        self.bids = self.update_book(self.bids, bids)
+        self._apply(data)
 
 
 class BinanceBBAHandler:
-    def __init__(self, sharedstate: SharedState, recv) -> None:
+    def __init__(self, sharedstate) -> None:
         self.ss = sharedstate
-        self.data = recv["data"]
 
-    def process(self):
+    def process(self, recv):
         """
         Realtime BBA updates
         """
+        data = recv["data"]
 
-        self.ss.binance_bba = np.array(
-            [[float(self.data["b"]), float(self.data["B"])], [float(self.data["a"]), float(self.data["A"])]],
-            dtype=float,
-        )
+        # Written in place under the market seqlock, readers never see a half updated bba \
+        self.ss.market.set_bba(BINANCE_BID, float(data["b"]), float(data["B"]), float(data["a"]), float(data["A"]))
@@ -1,4 +1,3 @@
-import numpy as np
 from src.sharedstate import SharedState
 
 
@@ -9,9 +8,9 @@ class BinanceTradesInit:
 
     def process(self):
         for row in self.data:
-            time = row["time"]
-            price = row["price"]
-            qty = row["qty"]
+            time = float(row["time"])
+            price = float(row["price"])
+            qty = float(row["qty"])
 
             if row["isBuyerMaker"]:
                 side = 1
@@ -19,31 +18,31 @@ class BinanceTradesInit:
             else:
                 side = 0
 
-            new_trade = np.array([[time, side, price, qty]], dtype=float)
-            self.ss.binance_trades.append(new_trade)
+            self.ss.binance_trades.append((time, side, price, qty))
+            self.ss.binance_trade_flow.on_trade(time, 1.0 - 2 * side, price, qty)
 
 
 class BinanceTradesHandler:
-    def __init__(self, sharedstate: SharedState, recv) -> None:
+    def __init__(self, sharedstate: SharedState) -> None:
         self.ss = sharedstate
-        self.data = recv["data"]
 
-    def process(self):
-        time = self.data["T"]
-        price = self.data["p"]
-        qty = self.data["q"]
+    def process(self, recv):
+        data = recv["data"]
+        time = float(data["T"])
+        price = float(data["p"])
+        qty = float(data["q"])
 
-        if self.data["m"]:
+        if data["m"]:
             side = 1
 
         else:
             side = 0
 
         # Update last price \
-        self.ss.binance_last_price = float(price)
+        self.ss.binance_last_price = price
 
-        # New trade \
-        new_trade = np.array([[time, side, price, qty]], dtype=float)
+        # Append to array, written straight into the ring's preallocated row (maxlen and overwrite handled) \
+        self.ss.binance_trades.append((time, side, price, qty))
 
-        # Append to array, ring buffer handles maxlen and overwrite \
-        self.ss.binance_trades.append(new_trade)
+        # Trade flow features \
+        self.ss.binance_trade_flow.on_trade(time, 1.0 - 2 * side, price, qty)
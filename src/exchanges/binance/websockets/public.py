@@ -26,22 +26,24 @@ class PublicWs:
 
         topiclist = []
 
-        url = self.spot_base + "/stream?streams="
-
         for topic in topics:
             if topic == "Trades":
-                stream = "{}@trade/".format(self.symbol)
+                topiclist.append("{}@trade".format(self.symbol))
 
             if topic == "Orderbook":
-                stream = "{}@depth@100ms/".format(self.symbol)
+                topiclist.append("{}@depth@100ms".format(self.symbol))
 
             if topic == "BBA":
-                stream = "{}@bookTicker/".format(self.symbol)
+                topiclist.append("{}@bookTicker".format(self.symbol))
 
             if topic == "Kline" and kwargs["interval"] is not None:
-                stream = "{}@kline_{}/".format(self.symbol, kwargs["interval"])
+                topiclist.append("{}@kline_{}".format(self.symbol, kwargs["interval"]))
+
+        return self.stream_url(topiclist), topiclist
 
-            url += stream
-            topiclist.append(stream[:-1])
+    def stream_url(self, topics: list) -> str:
+        """
+        Combined stream url for full stream names, of any symbols (up to 1024 streams)
+        """
 
-        return url[:-1], topiclist
+        return self.spot_base + "/stream?streams=" + "/".join(topics)
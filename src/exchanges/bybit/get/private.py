@@ -1,11 +1,12 @@
-import json
 import time
 import hashlib
 import hmac
-import aiohttp
+
+import orjson
 
 from src.sharedstate import SharedState
 from src.exchanges.bybit.order.endpoints import BaseEndpoints
+from src.exchanges.bybit.order.gateway import OrderGateway
 
 OPEN_ORDERS = "/v5/order/realtime"
 CURRENT_POSITION = "/v5/position/list"
@@ -14,11 +15,13 @@ CURRENT_POSITION = "/v5/position/list"
 class BybitPrivateClient:
     def __init__(self, sharedstate: SharedState) -> None:
         self.ss = sharedstate
-        self.base_endpoint = BaseEndpoints.MAINNET1
+        self.base_endpoint = BaseEndpoints.ACTIVE
         self.api_key = self.ss.api_key
         self.api_secret = self.ss.api_secret
         self.recvWindow = "5000"
-        self.session = aiohttp.ClientSession()
+
+        # Shares the gateway's keep-alive pool rather than opening a session per client
+        self.session = OrderGateway.get(self.ss).session(self.base_endpoint)
 
         # Compute headers only once
         self.static_headers = {"X-BAPI-API-KEY": self.api_key, "X-BAPI-SIGN-TYPE": "2"}
@@ -36,35 +39,60 @@ class BybitPrivateClient:
 
         return headers
 
-    async def open_orders(self):
-        symbol = self.ss.bybit_symbol
-        params = f"category=linear&symbol={symbol}&limit=50"
-        endpoint = f"{self.base_endpoint}{OPEN_ORDERS}?{params}"
+    async def _get(self, path: str, params: str):
+        endpoint = f"{self.base_endpoint}{path}?{params}"
 
         try:
             # Submit request to the session
-            req = await self.session.request(method="GET", url=endpoint, headers=self._sign(params))
+            async with self.session.get(endpoint, headers=self._sign(params)) as req:
+                response = orjson.loads(await req.read())
 
-            response = json.loads(await req.text())
             return response
 
         except Exception as e:
             print(e)
 
+    async def open_orders(self):
+        symbol = self.ss.bybit_symbol
+        params = f"category=linear&symbol={symbol}&limit=50"
+        return await self._get(OPEN_ORDERS, params)
+
     async def current_position(self):
         symbol = self.ss.bybit_symbol
         params = f"category=linear&symbol={symbol}"
-        endpoint = f"{self.base_endpoint}{CURRENT_POSITION}?{params}"
-
-        try:
-            # Submit request to the session
-            req = await self.session.request(method="GET", url=endpoint, headers=self._sign(params))
-
-            response = json.loads(await req.text())
-            return response
-
-        except Exception as e:
-            print(e)
-
-    async def close(self):
-        await self.session.close()
+        return await self._get(CURRENT_POSITION, params)
+
+    async def _settle_pages(self, path: str, settle_coin: str, limit: int) -> list | None:
+        """
+        Every page of a settle coin wide list, None if any page failed
+        """
+        items = []
+        cursor = ""
+
+        while True:
+            params = f"category=linear&settleCoin={settle_coin}&limit={limit}"
+            if cursor:
+                params += f"&cursor={cursor}"
+
+            recv = await self._get(path, params)
+            if not recv or recv.get("retCode") != 0:
+                return None
+
+            result = recv["result"]
+            items.extend(result["list"])
+            cursor = result.get("nextPageCursor", "")
+
+            if not cursor or not result["list"]:
+                return items
+
+    async def settle_open_orders(self, settle_coin: str) -> list | None:
+        """
+        Open orders of every symbol settled in {settle_coin}, for reconciling many instruments at once
+        """
+        return await self._settle_pages(OPEN_ORDERS, settle_coin, 50)
+
+    async def settle_positions(self, settle_coin: str) -> list | None:
+        """
+        Positions of every symbol settled in {settle_coin}
+        """
+        return await self._settle_pages(CURRENT_POSITION, settle_coin, 200)
@@ -1,4 +1,6 @@
 from pybit.unified_trading import HTTP
+
+from src.exchanges.bybit.order.endpoints import BaseEndpoints
 from src.sharedstate import SharedState
 
 
@@ -12,6 +14,10 @@ class BybitPublicClient:
     def session(self):
         if self._session is None:
             self._session = HTTP(api_key=self.ss.api_key, api_secret=self.ss.api_secret)
+
+            # pybit builds its own host, redirect it when running against the local simulator
+            if BaseEndpoints.ACTIVE != BaseEndpoints.MAINNET1:
+                self._session.endpoint = BaseEndpoints.ACTIVE
         return self._session
 
     async def klines(self, interval: int):
@@ -1,70 +1,89 @@
 import asyncio
 import hashlib
 import hmac
-import json
 import time
 
 import aiohttp
+import orjson
 
 from src.exchanges.bybit.order.endpoints import BaseEndpoints
 
 
 class Client:
     def __init__(self, api_key: str, api_secret: str) -> None:
-        self.base_endpoint = BaseEndpoints.MAINNET1
+        self.base_endpoint = BaseEndpoints.ACTIVE
         self.api_key = api_key
         self.api_secret = api_secret
         self.recvWindow = "5000"
-        self.timestamp = str(int(time.time() * 1000))
 
-    def _sign(self, payload: str) -> dict:
-        param_str = "".join([self.timestamp, self.api_key, self.recvWindow, payload])
-        header = {
-            "X-BAPI-TIMESTAMP": self.timestamp,
+        # Everything but the timestamp and payload is fixed, so prepare it once
+        self._hmac = hmac.new(bytes(self.api_secret, "utf-8"), digestmod=hashlib.sha256)
+        self._sign_suffix = f"{self.api_key}{self.recvWindow}".encode("utf-8")
+        self._static_headers = {
             "X-BAPI-API-KEY": self.api_key,
             "X-BAPI-RECV-WINDOW": self.recvWindow,
+            "Content-Type": "application/json",
         }
-        hash_signature = hmac.new(bytes(self.api_secret, "utf-8"), param_str.encode("utf-8"), hashlib.sha256)
+
+        # Called with (endpoint, response headers) after every request, used to track rate limits
+        self.on_response_headers = None
+
+    def _sign(self, payload: bytes) -> dict:
+        timestamp = str(int(time.time() * 1000))
+
+        hash_signature = self._hmac.copy()
+        hash_signature.update(timestamp.encode("utf-8") + self._sign_suffix + payload)
+
+        header = self._static_headers.copy()
+        header["X-BAPI-TIMESTAMP"] = timestamp
         header["X-BAPI-SIGN"] = hash_signature.hexdigest()
         return header
 
-    async def submit(self, session: aiohttp.ClientSession, endpoint: str, payload: dict):
-        payload_str = json.dumps(payload)
-        signed_header = self._sign(payload_str)
+    async def submit(self, session: aiohttp.ClientSession, endpoint: str, payload: bytes | dict):
+        """
+        Signs and POSTs a payload, pre-serialized bytes are sent as-is
+        """
+        if isinstance(payload, dict):
+            payload = orjson.dumps(payload)
+
+        signed_header = self._sign(payload)
+        path = endpoint
         endpoint = self.base_endpoint + endpoint
 
         max_retries = 3
 
         for attempt in range(max_retries):
             try:
-                req = await session.request("POST", endpoint, headers=signed_header, data=payload_str)
-                response_data = await req.text()
-                response = json.loads(response_data)
+                async with session.post(endpoint, headers=signed_header, data=payload) as req:
+                    response = orjson.loads(await req.read())
+
+                    if self.on_response_headers is not None:
+                        self.on_response_headers(path, req.headers)
 
                 ret_msg = response.get("retMsg", "")
                 if ret_msg in ["OK", "success"]:
-                    return {"return": response["result"], "latency": int(response["time"]) - int(self.timestamp)}
+                    latency = int(response["time"]) - int(signed_header["X-BAPI-TIMESTAMP"])
+                    return {"return": response["result"], "latency": latency}
                 elif ret_msg == "too many visit":
                     print("Rate limits hit, cooling off...")
                     break
                 elif response.get("retCode") == "110001":
-                    print(f"Msg: {ret_msg}, Payload: {payload_str}")
+                    print(f"Msg: {ret_msg}, Payload: {payload.decode()}")
                     break
                 else:
-                    print(f"Msg: {ret_msg}, Payload: {payload_str}")
+                    print(f"Msg: {ret_msg}, Payload: {payload.decode()}")
                     break
 
             except Exception as e:
                 print(f"Error at {endpoint}: {e}")
                 if attempt < max_retries - 1:
                     await asyncio.sleep(attempt + 1)
-                    self.timestamp = str(int(time.time() * 1000))
-                    signed_header = self._sign(payload_str)
+                    signed_header = self._sign(payload)
                 else:
                     raise
 
 
 # Usage
-# async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit_per_host=10)) as session:
-#     client = Client(api_key="your_api_key", api_secret="your_api_secret")
-#     await client.submit(session, "/some_endpoint", {"key": "value"})
+# gateway = OrderGateway.get(sharedstate)
+# await gateway.start()
+# await gateway.submit("/some_endpoint", b'{"key": "value"}')
@@ -1,85 +1,87 @@
 import asyncio
-import json
 
-import aiohttp
-
-from src.exchanges.bybit.order.client import Client
 from src.exchanges.bybit.order.endpoints import OrderEndpoints
-from src.exchanges.bybit.order.types import OrderTypesFutures
+from src.exchanges.bybit.order.gateway import OrderGateway
 from src.sharedstate import SharedState
 
 
 class Order:
-    # {order}: Tuple of struct (side: string, price: float, qty: float)
+    # {order}: Tuple of struct (side: string, price: int ticks, qty: int lots)
+    # Cheap to construct, every instance shares the long-lived OrderGateway (sessions, signing, templates)
 
     def __init__(self, sharedstate: SharedState):
         self.ss = sharedstate
-        self.order_market = OrderTypesFutures(self.ss.bybit_symbol)
-        self.api_key = self.ss.api_key
-        self.api_secret = self.ss.api_secret
-        self.client = Client(self.api_key, self.api_secret)
-        self.session = aiohttp.ClientSession()
+        self.gateway = OrderGateway.get(self.ss)
+        self.scheduler = self.gateway.scheduler
+        self.order_market = self.gateway.types(self.ss.bybit_symbol)
         self.endpoints = OrderEndpoints
+        self.store = self.ss.current_orders
+        self.ticks = self.ss.bybit_ticks
+        self.lots = self.ss.bybit_lots
 
     def _extract_order(self, order):
-        return tuple(map(str, order))
+        # Ticks/lots only become decimal strings here, on the way into the payload
+        return str(order[0]), self.ticks.format_step(order[1]), self.lots.format_step(order[2])
+
+    def _acknowledge(self, orderLinkId: str, result: dict | None) -> None:
+        """
+        Matches a create (single or batch) response back to the pending order, drops it if it was not placed
+        """
+        if result is not None:
+            ret = result["return"]
+
+            for placed in ret.get("list", [ret]):
+                if placed.get("orderLinkId") == orderLinkId and placed.get("orderId"):
+                    self.store.acknowledge(orderLinkId, placed["orderId"])
+                    return
+
+        self.store.reject_new(orderLinkId)
 
     async def _submit_order(self, payload):
-        async with self.session:
-            return await self.client.order(self.session, payload)
+        return await self.scheduler.create(payload, self.order_market.batch_payload)
 
     async def submit_market(self, order: tuple) -> dict | None:
         side, _, qty = self._extract_order(order)
-        payload = self.order_market.market(side, qty)
-        return await self._submit_order(payload)
+        payload = self.order_market.create_market_payload(side, qty)
+        return await self.scheduler.submit_now(self.endpoints.CREATE_ORDER, payload)
 
     async def submit_limit(self, order: tuple) -> dict | None:
         side, price, qty = self._extract_order(order)
-        payload = self.order_market.limit(side, price, qty)
-        return await self._submit_order(payload)
-
-    async def submit_batch(self, orders: list) -> dict:
-        single_endpoint = self.endpoints.CREATE_ORDER
-        batch_endpoint = self.endpoints.CREATE_BATCH
+        orderLinkId = self.gateway.next_link_id()
+        payload = self.order_market.create_limit_payload(side, price, qty, orderLinkId)
 
-        async def submit_sessionless_limit(order):
-            payload = self.order_market.limit(order)
-            return await self.client.submit(self.session, single_endpoint, payload)
+        self.store.pending_new(orderLinkId, side, order[1], order[2])
+        result = await self._submit_order(payload)
+        self._acknowledge(orderLinkId, result)
+        return result
 
-        tasks = [submit_sessionless_limit(order) for order in orders[:4]]
-
-        # Split the remaining orders into chunks of 10
-        for i in range(4, len(orders), 10):
-            batch = [self.order_market.limit(order) for order in orders[i : i + 10]]
-            batch_payload = {"category": "linear", "request": batch}
-            task = self.client.submit(self.session, batch_endpoint, batch_payload)
-            tasks.append(task)
-
-        await asyncio.gather(*tasks)
+    async def submit_batch(self, orders: list) -> dict:
+        # The scheduler groups whatever is queued together into batch requests when that saves quota
+        await asyncio.gather(*[self.submit_limit(order) for order in orders])
 
     async def amend(self, order: tuple) -> dict | None:
-        async with self.session:
-            payload = self.order_market.amend(order)
-            return await self.client.submit(self.session, self.endpoints.AMEND_ORDER, payload)
+        orderId, price, qty = self._extract_order(order)
+        payload = self.order_market.amend_payload(orderId, price, qty)
 
-    async def amend_batch(self, orders: list) -> json:
-        batch_endpoint = self.endpoints.AMEND_BATCH
-        batch = [self.order_market.amend(order) for order in orders]
-        batch_payload = {"category": "linear", "request": batch}
-        await self.client.submit(self.session, batch_endpoint, batch_payload)
+        self.store.pending_amend(orderId, order[1], order[2])
+        return await self.scheduler.amend(orderId, payload, self.order_market.batch_payload)
+
+    async def amend_batch(self, orders: list):
+        await asyncio.gather(*[self.amend(order) for order in orders])
 
     async def cancel(self, orderId: str) -> dict | None:
-        async with self.session:
-            payload = self.order_market.cancel(orderId)
-            return await self.client.submit(self.session, self.endpoints.CANCEL_SINGLE, payload)
+        payload = self.order_market.cancel_payload(orderId)
+
+        # A cancel that fails is noticed by the store's REST reconcile, which puts the order back
+        self.store.pending_cancel(orderId)
+        return await self.scheduler.cancel(orderId, payload, self.order_market.batch_payload)
 
     async def cancel_batch(self, orderIds: list):
-        batch_endpoint = self.endpoints.CANCEL_BATCH
-        batch = [self.order_market.cancel(order_id) for order_id in orderIds]
-        batch_payload = {"category": "linear", "request": batch}
-        await self.client.submit(self.session, batch_endpoint, batch_payload)
+        await asyncio.gather(*[self.cancel(order_id) for order_id in orderIds])
 
     async def cancel_all(self) -> dict | None:
-        async with self.session:
-            payload = self.order_market.cancel_all()
-            return await self.client.submit(self.session, self.endpoints.CANCEL_ALL, payload)
+        self.scheduler.drop_pending(self.order_market.batch_payload)
+        payload = self.order_market.cancel_all_payload()
+
+        self.store.pending_cancel_all()
+        return await self.scheduler.submit_now(self.endpoints.CANCEL_ALL, payload)
@@ -5,6 +5,7 @@ from dataclasses import dataclass
 class BaseEndpoints:
     MAINNET1 = "https://api.bybit.com"
     MAINNET2 = "https://api.bytick.com"
+    ACTIVE = MAINNET1  # Switched by use_local_exchange() to run against the local simulator
 
 
 @dataclass
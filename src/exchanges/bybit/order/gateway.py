@@ -0,0 +1,165 @@
+import asyncio
+import itertools
+import time
+
+import aiohttp
+
+from src.exchanges.bybit.order.client import Client
+from src.exchanges.bybit.order.endpoints import BaseEndpoints
+from src.exchanges.bybit.order.scheduler import OrderScheduler
+from src.exchanges.bybit.order.types import OrderTypesFutures
+from src.exchanges.bybit.order.wstransport import WsOrderTransport, WsTransportUnavailable
+from src.sharedstate import SharedState
+from src.utils.latency import LatencyHistogram
+
+SERVER_TIME = "/v5/market/time"
+
+
+class OrderGateway:
+    """
+    Long-lived owner of the signed Client and one keep-alive connection pool per REST host
+
+    _______________________________________________________________
+
+    -> One gateway per API key, fetch it with OrderGateway.get(sharedstate) \n
+    -> start() opens {pool_size} connections up front and keeps them warm, so requests never pay for TCP/TLS setup \n
+    -> Sessions are never closed by callers, only by close() on shutdown \n
+    -> Order requests normally go through self.scheduler, which keeps them inside Bybit's rate limits \n
+    -> With order_transport: WS, orders go over the /v5/trade websocket and fall back to REST when it is unavailable
+    """
+
+    _instances = {}
+
+    def __init__(self, sharedstate: SharedState, pool_size: int = 10, keepalive_interval: float = 15.0) -> None:
+        self.ss = sharedstate
+        self.pool_size = pool_size
+        self.keepalive_interval = keepalive_interval
+
+        self.client = Client(self.ss.api_key, self.ss.api_secret)
+        self.scheduler = OrderScheduler(self)
+        self.client.on_response_headers = self.scheduler.update_limits
+        self.sessions = {}
+        self.order_types = {}
+        self._keepalive_task = None
+
+        # Client order ids, unique per run so pending creates can be matched to their orderId
+        self._link_prefix = f"mm{int(time.time())}-"
+        self._link_counter = itertools.count(1)
+
+        self.ws = None
+        if self.ss.order_transport == "WS":
+            self.ws = WsOrderTransport(self.client, ws_options=self.ss.ws_options)
+
+        self.rest_latency = LatencyHistogram()
+
+    @classmethod
+    def get(cls, sharedstate: SharedState) -> "OrderGateway":
+        gateway = cls._instances.get(sharedstate.api_key)
+
+        if gateway is None:
+            gateway = cls(sharedstate)
+            cls._instances[sharedstate.api_key] = gateway
+
+        return gateway
+
+    def session(self, host: str = None) -> aiohttp.ClientSession:
+        host = host or self.client.base_endpoint
+        session = self.sessions.get(host)
+
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=self.pool_size,
+                keepalive_timeout=60,
+                ttl_dns_cache=300,
+                enable_cleanup_closed=True,
+            )
+            session = aiohttp.ClientSession(connector=connector)
+            self.sessions[host] = session
+
+        return session
+
+    def types(self, symbol: str) -> OrderTypesFutures:
+        """
+        Payload templates per symbol, built once
+        """
+        order_types = self.order_types.get(symbol)
+
+        if order_types is None:
+            order_types = OrderTypesFutures(symbol)
+            self.order_types[symbol] = order_types
+
+        return order_types
+
+    def next_link_id(self) -> str:
+        return f"{self._link_prefix}{next(self._link_counter)}"
+
+    async def _ping(self, session: aiohttp.ClientSession, host: str) -> None:
+        try:
+            async with session.get(host + SERVER_TIME) as resp:
+                await resp.read()
+        except Exception as e:
+            print(f"Gateway warmup to {host} failed: {e}")
+
+    async def warm(self) -> None:
+        """
+        Opens pool_size concurrent connections to every host so they sit in the pool ready
+        """
+        for host in {self.client.base_endpoint, BaseEndpoints.ACTIVE}:
+            session = self.session(host)
+            await asyncio.gather(*[self._ping(session, host) for _ in range(self.pool_size)])
+
+    async def _keepalive(self) -> None:
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            await self.warm()
+
+    async def start(self) -> None:
+        await self.warm()
+
+        if self.ws is not None:
+            await self.ws.start()
+
+        if self._keepalive_task is None:
+            self._keepalive_task = asyncio.create_task(self._keepalive(), name="OrderGatewayKeepalive")
+
+    async def submit(self, endpoint: str, payload: bytes | dict):
+        sent = self.ss.latency.request_sent()
+
+        if self.ws is not None and self.ws.supports(endpoint):
+            try:
+                result = await self.ws.submit(endpoint, payload)
+                self.ss.latency.request_acked(sent)
+                return result
+            except WsTransportUnavailable:
+                self.ws.fallbacks += 1
+
+        start = time.perf_counter()
+        result = await self.client.submit(self.session(), endpoint, payload)
+        self.rest_latency.record(time.perf_counter() - start)
+        self.ss.latency.request_acked(sent)
+        return result
+
+    def latency_stats(self) -> dict:
+        """
+        Round trip latency per transport, for comparing REST and the trade stream under the same load
+        """
+        stats = {"rest": self.rest_latency.summary()}
+
+        if self.ws is not None:
+            stats["ws"] = self.ws.latency.summary()
+            stats["ws"]["fallbacks"] = self.ws.fallbacks
+
+        return stats
+
+    async def close(self) -> None:
+        if self._keepalive_task is not None:
+            self._keepalive_task.cancel()
+            self._keepalive_task = None
+
+        if self.ws is not None:
+            await self.ws.close()
+
+        for session in self.sessions.values():
+            await session.close()
+
+        self.sessions.clear()
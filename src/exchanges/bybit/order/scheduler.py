@@ -0,0 +1,225 @@
+import asyncio
+import time
+
+from src.exchanges.bybit.order.endpoints import OrderEndpoints
+
+
+class EndpointBucket:
+    """
+    Local view of one endpoint's rate limit, corrected by Bybit's X-Bapi-Limit* response headers
+    """
+
+    def __init__(self, limit: int = 10, headroom: int = 1) -> None:
+        self.limit = limit
+        self.headroom = headroom
+        self.remaining = limit
+        self.reset_at = 0.0
+
+    def _refresh(self, now: float) -> None:
+        if now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = now + 1.0
+
+    def available(self, now: float) -> int:
+        self._refresh(now)
+        return max(0, self.remaining - self.headroom)
+
+    def take(self, now: float, n: int = 1) -> None:
+        self._refresh(now)
+        self.remaining -= n
+
+    def update(self, headers) -> None:
+        limit = headers.get("X-Bapi-Limit")
+        status = headers.get("X-Bapi-Limit-Status")
+        reset = headers.get("X-Bapi-Limit-Reset-Timestamp")
+
+        if limit is None or status is None or reset is None:
+            return
+
+        self.limit = int(limit)
+        self.remaining = int(status)
+        self.reset_at = int(reset) / 1000
+
+
+class OrderScheduler:
+    """
+    Rate-limit aware queue in front of the Bybit order endpoints
+
+    _______________________________________________________________
+
+    -> Every endpoint has its own bucket, kept in step with the limits Bybit reports on each response \n
+    -> Pending amends are keyed by orderId, a newer target replaces an unsent one (the old caller gets None) \n
+    -> A cancel drops any pending amend for the same order, cancel_all drops everything pending \n
+    -> When 2+ requests of a kind are waiting and the batch bucket has room they go out as one batch request \n
+    -> Anything the buckets can't cover waits for the earliest reset instead of being throttled
+    """
+
+    BATCH_SIZE = 10
+
+    def __init__(self, gateway, headroom: int = 1) -> None:
+        self.gateway = gateway
+        self.headroom = headroom
+        self.endpoints = OrderEndpoints
+        self.buckets = {}
+
+        # Entries are (payload, future, batch_payload) so any symbol's requests can share a batch
+        self.creates = []
+        self.amends = {}  # orderId -> entry
+        self.cancels = {}  # orderId -> entry
+
+        self.coalesced = 0
+        self.batched = 0
+
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def bucket(self, endpoint: str) -> EndpointBucket:
+        bucket = self.buckets.get(endpoint)
+
+        if bucket is None:
+            bucket = EndpointBucket(headroom=self.headroom)
+            self.buckets[endpoint] = bucket
+
+        return bucket
+
+    def update_limits(self, endpoint: str, headers) -> None:
+        self.bucket(endpoint).update(headers)
+
+    def _start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="OrderScheduler")
+
+        self._wakeup.set()
+
+    # Queueing \
+
+    def create(self, payload: bytes, batch_payload) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self.creates.append((payload, future, batch_payload))
+        self._start()
+        return future
+
+    def amend(self, orderId: str, payload: bytes, batch_payload) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        previous = self.amends.get(orderId)
+
+        if previous is not None:
+            if not previous[1].done():
+                previous[1].set_result(None)
+            self.coalesced += 1
+
+        self.amends[orderId] = (payload, future, batch_payload)
+        self._start()
+        return future
+
+    def cancel(self, orderId: str, payload: bytes, batch_payload) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+
+        for superseded in (self.amends.pop(orderId, None), self.cancels.get(orderId)):
+            if superseded is not None:
+                if not superseded[1].done():
+                    superseded[1].set_result(None)
+                self.coalesced += 1
+
+        self.cancels[orderId] = (payload, future, batch_payload)
+        self._start()
+        return future
+
+    def drop_pending(self, batch_payload=None) -> None:
+        """
+        Resolves queued requests with None without sending them, used by cancel_all \n
+        Only one symbol's requests if given its batch_payload, the other instruments sharing the scheduler keep theirs
+        """
+
+        def dropped(entry) -> bool:
+            if batch_payload is not None and entry[2] != batch_payload:
+                return False
+
+            if not entry[1].done():
+                entry[1].set_result(None)
+            return True
+
+        self.creates = [entry for entry in self.creates if not dropped(entry)]
+        self.amends = {orderId: entry for orderId, entry in self.amends.items() if not dropped(entry)}
+        self.cancels = {orderId: entry for orderId, entry in self.cancels.items() if not dropped(entry)}
+
+    async def submit_now(self, endpoint: str, payload: bytes):
+        """
+        Sends straight away (e.g. cancel_all), only recording the request against the endpoint's bucket
+        """
+        self.bucket(endpoint).take(time.time())
+        return await self.gateway.submit(endpoint, payload)
+
+    # Dispatch \
+
+    async def _send(self, endpoint: str, payload: bytes, futures: list) -> None:
+        try:
+            result = await self.gateway.submit(endpoint, payload)
+        except Exception as e:
+            result = None
+            print(f"Scheduler request to {endpoint} failed: {e}")
+
+        for future in futures:
+            if not future.done():
+                future.set_result(result)
+
+    def _dispatch_kind(self, pending: list, single_endpoint: str, batch_endpoint: str, now: float) -> list:
+        """
+        Sends as much of one request kind as the buckets allow, returns the (key, entry) pairs left over
+        """
+        batch_bucket = self.bucket(batch_endpoint)
+
+        while len(pending) >= 2 and batch_bucket.available(now) > 0:
+            chunk, pending = pending[: self.BATCH_SIZE], pending[self.BATCH_SIZE :]
+            batch_bucket.take(now)
+            self.batched += len(chunk) - 1
+
+            batch_payload = chunk[0][1][2]
+            payload = batch_payload([entry[0] for _, entry in chunk])
+            asyncio.create_task(self._send(batch_endpoint, payload, [entry[1] for _, entry in chunk]))
+
+        single_bucket = self.bucket(single_endpoint)
+
+        while pending and single_bucket.available(now) > 0:
+            (_, (payload, future, _)), pending = pending[0], pending[1:]
+            single_bucket.take(now)
+            asyncio.create_task(self._send(single_endpoint, payload, [future]))
+
+        return pending
+
+    def _dispatch(self) -> None:
+        now = time.time()
+
+        # Cancels first (they reduce risk), then amends, then new orders
+        cancels = self._dispatch_kind(
+            list(self.cancels.items()), self.endpoints.CANCEL_SINGLE, self.endpoints.CANCEL_BATCH, now
+        )
+        self.cancels = dict(cancels)
+
+        amends = self._dispatch_kind(
+            list(self.amends.items()), self.endpoints.AMEND_ORDER, self.endpoints.AMEND_BATCH, now
+        )
+        self.amends = dict(amends)
+
+        creates = self._dispatch_kind(
+            [(None, entry) for entry in self.creates], self.endpoints.CREATE_ORDER, self.endpoints.CREATE_BATCH, now
+        )
+        self.creates = [entry for _, entry in creates]
+
+    def _next_reset(self) -> float:
+        now = time.time()
+        return min((bucket.reset_at - now for bucket in self.buckets.values() if bucket.reset_at > now), default=0.001)
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+            # Let the current strategy tick finish queueing so its requests can be coalesced/batched
+            await asyncio.sleep(0)
+
+            self._dispatch()
+
+            while self.creates or self.amends or self.cancels:
+                await asyncio.sleep(max(self._next_reset(), 0.001))
+                self._dispatch()
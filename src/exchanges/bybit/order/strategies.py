@@ -16,18 +16,21 @@ class OrderStrategies:
         comparison_operator = (lambda old, new: old < new) if side == "Buy" else (lambda old, new: old > new)
 
         try:
-            best_price = self.ss.bybit_bba[best_price_index][0]
-            init_order_tuple = (side, best_price, qty)
+            ticks = self.ss.bybit_ticks
+            lots = self.ss.bybit_lots.to_step(qty)
+
+            best_price = ticks.to_step(self.ss.bybit_bba[best_price_index][0])
+            init_order_tuple = (side, best_price, lots)
             init_order = await Order(self.ss).submit_limit(init_order_tuple)
             curr_orderId = init_order["orderId"]
 
             while True:
                 await asyncio.sleep(0.1)
-                new_best_price = self.ss.bybit_bba[best_price_index][0]
+                new_best_price = ticks.to_step(self.ss.bybit_bba[best_price_index][0])
 
                 if comparison_operator(best_price, new_best_price):
                     best_price = new_best_price
-                    amend_order_tuple = (curr_orderId, best_price, qty)
+                    amend_order_tuple = (curr_orderId, best_price, lots)
                     await Order(self.ss).amend(amend_order_tuple)
 
                 if self.ss.futures_execution_feed:
@@ -1,6 +1,8 @@
 from enum import Enum
 from typing import Union
 
+import orjson
+
 
 class OrderCategory(Enum):
     SPOT = "spot"
@@ -8,9 +10,19 @@ class OrderCategory(Enum):
 
 
 class OrderBase:
+    """
+    Builds order payloads as ready-to-send JSON bytes
+
+    _______________________________________________________________
+
+    -> Each payload shape is serialized once into a byte template with %b slots \n
+    -> Per order, only the variable fields (side/price/qty/orderId/orderLinkId) are formatted in
+    """
+
     def __init__(self, symbol: str, category: OrderCategory):
         self.symbol = symbol
         self.category = category.value
+        self._build_templates()
 
     def _base_payload(self) -> dict[str, str | int]:
         return {
@@ -18,32 +30,45 @@ class OrderBase:
             "symbol": self.symbol,
         }
 
-    def create_limit_payload(self, side: str, price: str, qty: str) -> dict:
-        return {
-            **self._base_payload(),
-            "side": side,
-            "orderType": "Limit",
-            "price": price,
-            "qty": qty,
-            "timeInForce": "PostOnly",
-        }
+    @staticmethod
+    def _template(payload: dict) -> bytes:
+        return orjson.dumps(payload).replace(b"%", b"%%").replace(b"%%b", b"%b")
 
-    def create_market_payload(self, side: str, qty: str) -> dict:
-        return {
-            **self._base_payload(),
-            "side": side,
-            "orderType": "Market",
-            "qty": qty,
-        }
+    def _build_templates(self) -> None:
+        base = self._base_payload()
 
-    def cancel_payload(self, orderId: str) -> dict:
-        return {**self._base_payload(), "orderId": orderId}
+        self._limit_template = self._template(
+            {
+                **base,
+                "side": "%b",
+                "orderType": "Limit",
+                "price": "%b",
+                "qty": "%b",
+                "timeInForce": "PostOnly",
+                "orderLinkId": "%b",
+            }
+        )
+        self._market_template = self._template({**base, "side": "%b", "orderType": "Market", "qty": "%b"})
+        self._cancel_template = self._template({**base, "orderId": "%b"})
+        self._batch_template = self._template({"category": self.category, "request": "%b"}).replace(b'"%b"', b"[%b]")
+
+    def create_limit_payload(self, side: str, price: str, qty: str, orderLinkId: str) -> bytes:
+        return self._limit_template % (side.encode(), price.encode(), qty.encode(), orderLinkId.encode())
+
+    def create_market_payload(self, side: str, qty: str) -> bytes:
+        return self._market_template % (side.encode(), qty.encode())
+
+    def cancel_payload(self, orderId: str) -> bytes:
+        return self._cancel_template % orderId.encode()
+
+    def batch_payload(self, requests: list[bytes]) -> bytes:
+        return self._batch_template % b",".join(requests)
 
 
 class OrderTypesSpot(OrderBase):
     def __init__(self, symbol: str, margin: bool):
-        super().__init__(symbol, OrderCategory.SPOT)
         self.is_leverage = 1 if margin else 0
+        super().__init__(symbol, OrderCategory.SPOT)
 
     def _base_payload(self) -> dict[str, Union[str, int]]:
         payload = super()._base_payload()
@@ -55,8 +80,14 @@ class OrderTypesFutures(OrderBase):
     def __init__(self, symbol: str):
         super().__init__(symbol, OrderCategory.LINEAR)
 
-    def amend_payload(self, order) -> dict:
-        return {**self._base_payload(), "orderId": order[0], "qty": order[2], "price": order[1]}
+    def _build_templates(self) -> None:
+        super()._build_templates()
+        base = self._base_payload()
+        self._amend_template = self._template({**base, "orderId": "%b", "qty": "%b", "price": "%b"})
+        self._cancel_all_template = orjson.dumps(base)
+
+    def amend_payload(self, orderId: str, price: str, qty: str) -> bytes:
+        return self._amend_template % (orderId.encode(), qty.encode(), price.encode())
 
-    def cancel_all_payload(self) -> dict:
-        return self._base_payload()
+    def cancel_all_payload(self) -> bytes:
+        return self._cancel_all_template
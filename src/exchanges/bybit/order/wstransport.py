@@ -0,0 +1,174 @@
+import asyncio
+import time
+
+import orjson
+import websockets
+
+from src.exchanges.bybit.order.endpoints import OrderEndpoints
+from src.exchanges.bybit.websockets.endpoints import WsStreamLinks
+from src.exchanges.bybit.websockets.private import PrivateWs
+from src.utils.latency import LatencyHistogram
+
+# REST endpoint -> trade stream operation, anything missing here (e.g. cancel-all) stays on REST
+WS_OPERATIONS = {
+    OrderEndpoints.CREATE_ORDER: b"order.create",
+    OrderEndpoints.AMEND_ORDER: b"order.amend",
+    OrderEndpoints.CANCEL_SINGLE: b"order.cancel",
+    OrderEndpoints.CREATE_BATCH: b"order.create-batch",
+    OrderEndpoints.AMEND_BATCH: b"order.amend-batch",
+    OrderEndpoints.CANCEL_BATCH: b"order.cancel-batch",
+}
+
+
+class WsTransportUnavailable(Exception):
+    """
+    Raised when a request could not be (safely) answered over the websocket and should go over REST instead
+    """
+
+
+class WsOrderTransport:
+    """
+    Sends order requests over Bybit's authenticated /v5/trade websocket
+
+    _______________________________________________________________
+
+    -> Takes the same (endpoint, payload bytes) as the REST client, the payload becomes the request's args \n
+    -> Responses are matched to their request by reqId, X-Bapi-Limit* headers are passed on like REST's \n
+    -> While disconnected, or if the socket drops mid-request, WsTransportUnavailable is raised so the caller
+       can fall back to REST. Creates that time out are not retried, they may already be resting
+    """
+
+    def __init__(self, client, timeout: float = 2.0, ping_interval: float = 20.0, ws_options: dict = None) -> None:
+        self.client = client
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+        self.ws_options = ws_options or {}
+        self.private_ws = PrivateWs(client.api_key, client.api_secret)
+
+        self.websocket = None
+        self.pending = {}  # reqId -> (future, endpoint)
+        self._req_id = 0
+        self._task = None
+
+        # Prefix ready for the reqId, timestamp, op and args to be formatted in
+        self._template = (
+            b'{"reqId":"%b","header":{"X-BAPI-TIMESTAMP":"%b","X-BAPI-RECV-WINDOW":"'
+            + client.recvWindow.encode()
+            + b'"},"op":"%b","args":[%b]}'
+        )
+
+        self.latency = LatencyHistogram()
+        self.fallbacks = 0
+
+    def supports(self, endpoint: str) -> bool:
+        return endpoint in WS_OPERATIONS
+
+    def _fail_pending(self) -> None:
+        for future, _ in self.pending.values():
+            if not future.done():
+                future.set_exception(WsTransportUnavailable("Trade stream disconnected"))
+
+        self.pending.clear()
+
+    def _on_message(self, frame) -> None:
+        recv = orjson.loads(frame)
+        entry = self.pending.pop(recv.get("reqId"), None)
+
+        if entry is None:
+            return
+
+        future, endpoint = entry
+        header = recv.get("header")
+
+        if header and self.client.on_response_headers is not None:
+            self.client.on_response_headers(endpoint, header)
+
+        if not future.done():
+            future.set_result(recv)
+
+    async def _authenticate(self, websocket) -> bool:
+        await websocket.send(self.private_ws.auth())
+        recv = orjson.loads(await asyncio.wait_for(websocket.recv(), self.timeout))
+        return recv.get("retCode") == 0 or recv.get("success") is True
+
+    async def _ping(self, websocket) -> None:
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            await websocket.send('{"op":"ping"}')
+
+    async def _run(self) -> None:
+        async for websocket in websockets.connect(WsStreamLinks.TRADE_STREAM, **self.ws_options):
+            pinger = None
+
+            try:
+                if not await self._authenticate(websocket):
+                    print("Trade stream auth rejected, orders stay on REST")
+                    return
+
+                self.websocket = websocket
+                pinger = asyncio.create_task(self._ping(websocket))
+
+                while True:
+                    self._on_message(await websocket.recv())
+
+            except (websockets.ConnectionClosed, asyncio.TimeoutError):
+                continue
+
+            finally:
+                self.websocket = None
+                self._fail_pending()
+
+                if pinger is not None:
+                    pinger.cancel()
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="WsOrderTransport")
+
+    async def submit(self, endpoint: str, payload: bytes):
+        websocket = self.websocket
+
+        if websocket is None:
+            raise WsTransportUnavailable("Trade stream not connected")
+
+        self._req_id += 1
+        req_id = str(self._req_id)
+        timestamp = str(int(time.time() * 1000))
+
+        future = asyncio.get_running_loop().create_future()
+        self.pending[req_id] = (future, endpoint)
+
+        start = time.perf_counter()
+        sent = False
+
+        try:
+            message = self._template % (req_id.encode(), timestamp.encode(), WS_OPERATIONS[endpoint], payload)
+            await websocket.send(message.decode())
+            sent = True
+            response = await asyncio.wait_for(future, self.timeout)
+
+        except (websockets.ConnectionClosed, WsTransportUnavailable, asyncio.TimeoutError) as e:
+            self.pending.pop(req_id, None)
+
+            if sent and endpoint in (OrderEndpoints.CREATE_ORDER, OrderEndpoints.CREATE_BATCH):
+                print(f"Trade stream lost {endpoint} after sending, not resending: {e!r}")
+                return None
+
+            raise WsTransportUnavailable(f"Trade stream failed: {e!r}")
+
+        self.latency.record(time.perf_counter() - start)
+
+        if response.get("retCode") != 0:
+            print(f"Msg: {response.get('retMsg')}, Payload: {payload.decode()}")
+            return None
+
+        latency = int(response["header"]["Timenow"]) - int(timestamp) if "header" in response else None
+        return {"return": response["data"], "latency": latency}
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        if self.websocket is not None:
+            await self.websocket.close()
@@ -6,3 +6,4 @@ class WsStreamLinks:
     SPOT_PUBLIC_STREAM = "wss://stream.bybit.com/v5/public/spot"
     FUTURES_PUBLIC_STREAM = "wss://stream.bybit.com/v5/public/linear"
     COMBINED_PRIVATE_STREAM = "wss://stream.bybit.com/v5/private"
+    TRADE_STREAM = "wss://stream.bybit.com/v5/trade"
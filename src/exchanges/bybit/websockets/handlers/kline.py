@@ -1,61 +1,92 @@
-from collections import deque
-
-import numpy as np
-import pandas as pd
-
-from src.indicators.bbw import bbw
+from src.indicators.bbw import BbwState
 from src.sharedstate import SharedState
+from src.strategy.features.momentum import TREND_LENGTHS, streaming_trend_feature
 
 
 class BybitKlineProcessor:
-    def __init__(self, sharedstate: SharedState, recv_data=None) -> None:
+    """
+    Writes klines into the SharedState's KlineStore, klines of the indicator interval also feed the indicators
+
+    _______________________________________________________________
+
+    -> REST klines (newest first) are loaded oldest first and seed the streaming indicators \n
+    -> A ws update for the live candle (confirm=false revisions, then the final confirm=true) overwrites it in place,
+       a later start time appends a new candle
+    """
+
+    def __init__(self, sharedstate: SharedState, recv_data=None, interval="1") -> None:
         self.ss = sharedstate
 
         if recv_data:
             self.data = recv_data["result"]["list"]
-            self.initialize_klines()
+            self.initialize_klines(str(interval))
         else:
             self.data = None
 
-    def initialize_klines(self):
-        """
-        Used to attain close values and calculate volatility
-        """
-        # Clear existing deque (if needed)
-        self.ss.bybit_klines.clear()
+    def initialize_klines(self, interval: str):
+        series = self.ss.bybit_klines[interval]
+        series.clear()
 
-        for candle in reversed(self.data):
-            self.ss.bybit_klines.append(candle)
+        for c in reversed(self.data):
+            series.append(int(c[0]), float(c[1]), float(c[2]), float(c[3]), float(c[4]), float(c[5]), float(c[6]))
 
-        self.update_volatility()
+        if interval == self.ss.bybit_kline_interval:
+            self.ss.bybit_bbw = BbwState(self.ss.bb_length, self.ss.bb_std)
+            self.ss.bybit_trend_ema.reset()
 
-    def process(self, new_data):
-        """
-        Used to attain close values and calculate volatility
-        """
-        self.data = new_data
-
-        for candle in self.data:
-            new = (
-                candle["start"],
-                candle["open"],
-                candle["high"],
-                candle["low"],
-                candle["close"],
-                candle["volume"],
-                candle["turnover"],
+            for close in series.closes().tolist():
+                self.ss.bybit_bbw.update(close)
+                self.ss.bybit_trend_ema.update(close)
+
+            self.update_volatility()
+            self.update_momentum()
+
+    def process(self, recv):
+        self.data = recv["data"]
+
+        for c in self.data:
+            interval = str(c["interval"])
+            close = float(c["close"])
+            status = self.ss.bybit_klines[interval].apply(
+                int(c["start"]),
+                float(c["open"]),
+                float(c["high"]),
+                float(c["low"]),
+                close,
+                float(c["volume"]),
+                float(c["turnover"]),
             )
 
-            if candle["confirm"]:
-                self.ss.bybit_klines.append(new)
+            if interval != self.ss.bybit_kline_interval or status < 0:
+                continue
+
+            if status:
+                self.ss.bybit_bbw.update(close)
+                self.ss.bybit_trend_ema.update(close)
             else:
-                self.ss.bybit_klines[-1] = new
+                self.ss.bybit_bbw.revise(close)
+                self.ss.bybit_trend_ema.revise(close)
 
             self.update_volatility()
+            self.update_momentum()
+
+    def reseed_bbw(self):
+        """
+        Rebuilds the bollinger state from the stored klines, after its length/std settings were changed
+        """
+        self.ss.bybit_bbw = BbwState(self.ss.bb_length, self.ss.bb_std)
+
+        for close in self.ss.bybit_klines[self.ss.bybit_kline_interval].closes().tolist():
+            self.ss.bybit_bbw.update(close)
 
     def update_volatility(self):
-        closes = [kline[4] for kline in self.ss.bybit_klines]
-        self.ss.volatility_value = bbw(
-            arr_in=np.array(closes, dtype=np.float64), length=self.ss.bb_length, std_numb=self.ss.bb_std
-        )
-        self.ss.volatility_value += self.ss.volatility_offset
+        bbw = self.ss.bybit_bbw
+
+        if bbw.length != self.ss.bb_length or bbw.std_numb != self.ss.bb_std:
+            self.reseed_bbw()
+
+        self.ss.volatility_value = self.ss.bybit_bbw.value + self.ss.volatility_offset
+
+    def update_momentum(self):
+        # The trend EMAs only move with the klines, so the feature is kept alongside them rather than per quote
+        self.ss.momentum_value = streaming_trend_feature(self.ss.bybit_trend_ema, TREND_LENGTHS)
@@ -7,19 +7,10 @@ class BybitOrderHandler:
         self.data = data
 
     def process(self):
-        current_orders = self.ss.current_orders
+        store = self.ss.current_orders
 
-        new_orders = {
-            order["orderId"]: {"price": order["price"], "qty": order["qty"], "side": order["side"]}
-            for order in self.data
-            if order.get("orderStatus") == "New"
-        }
-
-        filled_orders = set(order["orderId"] for order in self.data if order.get("orderStatus") == "Filled")
-
-        # Update the orders
-        current_orders.update(new_orders)
-
-        # Remove filled orders
-        for order_id in filled_orders:
-            current_orders.pop(order_id, None)
+        for order in self.data:
+            price, qty = store.parse(order["price"], order["qty"])
+            store.update(
+                order["orderId"], order.get("orderLinkId", ""), order["side"], price, qty, order["orderStatus"]
+            )
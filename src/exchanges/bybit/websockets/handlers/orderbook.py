@@ -1,40 +1,81 @@
-import numpy as np
+import asyncio
 
+from src.exchanges.common.booksync import BaseBookSync
 from src.exchanges.common.localorderbook import BaseOrderBook
-from src.sharedstate import SharedState
+from src.marketstate import BYBIT_ASK, BYBIT_BID
 
+# SharedState is not imported here, it imports this module to build its books
 
-class OrderBookBybit(BaseOrderBook):
-    def process_snapshot(self, asks, bids):
-        self.asks = np.array(asks, float)
-        self.bids = np.array(bids, float)
 
+class OrderBookBybit(BaseOrderBook):
     def process_data(self, recv):
-        asks = np.array(recv["data"]["a"], dtype=float)
-        bids = np.array(recv["data"]["b"], dtype=float)
+        asks = recv["data"]["a"]
+        bids = recv["data"]["b"]
 
         if recv["type"] == "snapshot":
             self.process_snapshot(asks, bids)
         elif recv["type"] == "delta":
-            self.asks = self.update_book(self.asks, asks)
-            self.bids = self.update_book(self.bids, bids)
+            self.update_book(asks, bids)
+
+
+class BybitBookSync(BaseBookSync):
+    """
+    Keeps an OrderBookBybit consistent with the orderbook.{depth} stream using the u update id
+
+    _______________________________________________________________
+
+    -> Snapshots (and deltas with u = 1, sent after a service restart) reset the book \n
+    -> Deltas are only applied if u follows on from the last applied one \n
+    -> On a gap only this topic is resubscribed on the open socket, Bybit answers with a fresh snapshot
+    """
+
+    def __init__(self, book: OrderBookBybit, resubscribe) -> None:
+        super().__init__(book)
+        self.resubscribe = resubscribe  # Coroutine function, () -> None
+
+    async def _resync(self) -> None:
+        while True:
+            try:
+                await self.resubscribe()
+                self.resyncs += 1
+                return
+            except Exception as e:
+                print(f"Bybit orderbook resubscribe failed: {e}")
+                await asyncio.sleep(1)
+
+    def process(self, recv) -> None:
+        data = recv["data"]
+        update_id = data["u"]
+
+        if recv["type"] == "snapshot" or update_id == 1:
+            self.book.process_snapshot(data["a"], data["b"])
+            self._mark_updated(update_id)
+            self.synced = True
+            return
+
+        # Deltas are useless until the next snapshot arrives
+        if not self.synced:
+            return
+
+        if update_id != self.last_update_id + 1:
+            self._on_gap()
+            return
+
+        self.book.update_book(data["a"], data["b"])
+        self._mark_updated(update_id)
 
 
 class BybitBBAHandler:
-    def __init__(self, sharedstate: SharedState, data: dict) -> None:
+    def __init__(self, sharedstate) -> None:
         self.ss = sharedstate
-        self.data = data
 
-    def process(self):
-        best_bid = self.data["b"]
-        best_ask = self.data["a"]
+    def process(self, recv):
+        best_bid = recv["data"]["b"]
+        best_ask = recv["data"]["a"]
 
         if len(best_bid) != 0:
-            # Directly assign to the existing array
-            self.ss.bybit_bba[0, 0] = float(best_bid[0][0])
-            self.ss.bybit_bba[0, 1] = float(best_bid[0][1])
+            # Written in place under the market seqlock
+            self.ss.market.set_quote(BYBIT_BID, float(best_bid[0][0]), float(best_bid[0][1]))
 
         if len(best_ask) != 0:
-            # Directly assign to the existing array
-            self.ss.bybit_bba[1, 0] = float(best_ask[0][0])
-            self.ss.bybit_bba[1, 1] = float(best_ask[0][1])
+            self.ss.market.set_quote(BYBIT_ASK, float(best_ask[0][0]), float(best_ask[0][1]))
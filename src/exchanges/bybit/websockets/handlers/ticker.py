@@ -2,10 +2,11 @@ from src.sharedstate import SharedState
 
 
 class BybitTickerHandler:
-    def __init__(self, sharedstate: SharedState, data) -> None:
+    def __init__(self, sharedstate: SharedState) -> None:
         self.ss = sharedstate
-        self.data = data
 
-    def process(self):
-        if "markPrice" in self.data:
-            self.ss.bybit_mark_price = float(self.data["markPrice"])
+    def process(self, recv):
+        data = recv["data"]
+
+        if "markPrice" in data:
+            self.ss.bybit_mark_price = float(data["markPrice"])
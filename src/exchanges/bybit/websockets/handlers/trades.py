@@ -9,21 +9,30 @@ class BybitTradesInit:
 
     def process(self):
         trades_list = []
+        flow = self.ss.bybit_trade_flow
 
-        for row in self.data:
+        # REST lists the newest trade first
+        for row in reversed(self.data):
             side = 0 if row["side"] == "Buy" else 1
             trades_list.append([row["time"], side, row["price"], row["size"]])
+            flow.on_trade(float(row["time"]), 1.0 - 2 * side, float(row["price"]), float(row["size"]))
 
         trades_array = np.array(trades_list, dtype=float)
         self.ss.bybit_trades.extend(trades_array)
 
 
 class BybitTradesHandler:
-    def __init__(self, sharedstate: SharedState, data) -> None:
+    def __init__(self, sharedstate: SharedState) -> None:
         self.ss = sharedstate
-        self.data = data[0]
 
-    def process(self):
-        side = 0 if self.data["S"] == "Buy" else 1
-        new_trade = np.array([[self.data["T"], side, self.data["p"], self.data["v"]]], dtype=float)
-        self.ss.bybit_trades.append(new_trade)
+    def process(self, recv):
+        trades = self.ss.bybit_trades
+        flow = self.ss.bybit_trade_flow
+
+        for trade in recv["data"]:
+            side = 0 if trade["S"] == "Buy" else 1
+            time, price, qty = float(trade["T"]), float(trade["p"]), float(trade["v"])
+
+            # Written straight into the ring's preallocated row
+            trades.append((time, side, price, qty))
+            flow.on_trade(time, 1.0 - 2 * side, price, qty)
@@ -8,12 +8,13 @@ class PrivateWs:
     def __init__(self, api_key: str, api_secret: str):
         self.api_key = api_key
         self.api_secret = api_secret
-        self.expires = str(int((time.time() + 5) * 1000))
 
     def auth(self) -> json:
         """
-        Generates an authentication JSON for a private WS connection
+        Generates an authentication JSON for a private WS connection \n
+        Expiry is set per call so the request stays valid on reconnects
         """
+        self.expires = str(int((time.time() + 5) * 1000))
 
         signature = hmac.new(
             bytes(self.api_secret, "utf-8"),
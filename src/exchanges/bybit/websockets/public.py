@@ -44,6 +44,20 @@ class PublicWs:
             if topic == "Kline" and kwargs["interval"] is not None:
                 topiclist.append("kline.{}.{}".format(kwargs["interval"], self.symbol))
 
-        req = json.dumps({"op": "subscribe", "args": topiclist})
+        req = self.subscribe_request(topiclist)
 
         return req, topiclist
+
+    def subscribe_request(self, topics: list) -> str:
+        """
+        Creates the JSON request to subscribe to full topic names
+        """
+
+        return json.dumps({"op": "subscribe", "args": topics})
+
+    def unsubscribe_request(self, topics: list) -> str:
+        """
+        Creates the JSON request to drop already subscribed topics (full topic names)
+        """
+
+        return json.dumps({"op": "unsubscribe", "args": topics})
@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+from src.exchanges.common.localorderbook import BaseOrderBook
+
+
+class BaseBookSync:
+    """
+    Sits between a depth stream and a local orderbook, only letting through diffs that continue the sequence
+
+    _______________________________________________________________
+
+    -> Diffs are checked against the last applied update id before reaching the book \n
+    -> On a gap the book is marked out of sync and a resync is scheduled as a task, the feed keeps reading \n
+    -> Only one resync is ever in flight per book
+    """
+
+    def __init__(self, book: BaseOrderBook, stale_after: float = 5.0) -> None:
+        self.book = book
+        self.stale_after = stale_after
+
+        self.synced = False
+        self.last_update_id = 0
+        self.last_update_time = time.monotonic()
+        self._resync_task = None
+
+        # Counters
+        self.gaps = 0
+        self.resyncs = 0
+        self.stale = 0
+        self.max_staleness = 0.0
+
+    @property
+    def staleness(self) -> float:
+        """
+        Seconds since the book last applied an update
+        """
+        return time.monotonic() - self.last_update_time
+
+    def stats(self) -> dict:
+        return {
+            "synced": self.synced,
+            "gaps": self.gaps,
+            "resyncs": self.resyncs,
+            "stale": self.stale,
+            "staleness": self.staleness,
+            "max_staleness": self.max_staleness,
+        }
+
+    def _mark_updated(self, update_id: int) -> None:
+        now = time.monotonic()
+        elapsed = now - self.last_update_time
+
+        if elapsed > self.max_staleness:
+            self.max_staleness = elapsed
+
+        if elapsed > self.stale_after:
+            self.stale += 1
+
+        self.last_update_id = update_id
+        self.last_update_time = now
+
+    def _on_gap(self) -> None:
+        self.gaps += 1
+        self.synced = False
+        self._schedule_resync()
+
+    def _schedule_resync(self) -> None:
+        if self._resync_task is None or self._resync_task.done():
+            self._resync_task = asyncio.create_task(self._resync())
+
+    async def _resync(self) -> None:
+        raise NotImplementedError("Derived classes should implement this method")
+
+    def reset(self) -> None:
+        """
+        Forget the current sequence, used when the websocket reconnects
+        """
+        self.synced = False
+        self.last_update_id = 0
+
+    def process(self, recv) -> None:
+        raise NotImplementedError("Derived classes should implement this method")
@@ -0,0 +1,136 @@
+import numpy as np
+
+# Float columns of a KlineSeries
+OPEN = 0
+HIGH = 1
+LOW = 2
+CLOSE = 3
+VOLUME = 4
+TURNOVER = 5
+
+
+class KlineSeries:
+    """
+    Preallocated columnar ring buffer for one symbol/interval's klines
+
+    _______________________________________________________________
+
+    -> float64 columns (open, high, low, close, volume, turnover) plus an int64 start time column \n
+    -> Every row is written twice (at i and i + capacity), so the last N rows of any column are one contiguous
+       slice and column() never copies \n
+    -> append() adds a candle, replace_last() overwrites the live one in place, both O(1) \n
+    -> Views are read-only and see later writes, copy them to keep values around
+    """
+
+    def __init__(self, capacity: int = 1000) -> None:
+        self.capacity = capacity
+        self._values = np.zeros((6, 2 * capacity), dtype=np.float64)
+        self._starts = np.zeros(2 * capacity, dtype=np.int64)
+        self._pos = -1
+        self.count = 0
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    @staticmethod
+    def _readonly(arr: np.ndarray) -> np.ndarray:
+        view = arr.view()
+        view.flags.writeable = False
+        return view
+
+    @property
+    def last_start(self) -> int:
+        """
+        Start time (ms) of the newest candle, -1 if empty
+        """
+        return int(self._starts[self._pos]) if self.count else -1
+
+    def clear(self) -> None:
+        self._pos = -1
+        self.count = 0
+
+    def _write(self, start: int, row: tuple) -> None:
+        i = self._pos
+        j = i + self.capacity
+
+        self._values[:, i] = row
+        self._values[:, j] = row
+        self._starts[i] = start
+        self._starts[j] = start
+
+    def append(self, start: int, o: float, h: float, l: float, c: float, v: float, t: float) -> None:
+        self._pos = (self._pos + 1) % self.capacity
+        self.count += 1
+        self._write(start, (o, h, l, c, v, t))
+
+    def replace_last(self, start: int, o: float, h: float, l: float, c: float, v: float, t: float) -> None:
+        if not self.count:
+            self.append(start, o, h, l, c, v, t)
+            return
+
+        self._write(start, (o, h, l, c, v, t))
+
+    def apply(self, start: int, o: float, h: float, l: float, c: float, v: float, t: float) -> int:
+        """
+        Routes one candle update by its start time \n
+        Returns 1 if it opened a new candle, 0 if it revised the live one, -1 if it was older and ignored
+        """
+        last_start = self.last_start
+
+        if start == last_start:
+            self._write(start, (o, h, l, c, v, t))
+            return 0
+
+        if start < last_start:
+            return -1
+
+        self.append(start, o, h, l, c, v, t)
+        return 1
+
+    def _window(self, n: int | None) -> tuple[int, int]:
+        n = len(self) if n is None else min(n, len(self))
+        end = self._pos + self.capacity + 1
+        return end - n, end
+
+    def column(self, column: int, n: int | None = None) -> np.ndarray:
+        """
+        Last n values (all stored if None) of a float column, oldest first
+        """
+        lo, hi = self._window(n)
+        return self._readonly(self._values[column, lo:hi])
+
+    def starts(self, n: int | None = None) -> np.ndarray:
+        lo, hi = self._window(n)
+        return self._readonly(self._starts[lo:hi])
+
+    def closes(self, n: int | None = None) -> np.ndarray:
+        return self.column(CLOSE, n)
+
+    def last(self, column: int) -> float:
+        return float(self._values[column, self._pos]) if self.count else 0.0
+
+
+class KlineStore:
+    """
+    One symbol's KlineSeries per interval ("1", "5", "D"...), each created on first use
+    """
+
+    def __init__(self, capacity: int = 1000) -> None:
+        self.capacity = capacity
+        self.series = {}
+
+    def __getitem__(self, interval) -> KlineSeries:
+        interval = str(interval)
+        series = self.series.get(interval)
+
+        if series is None:
+            series = KlineSeries(self.capacity)
+            self.series[interval] = series
+
+        return series
+
+    def __contains__(self, interval) -> bool:
+        return str(interval) in self.series
+
+    def intervals(self) -> list:
+        return list(self.series)
@@ -1,20 +1,387 @@
 import numpy as np
+from numba import njit
+
+
+@njit(nogil=True)
+def update_levels(book: np.ndarray, n: int, levels: np.ndarray, k: int, descending: bool) -> tuple[int, int]:
+    """
+    Applies k [price, qty] levels in place to one side of a fixed-capacity book
+
+    _______________________________________________________________
+
+    -> Book rows [0, n) are sorted best first (descending for bids, ascending for asks) \n
+    -> A level is located with a binary search, qty 0 removes it, anything else sets/inserts it \n
+    -> Inserts beyond capacity drop the worst level, nothing is ever allocated \n
+    -> Returns the new number of active levels and the shallowest index touched
+    """
+    capacity = book.shape[0]
+    touched = capacity
+
+    for j in range(k):
+        price = levels[j, 0]
+        qty = levels[j, 1]
+
+        # Lower bound of the price within the active rows
+        lo = 0
+        hi = n
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            if (book[mid, 0] > price) if descending else (book[mid, 0] < price):
+                lo = mid + 1
+            else:
+                hi = mid
+
+        found = lo < n and book[lo, 0] == price
+
+        if qty == 0.0:
+            if found:
+                for i in range(lo, n - 1):
+                    book[i, 0] = book[i + 1, 0]
+                    book[i, 1] = book[i + 1, 1]
+                n -= 1
+                touched = min(touched, lo)
+
+        elif found:
+            book[lo, 1] = qty
+            touched = min(touched, lo)
+
+        elif lo < capacity:
+            last = n if n < capacity else capacity - 1
+            for i in range(last, lo, -1):
+                book[i, 0] = book[i - 1, 0]
+                book[i, 1] = book[i - 1, 1]
+            book[lo, 0] = price
+            book[lo, 1] = qty
+            if n < capacity:
+                n += 1
+            touched = min(touched, lo)
+
+    return n, touched
+
+
+@njit(nogil=True)
+def splice_levels(book: np.ndarray, n: int, levels: np.ndarray, k: int, descending: bool) -> int:
+    """
+    Overwrites the top of one side with k best-first snapshot levels
+
+    _______________________________________________________________
+
+    -> Every existing row priced at or better than the snapshot's worst level is replaced \n
+    -> Deeper rows are kept and shifted in place behind the snapshot \n
+    -> Returns the new number of active levels
+    """
+    capacity = book.shape[0]
+    k = min(k, capacity)
+
+    if k == 0:
+        return n
+
+    cut = levels_within(book, n, levels[k - 1, 0], descending)
+    keep = min(n - cut, capacity - k)
+
+    if k > cut:
+        for i in range(keep - 1, -1, -1):
+            book[k + i, 0] = book[cut + i, 0]
+            book[k + i, 1] = book[cut + i, 1]
+    elif k < cut:
+        for i in range(keep):
+            book[k + i, 0] = book[cut + i, 0]
+            book[k + i, 1] = book[cut + i, 1]
+
+    for i in range(k):
+        book[i, 0] = levels[i, 0]
+        book[i, 1] = levels[i, 1]
+
+    return k + keep
+
+
+@njit(nogil=True)
+def refresh_cumulative(book: np.ndarray, n: int, start: int, cum_qty: np.ndarray, cum_notional: np.ndarray) -> None:
+    """
+    Recomputes running qty/notional totals from the first touched level onwards
+    """
+    qty = cum_qty[start - 1] if start > 0 else 0.0
+    notional = cum_notional[start - 1] if start > 0 else 0.0
+
+    for i in range(start, n):
+        qty += book[i, 1]
+        notional += book[i, 0] * book[i, 1]
+        cum_qty[i] = qty
+        cum_notional[i] = notional
+
+
+@njit(nogil=True)
+def levels_within(book: np.ndarray, n: int, limit_price: float, descending: bool) -> int:
+    """
+    Number of levels priced at or better than the limit price
+    """
+    lo = 0
+    hi = n
+    while lo < hi:
+        mid = (lo + hi) >> 1
+        if (book[mid, 0] >= limit_price) if descending else (book[mid, 0] <= limit_price):
+            lo = mid + 1
+        else:
+            hi = mid
+
+    return lo
+
+
+@njit(nogil=True)
+def vwap_to_size(book: np.ndarray, n: int, cum_qty: np.ndarray, cum_notional: np.ndarray, size: float) -> float:
+    """
+    Average fill price for a market order of the given size walking this side \n
+    Returns NaN if the side does not hold enough qty
+    """
+    if n == 0 or size <= 0.0 or cum_qty[n - 1] < size:
+        return np.nan
+
+    # First level at which the running qty covers the size
+    lo = 0
+    hi = n - 1
+    while lo < hi:
+        mid = (lo + hi) >> 1
+        if cum_qty[mid] < size:
+            lo = mid + 1
+        else:
+            hi = mid
+
+    filled_qty = cum_qty[lo - 1] if lo > 0 else 0.0
+    filled_notional = cum_notional[lo - 1] if lo > 0 else 0.0
+
+    return (filled_notional + (size - filled_qty) * book[lo, 0]) / size
 
 
 class BaseOrderBook:
-    def __init__(self):
-        self.asks = np.empty((0, 2), float)
-        self.bids = np.empty((0, 2), float)
+    def __init__(self, max_depth: int = 500):
+        self.max_depth = max_depth
+
+        # Preallocated sides, best level always at index 0
+        self._asks = np.zeros((max_depth, 2), float)
+        self._bids = np.zeros((max_depth, 2), float)
+        self.ask_count = 0
+        self.bid_count = 0
+
+        # Running qty/notional totals per level, kept in step with each side
+        self._ask_cum_qty = np.zeros(max_depth, float)
+        self._ask_cum_notional = np.zeros(max_depth, float)
+        self._bid_cum_qty = np.zeros(max_depth, float)
+        self._bid_cum_notional = np.zeros(max_depth, float)
+
+        # Read-only views of the active rows, rebuilt only when a count changes
+        self._asks_view = self._readonly(self._asks[:0])
+        self._bids_view = self._readonly(self._bids[:0])
+
+        # Cached top of book
+        self.best_ask = 0.0
+        self.best_ask_qty = 0.0
+        self.best_bid = 0.0
+        self.best_bid_qty = 0.0
+        self.mid_price = 0.0
+        self.microprice = 0.0
+
+        # Qty that left the best bid/ask on deltas (fills or cancels at the touch, or the whole level going)
+        self.bid_depleted = 0.0
+        self.ask_depleted = 0.0
+
+        # Scratch buffer that incoming levels are parsed into
+        self._levels = np.zeros((max_depth, 2), float)
+
+    @staticmethod
+    def _readonly(arr: np.ndarray) -> np.ndarray:
+        view = arr.view()
+        view.flags.writeable = False
+        return view
+
+    @property
+    def asks(self) -> np.ndarray:
+        if self._asks_view.shape[0] != self.ask_count:
+            self._asks_view = self._readonly(self._asks[: self.ask_count])
+        return self._asks_view
+
+    @property
+    def bids(self) -> np.ndarray:
+        if self._bids_view.shape[0] != self.bid_count:
+            self._bids_view = self._readonly(self._bids[: self.bid_count])
+        return self._bids_view
+
+    def side_state(self, bid: bool) -> tuple[np.ndarray, int, np.ndarray, np.ndarray]:
+        """
+        (levels, count, cum_qty, cum_notional) of one side for compiled readers, treat them as read-only
+        """
+        if bid:
+            return self._bids, self.bid_count, self._bid_cum_qty, self._bid_cum_notional
+        return self._asks, self.ask_count, self._ask_cum_qty, self._ask_cum_notional
+
+    def _load_levels(self, levels: list) -> int:
+        """
+        Parses a list of [price, qty] string pairs into the scratch buffer
+        """
+        k = len(levels)
+
+        if k > self._levels.shape[0]:
+            self._levels = np.zeros((k, 2), float)
+
+        buffer = self._levels
+
+        for i in range(k):
+            buffer[i, 0] = float(levels[i][0])
+            buffer[i, 1] = float(levels[i][1])
+
+        return k
+
+    def _refresh_top(self) -> None:
+        self.best_ask, self.best_ask_qty = (self._asks[0, 0], self._asks[0, 1]) if self.ask_count else (0.0, 0.0)
+        self.best_bid, self.best_bid_qty = (self._bids[0, 0], self._bids[0, 1]) if self.bid_count else (0.0, 0.0)
+
+        if self.ask_count and self.bid_count:
+            self.mid_price = (self.best_ask + self.best_bid) / 2
+            imb = self.best_bid_qty / (self.best_bid_qty + self.best_ask_qty)
+            self.microprice = self.best_ask * imb + self.best_bid * (1 - imb)
+        else:
+            self.mid_price = 0.0
+            self.microprice = 0.0
+
+    def update_asks(self, asks: list) -> bool:
+        k = self._load_levels(asks)
+        self.ask_count, touched = update_levels(self._asks, self.ask_count, self._levels, k, False)
+
+        if touched < self.max_depth:
+            refresh_cumulative(self._asks, self.ask_count, touched, self._ask_cum_qty, self._ask_cum_notional)
+
+        return touched == 0
+
+    def update_bids(self, bids: list) -> bool:
+        k = self._load_levels(bids)
+        self.bid_count, touched = update_levels(self._bids, self.bid_count, self._levels, k, True)
+
+        if touched < self.max_depth:
+            refresh_cumulative(self._bids, self.bid_count, touched, self._bid_cum_qty, self._bid_cum_notional)
+
+        return touched == 0
+
+    def _track_depletion(self, bid: float, bid_qty: float, ask: float, ask_qty: float) -> None:
+        """
+        Adds what a delta took from the previous best levels to the depletion counters
+        """
+        if bid_qty > 0:
+            if self.best_bid == bid:
+                self.bid_depleted += max(bid_qty - self.best_bid_qty, 0.0)
+            elif self.best_bid < bid:
+                self.bid_depleted += bid_qty
+
+        if ask_qty > 0:
+            if self.best_ask == ask:
+                self.ask_depleted += max(ask_qty - self.best_ask_qty, 0.0)
+            elif self.best_ask > ask or not self.ask_count:
+                self.ask_depleted += ask_qty
+
+    def update_book(self, asks: list, bids: list) -> None:
+        ask_top_changed = self.update_asks(asks)
+        bid_top_changed = self.update_bids(bids)
+
+        if ask_top_changed or bid_top_changed:
+            prev_top = (self.best_bid, self.best_bid_qty, self.best_ask, self.best_ask_qty)
+            self._refresh_top()
+            self._track_depletion(*prev_top)
+
+    def process_snapshot(self, asks: list, bids: list) -> None:
+        self.ask_count = 0
+        self.bid_count = 0
+        self.update_asks(asks)
+        self.update_bids(bids)
+        self._refresh_top()
+
+    def load_arrays(self, asks: np.ndarray, ask_count: int, bids: np.ndarray, bid_count: int) -> None:
+        """
+        Replaces the book with already parsed best-first [price, qty] rows, e.g. a published copy of another book
+        """
+        self.ask_count = min(ask_count, self.max_depth)
+        self.bid_count = min(bid_count, self.max_depth)
+        self._asks[: self.ask_count] = asks[: self.ask_count]
+        self._bids[: self.bid_count] = bids[: self.bid_count]
+
+        refresh_cumulative(self._asks, self.ask_count, 0, self._ask_cum_qty, self._ask_cum_notional)
+        refresh_cumulative(self._bids, self.bid_count, 0, self._bid_cum_qty, self._bid_cum_notional)
+        self._refresh_top()
+
+    def splice_snapshot(self, asks: list, bids: list) -> None:
+        """
+        Refreshes only the levels covered by a partial (top N) snapshot \n
+        Levels deeper than the snapshot are left in place
+        """
+        k = self._load_levels(asks)
+        self.ask_count = splice_levels(self._asks, self.ask_count, self._levels, k, False)
+        refresh_cumulative(self._asks, self.ask_count, 0, self._ask_cum_qty, self._ask_cum_notional)
+
+        k = self._load_levels(bids)
+        self.bid_count = splice_levels(self._bids, self.bid_count, self._levels, k, True)
+        refresh_cumulative(self._bids, self.bid_count, 0, self._bid_cum_qty, self._bid_cum_notional)
+
+        self._refresh_top()
+
+    def ask_depth(self, levels: int) -> float:
+        """
+        Cumulative ask qty over the best N levels
+        """
+        n = min(levels, self.ask_count)
+        return self._ask_cum_qty[n - 1] if n > 0 else 0.0
+
+    def bid_depth(self, levels: int) -> float:
+        """
+        Cumulative bid qty over the best N levels
+        """
+        n = min(levels, self.bid_count)
+        return self._bid_cum_qty[n - 1] if n > 0 else 0.0
+
+    def ask_depth_bps(self, bps: float) -> float:
+        """
+        Cumulative ask qty priced within N bps of the best ask
+        """
+        n = levels_within(self._asks, self.ask_count, self.best_ask * (1 + bps / 10_000), False)
+        return self._ask_cum_qty[n - 1] if n > 0 else 0.0
+
+    def bid_depth_bps(self, bps: float) -> float:
+        """
+        Cumulative bid qty priced within N bps of the best bid
+        """
+        n = levels_within(self._bids, self.bid_count, self.best_bid * (1 - bps / 10_000), True)
+        return self._bid_cum_qty[n - 1] if n > 0 else 0.0
+
+    def ask_qty_at(self, price: float) -> float:
+        """
+        Qty resting at exactly this ask price, 0 if the level is empty
+        """
+        i = levels_within(self._asks, self.ask_count, price, False) - 1
+        return self._asks[i, 1] if i >= 0 and self._asks[i, 0] == price else 0.0
+
+    def bid_qty_at(self, price: float) -> float:
+        """
+        Qty resting at exactly this bid price, 0 if the level is empty
+        """
+        i = levels_within(self._bids, self.bid_count, price, True) - 1
+        return self._bids[i, 1] if i >= 0 and self._bids[i, 0] == price else 0.0
 
-    def update_book(self, book, data):
-        indices = np.searchsorted(book[:, 0], data[:, 0])
-        mask = indices < len(book)
-        book = np.delete(book, indices[mask], axis=0)
+    def buy_vwap(self, size: float) -> float:
+        """
+        Average price to buy the given size by sweeping the asks
+        """
+        return vwap_to_size(self._asks, self.ask_count, self._ask_cum_qty, self._ask_cum_notional, size)
 
-        positive_data = data[data[:, 1] > 0]
-        book = np.insert(book, np.searchsorted(book[:, 0], positive_data[:, 0]), positive_data, axis=0)
+    def sell_vwap(self, size: float) -> float:
+        """
+        Average price to sell the given size by sweeping the bids
+        """
+        return vwap_to_size(self._bids, self.bid_count, self._bid_cum_qty, self._bid_cum_notional, size)
 
-        return book
+    def imbalance(self, levels: int) -> float:
+        """
+        (Bid - Ask) / (Bid + Ask) qty over the best N levels, in [-1, 1]
+        """
+        bid_depth = self.bid_depth(levels)
+        ask_depth = self.ask_depth(levels)
+        total = bid_depth + ask_depth
+        return (bid_depth - ask_depth) / total if total > 0 else 0.0
 
     def process_data(self, recv):
         raise NotImplementedError("Derived classes should implement this method")
@@ -0,0 +1,236 @@
+import time
+from bisect import insort
+
+from src.utils.rounding import StepRounder
+
+PENDING_NEW = "pending-new"
+LIVE = "live"
+PENDING_AMEND = "pending-amend"
+PENDING_CANCEL = "pending-cancel"
+
+# Exchange statuses after which an order no longer rests on the book
+CLOSED_STATUSES = {"Filled", "Cancelled", "Rejected", "Deactivated", "PartiallyFilledCanceled"}
+
+
+class OpenOrder:
+    __slots__ = ("orderId", "orderLinkId", "side", "price", "qty", "state", "since")
+
+    def __init__(self, orderId: str, orderLinkId: str, side: str, price: int, qty: int, state: str) -> None:
+        self.orderId = orderId
+        self.orderLinkId = orderLinkId
+        self.side = side
+        self.price = price
+        self.qty = qty
+        self.state = state
+        self.since = time.monotonic()  # When the current state was entered
+
+    def __repr__(self) -> str:
+        return f"OpenOrder({self.orderId or self.orderLinkId}, {self.side}, {self.price}, {self.qty}, {self.state})"
+
+
+class OrderStore:
+    """
+    Our resting orders, kept price-sorted per side and updated incrementally
+
+    _______________________________________________________________
+
+    -> bids/asks are lists of OpenOrder best first, so quote slot i on a side is simply bids[i] / asks[i] \n
+    -> Prices and sizes are int tick/lot counts, exchange strings are converted once on the way in (parse) \n
+    -> Orders are indexed by orderId, and by orderLinkId while a create is still waiting for its orderId \n
+    -> Requests mark orders pending-new / pending-amend / pending-cancel as they are sent, the order topic (or the
+       REST sync) confirms them. Pending cancels leave the slot lists straight away so they are never requoted \n
+    -> An order still listed by the REST sync {cancel_timeout}s after its cancel was sent goes back in its slot
+    """
+
+    def __init__(self, ticks: StepRounder, lots: StepRounder, cancel_timeout: float = 2.0) -> None:
+        self.ticks = ticks
+        self.lots = lots
+        self.cancel_timeout = cancel_timeout
+        self.bids = []
+        self.asks = []
+        self.by_id = {}
+        self.by_link = {}
+
+    def __len__(self) -> int:
+        return len(self.bids) + len(self.asks)
+
+    def __contains__(self, orderId: str) -> bool:
+        return orderId in self.by_id
+
+    def get(self, orderId: str) -> OpenOrder | None:
+        return self.by_id.get(orderId)
+
+    def side(self, side: str) -> list:
+        return self.bids if side == "Buy" else self.asks
+
+    def slot(self, side: str, index: int) -> OpenOrder | None:
+        orders = self.side(side)
+        return orders[index] if index < len(orders) else None
+
+    def parse(self, price: str, qty: str) -> tuple[int, int]:
+        """
+        (ticks, lots) of an order's price/qty strings as sent by the exchange
+        """
+        return self.ticks.parse(price), self.lots.parse(qty)
+
+    # Slot lists \
+
+    def _insert(self, order: OpenOrder) -> None:
+        if order.side == "Buy":
+            insort(self.bids, order, key=lambda o: -o.price)
+        else:
+            insort(self.asks, order, key=lambda o: o.price)
+
+    def _unlist(self, order: OpenOrder) -> None:
+        orders = self.side(order.side)
+
+        for i, listed in enumerate(orders):
+            if listed is order:
+                del orders[i]
+                return
+
+    def _reprice(self, order: OpenOrder, price: int) -> None:
+        if price != order.price:
+            listed = order.state != PENDING_CANCEL
+
+            if listed:
+                self._unlist(order)
+
+            order.price = price
+
+            if listed:
+                self._insert(order)
+
+    def _drop(self, order: OpenOrder) -> None:
+        if order.state != PENDING_CANCEL:
+            self._unlist(order)
+
+        if order.orderId:
+            self.by_id.pop(order.orderId, None)
+        if order.orderLinkId:
+            self.by_link.pop(order.orderLinkId, None)
+
+    # Outgoing requests \
+
+    def pending_new(self, orderLinkId: str, side: str, price: int, qty: int) -> OpenOrder:
+        order = OpenOrder("", orderLinkId, side, price, qty, PENDING_NEW)
+        self.by_link[orderLinkId] = order
+        self._insert(order)
+        return order
+
+    def acknowledge(self, orderLinkId: str, orderId: str) -> None:
+        """
+        Attaches the exchange's orderId to a pending create once its response arrives
+        """
+        order = self.by_link.get(orderLinkId)
+
+        if order is not None and not order.orderId:
+            order.orderId = orderId
+            self.by_id[orderId] = order
+
+    def reject_new(self, orderLinkId: str) -> None:
+        order = self.by_link.get(orderLinkId)
+
+        if order is not None and order.state == PENDING_NEW:
+            self._drop(order)
+
+    def pending_amend(self, orderId: str, price: int, qty: int) -> None:
+        order = self.by_id.get(orderId)
+
+        if order is not None and order.state != PENDING_CANCEL:
+            self._reprice(order, price)
+            order.qty = qty
+            order.state = PENDING_AMEND
+
+    def pending_cancel(self, orderId: str) -> None:
+        order = self.by_id.get(orderId)
+
+        if order is not None and order.state != PENDING_CANCEL:
+            self._unlist(order)
+            order.state = PENDING_CANCEL
+            order.since = time.monotonic()
+
+    def cancel_failed(self, orderId: str) -> None:
+        """
+        Puts an order back in its slot when the cancel request did not go through
+        """
+        order = self.by_id.get(orderId)
+
+        if order is not None and order.state == PENDING_CANCEL:
+            order.state = LIVE
+            self._insert(order)
+
+    def pending_cancel_all(self) -> None:
+        """
+        Creates still waiting for an orderId are forgotten, if one lands anyway the order topic adds it back
+        """
+        now = time.monotonic()
+
+        for order in self.bids + self.asks:
+            if order.orderId:
+                order.state = PENDING_CANCEL
+                order.since = now
+            else:
+                self.by_link.pop(order.orderLinkId, None)
+
+        self.bids.clear()
+        self.asks.clear()
+
+    # Exchange updates \
+
+    def update(self, orderId: str, orderLinkId: str, side: str, price: int, qty: int, status: str) -> None:
+        """
+        Applies one order update as sent on the order topic
+        """
+        order = self.by_id.get(orderId) or self.by_link.get(orderLinkId)
+
+        if status in CLOSED_STATUSES:
+            if order is not None:
+                self._drop(order)
+            return
+
+        if order is None:
+            order = OpenOrder(orderId, orderLinkId, side, price, qty, LIVE)
+            self.by_id[orderId] = order
+            if orderLinkId:
+                self.by_link[orderLinkId] = order
+            self._insert(order)
+            return
+
+        if not order.orderId:
+            order.orderId = orderId
+            self.by_id[orderId] = order
+
+        # A pending cancel stays pending until the exchange closes the order
+        if order.state != PENDING_CANCEL:
+            self._reprice(order, price)
+            order.qty = qty
+            order.state = LIVE
+
+    def remove(self, orderId: str) -> None:
+        order = self.by_id.get(orderId)
+
+        if order is not None:
+            self._drop(order)
+
+    def reconcile(self, orders: list) -> None:
+        """
+        Brings the store in line with a full REST listing of open orders \n
+        Pending creates are kept, they may simply not be listed yet
+        """
+        listed = set()
+        now = time.monotonic()
+
+        for o in orders:
+            listed.add(o["orderId"])
+            order = self.by_id.get(o["orderId"])
+
+            if order is not None and order.state == PENDING_CANCEL and now - order.since > self.cancel_timeout:
+                self.cancel_failed(order.orderId)
+
+            price, qty = self.parse(o["price"], o["qty"])
+            self.update(o["orderId"], o.get("orderLinkId", ""), o["side"], price, qty, "New")
+
+        for order in list(self.by_id.values()):
+            if order.orderId not in listed and order.state != PENDING_NEW:
+                self._drop(order)
@@ -1,6 +1,9 @@
 from numba import njit, prange
 import numpy as np
 
+from src.indicators.ema import EmaState
+from src.indicators.rolling import RollingStats
+
 # %%
 
 
@@ -29,3 +32,38 @@ def bbw(arr_in: np.ndarray, length: int, std_numb: int) -> float:
     """
 
     return 2 * std_numb * np.std(arr_in[-length:]) / ewma(arr_in[:], length)[-1]
+
+
+class BbwState:
+    """
+    Streaming bbw(): 2 * {std_numb} * std of the last {length} values / EMA({length}) of every value seen
+
+    _______________________________________________________________
+
+    -> update() adds a new value, revise() replaces the latest one (e.g. an in-progress candle), both O(1) \n
+    -> Fed the same series, value matches bbw(series, length, std_numb)
+    """
+
+    def __init__(self, length: int, std_numb: int) -> None:
+        self.length = length
+        self.std_numb = std_numb
+        self.stats = RollingStats(length)
+        self.ema = EmaState(length)
+
+    def reset(self) -> None:
+        self.stats.reset()
+        self.ema.reset()
+
+    @property
+    def value(self) -> float:
+        return 2 * self.std_numb * self.stats.std / self.ema.value if self.ema.value else 0.0
+
+    def update(self, value: float) -> float:
+        self.stats.update(value)
+        self.ema.update(value)
+        return self.value
+
+    def revise(self, value: float) -> float:
+        self.stats.revise(value)
+        self.ema.revise(value)
+        return self.value
@@ -17,3 +17,63 @@ def ema(arr_in: np.ndarray, window: int) -> np.ndarray:
         ewma[i] = alpha * arr_in[i] + (1 - alpha) * ewma[i - 1]
 
     return ewma
+
+
+class EmaState:
+    """
+    EMA updated one value at a time, same recursion as ema() (seeded with the first value)
+
+    _______________________________________________________________
+
+    -> update() adds a new value, revise() replaces the latest one (e.g. an in-progress candle), both O(1) \n
+    -> The last {history} EMA values are kept in a ring buffer, at(k) / at_lags(ks) read them k values back (1 = latest)
+    """
+
+    def __init__(self, window: int, history: int = 1) -> None:
+        self.window = window
+        self.alpha = 2 / float(window + 1)
+        self.count = 0
+        self.last = 0.0  # Latest input value
+        self.value = 0.0
+        self._prev = 0.0  # EMA before the latest value, what a revision starts from
+
+        self._history = np.zeros(max(history, 1), dtype=np.float64)
+        self._pos = -1
+
+    def reset(self) -> None:
+        self.count = 0
+        self.last = 0.0
+        self.value = 0.0
+        self._prev = 0.0
+        self._history[:] = 0.0
+        self._pos = -1
+
+    def _apply(self, value: float) -> float:
+        self.last = value
+        self.value = value if self.count == 1 else self.alpha * value + (1 - self.alpha) * self._prev
+        self._history[self._pos] = self.value
+        return self.value
+
+    def update(self, value: float) -> float:
+        self._prev = self.value
+        self.count += 1
+        self._pos = (self._pos + 1) % self._history.shape[0]
+        return self._apply(value)
+
+    def revise(self, value: float) -> float:
+        if self.count == 0:
+            return self.update(value)
+        return self._apply(value)
+
+    def at(self, k: int) -> float:
+        """
+        EMA k values back, 0.0 if not that many values were seen (or kept)
+        """
+        if k > self.count or k > self._history.shape[0]:
+            return 0.0
+        return self._history[(self._pos - k + 1) % self._history.shape[0]]
+
+    def at_lags(self, lags: np.ndarray) -> np.ndarray:
+        values = self._history[(self._pos - lags + 1) % self._history.shape[0]]
+        values[(lags > self.count) | (lags > self._history.shape[0])] = 0.0
+        return values
@@ -0,0 +1,84 @@
+import numpy as np
+
+
+class RollingStats:
+    """
+    Mean / population variance of the last {length} values, updated in O(1)
+
+    _______________________________________________________________
+
+    -> update() adds a new value, revise() replaces the latest one (e.g. an in-progress candle) \n
+    -> Sums are kept relative to the first value seen, so prices far from 0 don't lose precision in sum(x^2) \n
+    -> The sums are rebuilt from the window every {length} updates, float error can't build up
+    """
+
+    def __init__(self, length: int) -> None:
+        self.length = length
+        self._values = np.zeros(length, dtype=np.float64)
+        self.reset()
+
+    def reset(self) -> None:
+        self.count = 0
+        self._pos = -1
+        self._shift = 0.0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._since_rebuild = 0
+
+    def _rebuild(self) -> None:
+        n = min(self.count, self.length)
+        window = self._values[:n] - self._shift
+        self._sum = float(window.sum())
+        self._sum_sq = float(window @ window)
+        self._since_rebuild = 0
+
+    def update(self, value: float) -> None:
+        if self.count == 0:
+            self._shift = value
+
+        self._pos = (self._pos + 1) % self.length
+
+        if self.count >= self.length:
+            old = self._values[self._pos] - self._shift
+            self._sum -= old
+            self._sum_sq -= old * old
+
+        x = value - self._shift
+        self._values[self._pos] = value
+        self._sum += x
+        self._sum_sq += x * x
+        self.count += 1
+
+        self._since_rebuild += 1
+        if self._since_rebuild >= self.length:
+            self._rebuild()
+
+    def revise(self, value: float) -> None:
+        if self.count == 0:
+            self.update(value)
+            return
+
+        old = self._values[self._pos] - self._shift
+        x = value - self._shift
+        self._values[self._pos] = value
+        self._sum += x - old
+        self._sum_sq += x * x - old * old
+
+    @property
+    def n(self) -> int:
+        return min(self.count, self.length)
+
+    @property
+    def mean(self) -> float:
+        return self._shift + self._sum / self.n if self.count else 0.0
+
+    @property
+    def var(self) -> float:
+        if not self.count:
+            return 0.0
+        mean = self._sum / self.n
+        return max(self._sum_sq / self.n - mean * mean, 0.0)
+
+    @property
+    def std(self) -> float:
+        return self.var**0.5
@@ -0,0 +1,182 @@
+import numpy as np
+
+# Slots of a MarketFrame, a bba is [price, qty] at its bid slot then its ask slot
+BINANCE_BID = 0
+BINANCE_ASK = 2
+BYBIT_BID = 4
+BYBIT_ASK = 6
+BYBIT_MARK_PRICE = 8
+BINANCE_LAST_PRICE = 9
+VOLATILITY_VALUE = 10
+INVENTORY_DELTA = 11
+ALPHA_VALUE = 12
+MOMENTUM_VALUE = 13
+
+MARKET_FIELDS = (
+    "binance_bid",
+    "binance_bid_qty",
+    "binance_ask",
+    "binance_ask_qty",
+    "bybit_bid",
+    "bybit_bid_qty",
+    "bybit_ask",
+    "bybit_ask_qty",
+    "bybit_mark_price",
+    "binance_last_price",
+    "volatility_value",
+    "inventory_delta",
+    "alpha_value",
+    "momentum_value",
+)
+
+MARKET_DTYPE = np.dtype([(name, np.float64) for name in MARKET_FIELDS])
+
+
+def seqlock_copy(seq: np.ndarray, src: np.ndarray, out: np.ndarray, spins: int = -1) -> bool:
+    """
+    Copies src into out under a seqlock, retrying while a write overlaps \n
+    Gives up after {spins} attempts (-1 = never), False if out may be torn (e.g. the writer died mid write)
+    """
+    while spins:
+        spins -= 1
+        start = int(seq[0])
+
+        # A writer on another thread/process is mid update
+        if start & 1:
+            continue
+
+        np.copyto(out, src)
+
+        if int(seq[0]) == start:
+            return True
+
+    return False
+
+
+def weighted_mid_price(bba: np.ndarray) -> float:
+    imb = bba[0][1] / (bba[0][1] + bba[1][1])
+    return bba[1][0] * imb + bba[0][0] * (1 - imb)
+
+
+class MarketFrame:
+    """
+    Fixed-layout float64 record of the scalar market/private inputs to the quotes
+
+    _______________________________________________________________
+
+    -> One contiguous array, the slots are the constants above (MARKET_DTYPE names them for record access) \n
+    -> binance_bba / bybit_bba are (2, 2) views into it, [Bid[P, Q], Ask[P, Q]] as before \n
+    -> Everything is read-only from outside, MarketState owns the writes \n
+    -> values can be given, e.g. an array in shared memory (see src/shard/shm.py)
+    """
+
+    __slots__ = ("values", "record", "binance_bba", "bybit_bba")
+
+    def __init__(self, values: np.ndarray = None) -> None:
+        self.values = np.zeros(len(MARKET_FIELDS), dtype=np.float64) if values is None else values
+        self.record = self.values.view(MARKET_DTYPE)[0]
+        self.binance_bba = self.values[BINANCE_BID : BINANCE_BID + 4].reshape(2, 2)
+        self.bybit_bba = self.values[BYBIT_BID : BYBIT_BID + 4].reshape(2, 2)
+
+        for view in (self.binance_bba, self.bybit_bba):
+            view.flags.writeable = False
+
+    @property
+    def bybit_mark_price(self) -> float:
+        return float(self.values[BYBIT_MARK_PRICE])
+
+    @property
+    def binance_last_price(self) -> float:
+        return float(self.values[BINANCE_LAST_PRICE])
+
+    @property
+    def volatility_value(self) -> float:
+        return float(self.values[VOLATILITY_VALUE])
+
+    @property
+    def inventory_delta(self) -> float:
+        return float(self.values[INVENTORY_DELTA])
+
+    @property
+    def alpha_value(self) -> float:
+        return float(self.values[ALPHA_VALUE])
+
+    @property
+    def momentum_value(self) -> float:
+        return float(self.values[MOMENTUM_VALUE])
+
+    @property
+    def bybit_weighted_mid_price(self) -> float:
+        return weighted_mid_price(self.bybit_bba)
+
+    @property
+    def binance_weighted_mid_price(self) -> float:
+        return weighted_mid_price(self.binance_bba)
+
+
+class MarketState(MarketFrame):
+    """
+    Live MarketFrame the handlers write in place, plus a second frame the strategy snapshots into
+
+    _______________________________________________________________
+
+    -> Writers go through set()/set_quote()/set_bba(), each one a seqlock section (seq is odd while writing) \n
+    -> snapshot() copies the live slots (about 100 bytes) into the snapshot frame and retries if a write overlapped,
+       so every quote of a tick is built from one consistent set of inputs \n
+    -> Order books, klines and trade rings are not copied, compiled readers take them in place within the same
+       synchronous section as the snapshot (no await in between) \n
+    -> The snapshot frame is reused, it holds the inputs of the latest snapshot() until the next one
+    """
+
+    __slots__ = ("seq", "_snapshot")
+
+    def __init__(self, values: np.ndarray = None, seq: np.ndarray = None) -> None:
+        super().__init__(values)
+        self.seq = np.zeros(1, dtype=np.int64) if seq is None else seq
+        self._snapshot = MarketFrame()
+
+    @property
+    def version(self) -> int:
+        """
+        Number of completed writes
+        """
+        return int(self.seq[0]) // 2
+
+    def set(self, slot: int, value: float) -> None:
+        seq = self.seq
+        seq[0] += 1
+        self.values[slot] = value
+        seq[0] += 1
+
+    def set_quote(self, slot: int, price: float, qty: float) -> None:
+        """
+        One side's [price, qty], slot is one of the *_BID / *_ASK constants
+        """
+        seq = self.seq
+        seq[0] += 1
+        self.values[slot] = price
+        self.values[slot + 1] = qty
+        seq[0] += 1
+
+    def set_many(self, slots: np.ndarray, values: np.ndarray) -> None:
+        seq = self.seq
+        seq[0] += 1
+        self.values[slots] = values
+        seq[0] += 1
+
+    def set_bba(self, slot: int, bid: float, bid_qty: float, ask: float, ask_qty: float) -> None:
+        """
+        Both sides at once, slot is BINANCE_BID or BYBIT_BID
+        """
+        seq = self.seq
+        values = self.values
+        seq[0] += 1
+        values[slot] = bid
+        values[slot + 1] = bid_qty
+        values[slot + 2] = ask
+        values[slot + 3] = ask_qty
+        seq[0] += 1
+
+    def snapshot(self) -> MarketFrame:
+        seqlock_copy(self.seq, self.values, self._snapshot.values)
+        return self._snapshot
@@ -0,0 +1,110 @@
+import asyncio
+import os
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Segment layout: MAGIC, then records of RECORD_HEADER (recv time ns, frame length) + raw frame bytes
+MAGIC = b"BSMMREC1"
+RECORD_HEADER = struct.Struct("<qI")
+
+
+class FeedRecorder:
+    """
+    Appends raw websocket frames with their receive time to rotating segment files
+
+    _______________________________________________________________
+
+    -> record() only appends to an in-memory batch, it is the only call made on the receive path \n
+    -> A background task swaps the batch out every {flush_interval} seconds and writes it from a single writer thread \n
+    -> Segments roll over at {segment_size} bytes and are named {feed}-{first recv time ns}.seg
+    """
+
+    def __init__(self, directory: str, feed: str, segment_size: int = 64 * 1024 * 1024, flush_interval: float = 0.25):
+        self.directory = directory
+        self.feed = feed
+        self.segment_size = segment_size
+        self.flush_interval = flush_interval
+
+        self._pending = []
+        self._file = None
+        self._written = 0
+        self._task = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"Recorder-{feed}")
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def record(self, frame: str | bytes) -> None:
+        self._pending.append((time.time_ns(), frame))
+
+    def _open_segment(self, first_ns: int) -> None:
+        self._close_segment()
+
+        path = os.path.join(self.directory, f"{self.feed}-{first_ns}.seg")
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._written = len(MAGIC)
+
+    def _write_batch(self, batch: list) -> None:
+        """
+        Runs in the executor thread, the only place frames are encoded and touch the disk
+        """
+        chunks = []
+
+        for recv_ns, frame in batch:
+            if isinstance(frame, str):
+                frame = frame.encode("utf-8")
+
+            if self._file is None or self._written >= self.segment_size:
+                if chunks:
+                    self._file.write(b"".join(chunks))
+                    chunks = []
+                self._open_segment(recv_ns)
+
+            chunks.append(RECORD_HEADER.pack(recv_ns, len(frame)))
+            chunks.append(frame)
+            self._written += RECORD_HEADER.size + len(frame)
+
+        self._file.write(b"".join(chunks))
+        self._file.flush()
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._write_batch, batch)
+
+    async def _flush_loop(self) -> None:
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+
+        except asyncio.CancelledError:
+            await self.flush()
+            raise
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop(), name=f"Recorder-{self.feed}")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.flush()
+
+        # Queued behind any write still in flight on the writer thread
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._close_segment)
+        self._executor.shutdown(wait=False)
+
+    def _close_segment(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
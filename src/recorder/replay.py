@@ -0,0 +1,110 @@
+import asyncio
+import glob
+import heapq
+import mmap
+import os
+import time
+
+from src.recorder.capture import MAGIC, RECORD_HEADER
+
+
+def read_segment(path: str):
+    """
+    Yields (recv time ns, raw frame bytes) from one memory-mapped segment file
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size <= len(MAGIC):
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[: len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not a recorder segment")
+
+            offset = len(MAGIC)
+            end = len(mm)
+
+            # A truncated tail (crash mid-write) is simply ignored
+            while offset + RECORD_HEADER.size <= end:
+                recv_ns, length = RECORD_HEADER.unpack_from(mm, offset)
+                offset += RECORD_HEADER.size
+
+                if offset + length > end:
+                    break
+
+                yield recv_ns, mm[offset : offset + length]
+                offset += length
+
+
+def read_feed(directory: str, feed: str):
+    """
+    Yields every recorded frame of a feed across its segments, in receive order
+    """
+    for path in sorted(glob.glob(os.path.join(directory, f"{feed}-*.seg")), key=_segment_start):
+        yield from read_segment(path)
+
+
+def _segment_start(path: str) -> int:
+    return int(os.path.basename(path).rsplit("-", 1)[1].split(".")[0])
+
+
+class ReplayDriver:
+    """
+    Feeds recorded sessions back through the feeds' own frame handlers
+
+    _______________________________________________________________
+
+    -> Frames from all added feeds are merged by receive time \n
+    -> speed = 1.0 replays at wall-clock pace, 10.0 ten times faster, 0 as fast as possible \n
+    -> Handlers are the same process_frame methods the live feeds call \n
+    -> The Binance depth stream needs its recorded REST snapshots ("binance_snapshot") merged in, add Binance feeds
+       with BinanceMarketData.replay(driver), which also stops the book sync fetching live snapshots
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.handlers = {}
+
+    def add_feed(self, feed: str, handler) -> None:
+        self.handlers[feed] = handler
+
+    def _tagged(self, feed: str):
+        for recv_ns, frame in read_feed(self.directory, feed):
+            yield recv_ns, feed, frame
+
+    def records(self):
+        """
+        Yields (recv time ns, feed, raw frame) for every added feed, merged by receive time
+        """
+        streams = [self._tagged(feed) for feed in self.handlers]
+        return heapq.merge(*streams, key=lambda record: record[0])
+
+    async def run(self, speed: float = 1.0) -> int:
+        """
+        Returns the number of frames replayed
+        """
+        count = 0
+        first_ns = None
+        start = time.perf_counter()
+
+        for recv_ns, feed, frame in self.records():
+            if speed > 0:
+                if first_ns is None:
+                    first_ns = recv_ns
+
+                delay = (recv_ns - first_ns) / 1e9 / speed - (time.perf_counter() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            self.handlers[feed](frame)
+            count += 1
+
+        return count
+
+
+# Usage
+# ss = SharedState()
+# driver = ReplayDriver(ss.record_dir)
+# driver.add_feed("bybit_public", BybitMarketData(ss).process_frame)
+# driver.add_feed("bybit_private", BybitPrivateData(ss).process_frame)
+# BinanceMarketData(ss).replay(driver)  # binance_public + binance_snapshot, not add_feed("binance_public", ...)
+# await driver.run(speed=10.0)
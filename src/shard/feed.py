@@ -0,0 +1,87 @@
+import asyncio
+
+from src.marketstate import MarketState
+from src.shard.shm import InstrumentBlock
+from src.sharedstate import SharedState
+from src.strategy.ws_feeds.multimarketdata import BinanceMultiMarketData, BybitMultiMarketData
+from src.utils.runtime import run, tune_gc
+
+
+def publish_to(ss: SharedState, block: InstrumentBlock) -> None:
+    """
+    Points a feed process' state at its instrument's shared memory, the handlers then write straight into it
+    """
+    ss.market = MarketState(block.market, block.market_seq)
+    ss.binance_bba = ss.market.binance_bba
+    ss.bybit_bba = ss.market.bybit_bba
+    ss.bybit_trades = block.bybit_trades
+    ss.binance_trades = block.binance_trades
+
+
+class ShardBybitMarketData(BybitMultiMarketData):
+    """
+    BybitMultiMarketData that also publishes each instrument's book after every orderbook message \n
+    wake, if given, is called (on the feed's thread) after every message that was published
+    """
+
+    def __init__(self, states: list[SharedState], blocks: list[InstrumentBlock], wake=None) -> None:
+        super().__init__(states)
+        self.books = {id(feed): block.bybit_book for feed, block in zip(self.feeds, blocks)}
+        self.wake = wake
+
+    def routed(self, feed, recv: dict):
+        if feed.topic_stream_map.get(recv["topic"]) == "Orderbook":
+            self.books[id(feed)].publish(feed.ss.bybit_book)
+
+        if self.wake is not None:
+            self.wake()
+
+
+class ShardBinanceMarketData(BinanceMultiMarketData):
+    def __init__(self, states: list[SharedState], blocks: list[InstrumentBlock], wake=None) -> None:
+        super().__init__(states)
+        self.books = {id(feed): block.binance_book for feed, block in zip(self.feeds, blocks)}
+        self.wake = wake
+
+    def routed(self, feed, recv: dict):
+        if feed.topic_stream_map.get(recv["stream"]) == "Orderbook":
+            self.books[id(feed)].publish(feed.ss.binance_book)
+
+        if self.wake is not None:
+            self.wake()
+
+
+async def feed(root: SharedState, instruments: list[dict], names: list[str], wake=None) -> None:
+    states = [SharedState(overrides) for overrides in instruments]
+
+    blocks = [InstrumentBlock.attach(name, root.shard_book_levels, root.shard_trade_capacity) for name in names]
+
+    for ss, block in zip(states, blocks):
+        ss.latency = root.latency
+        publish_to(ss, block)
+
+    feeds = [ShardBybitMarketData(states, blocks, wake).start_feed(), root.refresh_parameters(states)]
+
+    binance = [i for i, ss in enumerate(states) if ss.primary_data_feed == "BINANCE"]
+    if binance:
+        binance_feed = ShardBinanceMarketData([states[i] for i in binance], [blocks[i] for i in binance], wake)
+        feeds.append(binance_feed.start_feed())
+
+    # GC settings are process wide, a feed thread (wake given) leaves them to the strategy process that hosts it
+    if wake is None:
+        tune_gc(root.gc_freeze, root.gc_threshold, root.gc_disable_gen2)
+
+    await asyncio.gather(*feeds)
+
+
+def run_feed(instruments: list[dict], names: list[str], wake=None) -> None:
+    """
+    Feed process (or thread) entry point: public market data of the given instruments, published into their blocks \n
+    A thread runs a plain asyncio loop, the uvloop policy is process wide and belongs to the hosting process
+    """
+    root = SharedState()
+
+    if wake is None:
+        run(feed(root, instruments, names), root.use_uvloop)
+    else:
+        asyncio.run(feed(root, instruments, names, wake))
@@ -0,0 +1,296 @@
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from src.exchanges.common.localorderbook import BaseOrderBook
+from src.marketstate import MARKET_FIELDS, seqlock_copy
+
+# Header of a published book
+B_BID_COUNT = 0
+B_ASK_COUNT = 1
+B_BID_DEPLETED = 2
+B_ASK_DEPLETED = 3
+
+# Private block, written by the worker quoting the instrument
+P_INVENTORY_DELTA = 0
+P_ACCOUNT_SIZE = 1
+P_HEARTBEAT = 2
+P_OPEN_ORDERS = 3
+PRIVATE_FIELDS = 4
+
+# Control block, written by the supervisor
+C_HALTED = 0
+C_PORTFOLIO_DELTA = 1
+CONTROL_FIELDS = 2
+
+# Readers give up on a seqlock after this many tries and keep their last copy (the writer may have died mid write)
+READ_SPINS = 1000
+
+
+def attach(name: str) -> shared_memory.SharedMemory:
+    """
+    Opens a segment created by the supervisor, which alone unlinks it \n
+    Children started by the supervisor share its resource tracker, so attaching registers nothing new to clean up
+    """
+    return shared_memory.SharedMemory(name=name)
+
+
+class Carver:
+    """
+    Lays numpy arrays out back to back (64 byte aligned) in a buffer, or only sizes the layout if buf is None
+    """
+
+    def __init__(self, buf=None) -> None:
+        self.buf = buf
+        self.offset = 0
+
+    def take(self, shape, dtype=np.float64) -> np.ndarray | None:
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        arr = None
+
+        if self.buf is not None:
+            arr = np.ndarray(shape, dtype=dtype, buffer=self.buf, offset=self.offset)
+
+        self.offset += (nbytes + 63) // 64 * 64
+        return arr
+
+
+def close(shm: shared_memory.SharedMemory, owner: bool) -> None:
+    try:
+        shm.close()
+    except BufferError:
+        # Arrays still view the mapping, it goes with the process
+        pass
+
+    if owner:
+        shm.unlink()
+
+
+def reset_seq(seq: np.ndarray) -> None:
+    """
+    Evens out a sequence a dead writer left odd, before its replacement starts writing
+    """
+    if seq[0] & 1:
+        seq[0] += 1
+
+
+class ShmBook:
+    """
+    Best {levels} of both sides of one BaseOrderBook, published under a seqlock
+
+    _______________________________________________________________
+
+    -> publish() copies the top levels and the depletion counters after each book update (one writer) \n
+    -> load_into() rebuilds a reader's local BaseOrderBook from a consistent copy, only if the book changed
+    """
+
+    def __init__(self, carver: Carver, levels: int) -> None:
+        self.levels = levels
+        self.seq = carver.take(1, np.int64)
+        self.header = carver.take(4)
+        self.bids = carver.take((levels, 2))
+        self.asks = carver.take((levels, 2))
+
+        if carver.buf is not None:
+            self._scratch = np.zeros(4 + 4 * levels, dtype=np.float64)
+            self._last_seq = -1
+
+    def publish(self, book: BaseOrderBook) -> None:
+        bids, bid_count, _, _ = book.side_state(True)
+        asks, ask_count, _, _ = book.side_state(False)
+        nb = min(bid_count, self.levels)
+        na = min(ask_count, self.levels)
+
+        seq = self.seq
+        seq[0] += 1
+        self.bids[:nb] = bids[:nb]
+        self.asks[:na] = asks[:na]
+        self.header[B_BID_COUNT] = nb
+        self.header[B_ASK_COUNT] = na
+        self.header[B_BID_DEPLETED] = book.bid_depleted
+        self.header[B_ASK_DEPLETED] = book.ask_depleted
+        seq[0] += 1
+
+    def load_into(self, book: BaseOrderBook) -> bool:
+        """
+        True if the book was reloaded
+        """
+        seq = int(self.seq[0])
+
+        if seq == self._last_seq:
+            return False
+
+        n = self.levels
+        scratch = self._scratch
+
+        # Header and both sides in one consistent copy
+        for _ in range(READ_SPINS):
+            start = int(self.seq[0])
+            if start & 1:
+                continue
+
+            scratch[:4] = self.header
+            scratch[4 : 4 + 2 * n] = self.bids.ravel()
+            scratch[4 + 2 * n :] = self.asks.ravel()
+
+            if int(self.seq[0]) == start:
+                break
+        else:
+            return False
+
+        header = scratch[:4]
+        bids = scratch[4 : 4 + 2 * n].reshape(n, 2)
+        asks = scratch[4 + 2 * n :].reshape(n, 2)
+
+        book.load_arrays(asks, int(header[B_ASK_COUNT]), bids, int(header[B_BID_COUNT]))
+        book.bid_depleted = header[B_BID_DEPLETED]
+        book.ask_depleted = header[B_ASK_DEPLETED]
+        self._last_seq = start
+        return True
+
+
+class ShmTradeRing:
+    """
+    Single writer ring of (time, side, price, qty) trade rows, each reader keeps its own cursor
+
+    _______________________________________________________________
+
+    -> append()/extend() match the RingBuffer the handlers write to, so it can stand in for it in a feed process \n
+    -> read(cursor) returns the rows since the cursor, rows the writer lapped before they were copied are dropped
+    """
+
+    def __init__(self, carver: Carver, capacity: int) -> None:
+        self.capacity = capacity
+        self.head = carver.take(1, np.int64)
+        self.rows = carver.take((capacity, 4))
+
+    def append(self, row) -> None:
+        head = int(self.head[0])
+        self.rows[head % self.capacity] = row
+        self.head[0] = head + 1
+
+    def extend(self, rows) -> None:
+        for row in rows:
+            self.append(row)
+
+    def read(self, cursor: int) -> tuple[np.ndarray, int]:
+        capacity = self.capacity
+        head = int(self.head[0])
+        start = max(cursor, head - capacity)
+
+        if start >= head:
+            return self.rows[:0].copy(), head
+
+        idx = np.arange(start, head) % capacity
+        rows = self.rows[idx]
+
+        # Anything the writer wrapped over while we copied is no longer what was there, the row at head may be
+        # half written (head only moves on after the row), and it shares its slot with the row at head - capacity
+        lapped = int(self.head[0]) + 1 - capacity - start
+        if lapped > 0:
+            rows = rows[lapped:]
+
+        return rows, head
+
+
+class InstrumentBlock:
+    """
+    One instrument's shared memory: market frame, both books, both trade rings (feed process writes) and the private
+    block (worker writes), each with a single writer
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, levels: int, trade_capacity: int, owner: bool) -> None:
+        self.shm = shm
+        self.owner = owner
+        carver = Carver(shm.buf)
+        self._layout(carver, levels, trade_capacity)
+
+    def _layout(self, carver: Carver, levels: int, trade_capacity: int) -> None:
+        self.market_seq = carver.take(1, np.int64)
+        self.market = carver.take(len(MARKET_FIELDS))
+        self.bybit_book = ShmBook(carver, levels)
+        self.binance_book = ShmBook(carver, levels)
+        self.bybit_trades = ShmTradeRing(carver, trade_capacity)
+        self.binance_trades = ShmTradeRing(carver, trade_capacity)
+        self.private_seq = carver.take(1, np.int64)
+        self.private = carver.take(PRIVATE_FIELDS)
+
+    @staticmethod
+    def size(levels: int, trade_capacity: int) -> int:
+        carver = Carver()
+        InstrumentBlock.__new__(InstrumentBlock)._layout(carver, levels, trade_capacity)
+        return carver.offset
+
+    @classmethod
+    def create(cls, name: str, levels: int, trade_capacity: int) -> "InstrumentBlock":
+        shm = shared_memory.SharedMemory(name=name, create=True, size=cls.size(levels, trade_capacity))
+        shm.buf[:] = bytes(shm.size)
+        return cls(shm, levels, trade_capacity, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, levels: int, trade_capacity: int) -> "InstrumentBlock":
+        return cls(attach(name), levels, trade_capacity, owner=False)
+
+    def reset_writer(self) -> None:
+        """
+        Called by the supervisor before a crashed writer is replaced
+        """
+        for seq in (self.market_seq, self.bybit_book.seq, self.binance_book.seq, self.private_seq):
+            reset_seq(seq)
+
+    def publish_private(self, inventory_delta: float, account_size: float, open_orders: int) -> None:
+        seq = self.private_seq
+        seq[0] += 1
+        self.private[P_INVENTORY_DELTA] = inventory_delta
+        self.private[P_ACCOUNT_SIZE] = account_size
+        self.private[P_HEARTBEAT] = time.time()
+        self.private[P_OPEN_ORDERS] = open_orders
+        seq[0] += 1
+
+    def read_private(self, out: np.ndarray) -> bool:
+        return seqlock_copy(self.private_seq, self.private, out, READ_SPINS)
+
+    def close(self) -> None:
+        close(self.shm, self.owner)
+
+
+class ControlBlock:
+    """
+    Supervisor to workers: risk halt flag and the combined portfolio delta
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool) -> None:
+        self.shm = shm
+        self.owner = owner
+        carver = Carver(shm.buf)
+        self.seq = carver.take(1, np.int64)
+        self.values = carver.take(CONTROL_FIELDS)
+
+    @classmethod
+    def create(cls, name: str) -> "ControlBlock":
+        carver = Carver()
+        carver.take(1, np.int64)
+        carver.take(CONTROL_FIELDS)
+
+        shm = shared_memory.SharedMemory(name=name, create=True, size=carver.offset)
+        shm.buf[:] = bytes(shm.size)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "ControlBlock":
+        return cls(attach(name), owner=False)
+
+    def write(self, halted: bool, portfolio_delta: float) -> None:
+        seq = self.seq
+        seq[0] += 1
+        self.values[C_HALTED] = float(halted)
+        self.values[C_PORTFOLIO_DELTA] = portfolio_delta
+        seq[0] += 1
+
+    def read(self, out: np.ndarray) -> bool:
+        return seqlock_copy(self.seq, self.values, out, READ_SPINS)
+
+    def close(self) -> None:
+        close(self.shm, self.owner)
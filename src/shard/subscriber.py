@@ -0,0 +1,69 @@
+import numpy as np
+
+from src.marketstate import INVENTORY_DELTA, MARKET_FIELDS, seqlock_copy
+from src.shard.shm import READ_SPINS, InstrumentBlock
+from src.sharedstate import SharedState
+
+# Every slot the feed process writes, inventory delta is the quoting process' own (private feed)
+FEED_SLOTS = np.array([i for i in range(len(MARKET_FIELDS)) if i != INVENTORY_DELTA])
+
+
+class ShardSubscriber:
+    """
+    Pulls one instrument's published market data into the local state of the process quoting it
+
+    _______________________________________________________________
+
+    -> Market frame: seqlocked copy of the feed's slots into the local MarketState, so the strategy snapshots as it
+       does in a single process \n
+    -> Books: reloaded into the local books only when their sequence moved \n
+    -> Trades: rows since the last poll go to the local trade rings and trade flow engines \n
+    -> Publishes the quoting process' inventory, account size, open orders and a heartbeat back for the supervisor
+    """
+
+    def __init__(self, ss: SharedState, block: InstrumentBlock) -> None:
+        self.ss = ss
+        self.block = block
+        self._scratch = np.zeros(len(MARKET_FIELDS), dtype=np.float64)
+        self._market_seq = -1
+        self._bybit_cursor = 0
+        self._binance_cursor = 0
+
+    def _trades(self, ring, cursor: int, local, flow) -> tuple[bool, int]:
+        rows, head = ring.read(cursor)
+
+        for t, side, price, qty in rows:
+            local.append((t, side, price, qty))
+            flow.on_trade(t, 1.0 - 2 * side, price, qty)
+
+        return len(rows) > 0, head
+
+    def poll(self) -> bool:
+        """
+        True if anything the quotes read changed
+        """
+        ss = self.ss
+        block = self.block
+        changed = False
+
+        seq = int(block.market_seq[0])
+        if seq != self._market_seq and seqlock_copy(block.market_seq, block.market, self._scratch, READ_SPINS):
+            ss.market.set_many(FEED_SLOTS, self._scratch[FEED_SLOTS])
+            self._market_seq = seq
+            changed = True
+
+        changed |= block.bybit_book.load_into(ss.bybit_book)
+        changed |= block.binance_book.load_into(ss.binance_book)
+
+        moved, self._bybit_cursor = self._trades(
+            block.bybit_trades, self._bybit_cursor, ss.bybit_trades, ss.bybit_trade_flow
+        )
+        changed |= moved
+
+        moved, self._binance_cursor = self._trades(
+            block.binance_trades, self._binance_cursor, ss.binance_trades, ss.binance_trade_flow
+        )
+        changed |= moved
+
+        block.publish_private(ss.inventory_delta, ss.account_size, len(ss.current_orders))
+        return changed
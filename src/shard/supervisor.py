@@ -0,0 +1,203 @@
+import asyncio
+import os
+import time
+from datetime import datetime
+from multiprocessing import get_context
+
+import numpy as np
+
+from src.shard.feed import run_feed
+from src.shard.shm import P_ACCOUNT_SIZE, P_HEARTBEAT, P_INVENTORY_DELTA, P_OPEN_ORDERS, PRIVATE_FIELDS
+from src.shard.shm import ControlBlock, InstrumentBlock
+from src.shard.worker import run_worker
+from src.sharedstate import SharedState
+
+
+class Shard:
+    """
+    One child process and the instruments (indexes into {instruments}) it owns
+    """
+
+    def __init__(self, kind: str, target, indexes: list[int]) -> None:
+        self.kind = kind
+        self.target = target
+        self.indexes = indexes
+        self.process = None
+        self.started = 0.0
+        self.restarts = 0
+        self.next_start = 0.0
+
+
+class Supervisor:
+    """
+    Shards {instruments} over {shard_feeds} feed processes and {shard_workers} worker processes
+
+    _______________________________________________________________
+
+    -> Each instrument gets one shared memory block, the feed process owning it writes market data, the worker
+       owning it writes its private block (single writer per seqlock) \n
+    -> Instruments are dealt round robin, so a hot pair doesn't share its process with its neighbour \n
+    -> Dead processes are restarted with backoff, workers whose heartbeat is older than {shard_heartbeat_timeout}s
+       are killed and restarted \n
+    -> Portfolio delta is the account weighted sum of the workers' inventory deltas, above {max_portfolio_delta}
+       (0 = off) every worker is halted and pulls its quotes until it is back under
+    """
+
+    MONITOR_INTERVAL = 0.5
+    MAX_BACKOFF = 30.0
+
+    def __init__(self, sharedstate: SharedState) -> None:
+        self.ss = sharedstate
+        self.instruments = sharedstate.instruments
+        self.ctx = get_context("spawn")
+
+        prefix = f"smm_{os.getpid()}"
+        self.names = [f"{prefix}_{i}" for i in range(len(self.instruments))]
+        self.control_name = f"{prefix}_control"
+
+        self.blocks = [
+            InstrumentBlock.create(name, sharedstate.shard_book_levels, sharedstate.shard_trade_capacity)
+            for name in self.names
+        ]
+        self.control = ControlBlock.create(self.control_name)
+
+        self.feeds = [Shard("feed", run_feed, idx) for idx in self._deal(sharedstate.shard_feeds)]
+        self.workers = [Shard("worker", run_worker, idx) for idx in self._deal(sharedstate.shard_workers)]
+
+        self.halted = False
+        self.portfolio_delta = 0.0
+        self._private = np.zeros(PRIVATE_FIELDS, dtype=np.float64)
+
+    def _deal(self, processes: int) -> list[list[int]]:
+        processes = max(1, min(processes, len(self.instruments)))
+        return [list(range(i, len(self.instruments), processes)) for i in range(processes)]
+
+    def _args(self, shard: Shard) -> tuple:
+        instruments = [self.instruments[i] for i in shard.indexes]
+        names = [self.names[i] for i in shard.indexes]
+
+        if shard.kind == "worker":
+            return instruments, names, self.control_name
+
+        return instruments, names
+
+    def start(self, shard: Shard) -> None:
+        shard.process = self.ctx.Process(target=shard.target, args=self._args(shard), daemon=True)
+        shard.process.start()
+        shard.started = time.time()
+
+    def restart(self, shard: Shard, reason: str) -> None:
+        now = time.time()
+
+        if now < shard.next_start:
+            return
+
+        symbols = [self.instruments[i].get("bybit_symbol") for i in shard.indexes]
+        print(f"{datetime.now().strftime('%H:%S.%f')[:12]}: Restarting {shard.kind} for {symbols} ({reason})")
+
+        if shard.process.is_alive():
+            shard.process.kill()
+        shard.process.join()
+
+        # A writer killed mid section leaves its sequences odd, readers would spin on them forever
+        for i in shard.indexes:
+            self.blocks[i].reset_writer()
+
+        shard.restarts += 1
+        shard.next_start = now + min(self.MAX_BACKOFF, 2.0**shard.restarts)
+        self.start(shard)
+
+    def stale(self, shard: Shard, now: float) -> bool:
+        """
+        True if a worker stopped heartbeating, after it had its startup time to connect
+        """
+        timeout = self.ss.shard_heartbeat_timeout
+
+        if now - shard.started < 3 * timeout:
+            return False
+
+        for i in shard.indexes:
+            if self.blocks[i].read_private(self._private) and now - self._private[P_HEARTBEAT] > timeout:
+                return True
+
+        return False
+
+    def risk(self) -> None:
+        exposure, capital = 0.0, 0.0
+
+        for block in self.blocks:
+            if block.read_private(self._private):
+                exposure += self._private[P_INVENTORY_DELTA] * self._private[P_ACCOUNT_SIZE]
+                capital += self._private[P_ACCOUNT_SIZE]
+
+        self.portfolio_delta = exposure / capital if capital else 0.0
+
+        limit = self.ss.max_portfolio_delta
+        halted = limit > 0 and abs(self.portfolio_delta) > limit
+
+        if halted != self.halted:
+            state = "halted" if halted else "resumed"
+            print(
+                f"{datetime.now().strftime('%H:%S.%f')[:12]}: Quoting {state}, portfolio delta {self.portfolio_delta}"
+            )
+
+        self.halted = halted
+        self.control.write(halted, self.portfolio_delta)
+
+    def portfolio(self) -> dict:
+        instruments = {}
+
+        for instrument, block in zip(self.instruments, self.blocks):
+            if block.read_private(self._private):
+                instruments[instrument.get("bybit_symbol")] = {
+                    "inventory_delta": float(self._private[P_INVENTORY_DELTA]),
+                    "account_size": float(self._private[P_ACCOUNT_SIZE]),
+                    "open_orders": int(self._private[P_OPEN_ORDERS]),
+                    "heartbeat": float(self._private[P_HEARTBEAT]),
+                }
+
+        return {
+            "portfolio_delta": self.portfolio_delta,
+            "halted": self.halted,
+            "restarts": {shard.kind + str(n): shard.restarts for n, shard in enumerate(self.feeds + self.workers)},
+            "instruments": instruments,
+        }
+
+    async def monitor(self) -> None:
+        while True:
+            now = time.time()
+
+            for shard in self.feeds:
+                if not shard.process.is_alive():
+                    self.restart(shard, f"exit code {shard.process.exitcode}")
+
+            for shard in self.workers:
+                if not shard.process.is_alive():
+                    self.restart(shard, f"exit code {shard.process.exitcode}")
+
+                elif self.stale(shard, now):
+                    self.restart(shard, "no heartbeat")
+
+            self.risk()
+            await asyncio.sleep(self.MONITOR_INTERVAL)
+
+    def stop(self) -> None:
+        for shard in self.feeds + self.workers:
+            if shard.process is not None and shard.process.is_alive():
+                shard.process.terminate()
+                shard.process.join(5)
+
+        for block in self.blocks:
+            block.close()
+
+        self.control.close()
+
+    async def run(self) -> None:
+        # Feeds first, the workers have nothing to quote off until they publish
+        for shard in self.feeds + self.workers:
+            self.start(shard)
+
+        try:
+            await self.monitor()
+        finally:
+            self.stop()
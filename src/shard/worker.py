@@ -0,0 +1,83 @@
+import asyncio
+
+import numpy as np
+
+from src.exchanges.bybit.order.core import Order
+from src.exchanges.bybit.order.gateway import OrderGateway
+from src.shard.shm import C_HALTED, CONTROL_FIELDS, ControlBlock, InstrumentBlock
+from src.shard.subscriber import ShardSubscriber
+from src.sharedstate import SharedState
+from src.strategy.multi.multi_core import instrument_states, instrument_strategies
+from src.strategy.ws_feeds.multiprivatedata import BybitMultiPrivateData
+from src.utils.runtime import LoopLagMonitor, run, tune_gc
+
+
+class Worker:
+    """
+    Quotes its share of the instruments off the feed processes' shared memory
+
+    _______________________________________________________________
+
+    -> One OrderGateway and one private websocket for the worker's instruments, as in src/strategy/multi \n
+    -> Polls the blocks every {shard_poll_interval}s and triggers a requote for the instruments that changed \n
+    -> Follows the supervisor's halt flag, pulling all quotes of its instruments once when it is raised
+    """
+
+    def __init__(self, instruments: list[dict], names: list[str], control_name: str) -> None:
+        self.ss = SharedState()
+        self.ss.instruments = instruments
+        self.states = instrument_states(self.ss)
+        self.strategies = instrument_strategies(self.states)
+
+        levels, capacity = self.ss.shard_book_levels, self.ss.shard_trade_capacity
+        self.blocks = [InstrumentBlock.attach(name, levels, capacity) for name in names]
+        self.subscribers = [ShardSubscriber(ss, block) for ss, block in zip(self.states, self.blocks)]
+
+        self.control = ControlBlock.attach(control_name)
+        self._control = np.zeros(CONTROL_FIELDS, dtype=np.float64)
+
+    def halt(self, halted: bool) -> None:
+        for ss in self.states:
+            # Pull the quotes on the rising edge, the strategy loops skip their ticks while halted
+            # A strategy mid diff may still place orders after this, the wake-up makes it sweep them once it is done
+            # (orders acknowledged later wake it through the private feed)
+            if halted and not ss.halted:
+                asyncio.create_task(Order(ss).cancel_all())
+                ss.requote.signal(force=True)
+
+            ss.halted = halted
+
+    async def poll(self) -> None:
+        while True:
+            for ss, subscriber in zip(self.states, self.subscribers):
+                if subscriber.poll():
+                    ss.requote.signal()
+
+            if self.control.read(self._control):
+                self.halt(bool(self._control[C_HALTED]))
+
+            await asyncio.sleep(self.ss.shard_poll_interval)
+
+    async def run(self) -> None:
+        await OrderGateway.get(self.ss).start()
+
+        tasks = [
+            self.ss.refresh_parameters(self.states),
+            BybitMultiPrivateData(self.states).start_feed(),
+            self.poll(),
+            *[strategy.logic() for strategy in self.strategies],
+        ]
+
+        if self.ss.loop_lag_interval:
+            tasks.append(LoopLagMonitor(self.ss.loop_lag_interval, self.ss.loop_lag_threshold).run())
+
+        tune_gc(self.ss.gc_freeze, self.ss.gc_threshold, self.ss.gc_disable_gen2)
+        await asyncio.gather(*tasks)
+
+
+def run_worker(instruments: list[dict], names: list[str], control_name: str) -> None:
+    """
+    Worker process entry point
+    """
+    worker = Worker(instruments, names, control_name)
+    run(worker.run(), worker.ss.use_uvloop)
@@ -1,10 +1,30 @@
 import asyncio
-import numpy as np
+import time
 import yaml
 from numpy_ringbuffer import RingBuffer
 
 from src.exchanges.binance.websockets.handlers.orderbook import OrderBookBinance
 from src.exchanges.bybit.websockets.handlers.orderbook import OrderBookBybit
+from src.exchanges.common.klinestore import KlineStore
+from src.exchanges.common.orderstore import OrderStore
+from src.indicators.bbw import BbwState
+from src.indicators.ema import EmaState
+from src.marketstate import (
+    ALPHA_VALUE,
+    BINANCE_LAST_PRICE,
+    BYBIT_MARK_PRICE,
+    INVENTORY_DELTA,
+    MOMENTUM_VALUE,
+    VOLATILITY_VALUE,
+    MarketState,
+    weighted_mid_price,
+)
+from src.strategy.features.bookfeatures import BookFeatures
+from src.strategy.features.momentum import TREND_LENGTHS
+from src.strategy.features.tradeflow import TradeFlow
+from src.strategy.trigger import RequoteTrigger
+from src.utils.latency import LatencyTracer
+from src.utils.rounding import rounder
 from collections import deque
 
 
@@ -12,34 +32,144 @@ class SharedState:
     CONFIG_DIR = ""  # Put the bybit.yaml file directory here
     PARAM_DIR = ""  # Put the parameters.yaml file directory here
 
-    def __init__(self) -> None:
+    # Fixed attribute set, nothing can be added to a live instance (a typo'd write fails instead of going unread)
+    __slots__ = (
+        # Config
+        "api_key",
+        "api_secret",
+        "local_exchange",
+        # Parameters, replaced as a whole by load_settings
+        "overrides",
+        "binance_symbol",
+        "bybit_symbol",
+        "binance_tick_size",
+        "binance_lot_size",
+        "bybit_tick_size",
+        "bybit_lot_size",
+        "bybit_ticks",
+        "bybit_lots",
+        "account_size",
+        "primary_data_feed",
+        "buffer",
+        "bb_length",
+        "bb_std",
+        "quote_offset",
+        "size_offset",
+        "volatility_offset",
+        "target_spread",
+        "num_orders",
+        "minimum_order_size",
+        "maximum_order_size",
+        "inventory_extreme",
+        "record_feeds",
+        "record_dir",
+        "order_transport",
+        "requote_threshold",
+        "requote_skew_threshold",
+        "requote_debounce",
+        "requote_heartbeat",
+        "metrics_port",
+        "latency_report_interval",
+        "trade_flow_window",
+        "vpin_bucket_volume",
+        "vpin_buckets",
+        "large_trade_multiple",
+        "trade_flow_weight",
+        "book_imbalance_depths",
+        "book_feature_levels",
+        "book_depletion_halflife",
+        "book_feature_weights",
+        "instruments",
+        "settle_coin",
+        "shard_workers",
+        "shard_feeds",
+        "shard_book_levels",
+        "shard_trade_capacity",
+        "shard_poll_interval",
+        "shard_heartbeat_timeout",
+        "max_portfolio_delta",
+        "feed_ingestion",
+        "use_uvloop",
+        "ws_options",
+        "gc_freeze",
+        "gc_threshold",
+        "gc_disable_gen2",
+        "loop_lag_interval",
+        "loop_lag_threshold",
+        # Market/private scalars, see src/marketstate.py
+        "market",
+        "binance_bba",
+        "bybit_bba",
+        # Market data, updated in place by the handlers
+        "binance_trades",
+        "binance_book",
+        "binance_trade_flow",
+        "bybit_trades",
+        "bybit_book",
+        "bybit_trade_flow",
+        "bybit_klines",
+        "bybit_kline_interval",
+        "bybit_bbw",
+        "bybit_trend_ema",
+        # Private data
+        "current_orders",
+        "execution_feed",
+        # Set by the shard supervisor's risk check, nothing is quoted while it is
+        "halted",
+        "clock",
+        # Plumbing
+        "requote",
+        "latency",
+    )
+
+    def __init__(self, overrides: dict = None) -> None:
+        # Settings of one instrument in multi-instrument mode, applied over parameters.yaml on every (re)load
+        self.overrides = overrides or {}
+
         self.load_config()
         self.load_initial_settings()
 
+        # Scalar market/private inputs in one seqlocked frame, the strategy reads a snapshot() of it per tick
+        self.market = MarketState()
+        self.binance_bba = self.market.binance_bba  # Read-only view [Bid[P, Q], Ask[P, Q]], write with set_bba
+        self.bybit_bba = self.market.bybit_bba  # Read-only view [Bid[P, Q], Ask[P, Q]], write with set_quote
+
         # Binance attributes
         self.binance_trades = RingBuffer(capacity=1000, dtype=(float, 4))
-        self.binance_bba = np.zeros((2, 2))  # [Bid[P, Q], Ask[P, Q]]
         self.binance_book = OrderBookBinance()
-        self.binance_last_price = 0.0
+        self.binance_trade_flow = self.new_trade_flow()
 
         # Bybit attributes
         self.bybit_trades = RingBuffer(capacity=1000, dtype=(float, 4))
-        self.bybit_bba = np.zeros((2, 2))  # [Bid[P, Q], Ask[P, Q]]
         self.bybit_book = OrderBookBybit()
-        self.bybit_mark_price = 0.0
-        self.bybit_klines = deque(maxlen=100)
+        self.bybit_trade_flow = self.new_trade_flow()
+        self.bybit_klines = KlineStore(capacity=1000)  # KlineSeries per interval, see klinestore.py
+        self.bybit_kline_interval = "1"  # Interval streamed and fed to the indicators
+
+        # Streaming kline indicators, fed one close at a time by BybitKlineProcessor
+        self.bybit_bbw = BbwState(self.bb_length, self.bb_std)
+        self.bybit_trend_ema = EmaState(int(TREND_LENGTHS.max()), history=int(TREND_LENGTHS.max()))
+
         # Other attributes
-        self.current_orders = {}
+        self.current_orders = OrderStore(self.bybit_ticks, self.bybit_lots)
         self.execution_feed = deque(maxlen=100)
-        self.volatility_value = 0.0
-        self.alpha_value = 0.0
-        self.inventory_delta = 0.0
+        self.halted = False
+
+        # Event clock (epoch seconds) the feature windows age by, wall clock live, replay time in the backtest
+        self.clock = time.time
+
+        # Set by the feeds on every relevant update, awaited by the strategy loop
+        self.requote = RequoteTrigger()
+
+        # Tick-to-trade stamps, see src/utils/latency.py
+        self.latency = LatencyTracer()
 
     def load_config(self):
         with open(self.CONFIG_DIR, "r") as f:
             config = yaml.safe_load(f)
             self.api_key = config["api_key"]
             self.api_secret = config["api_secret"]
+            self.local_exchange = config.get("local_exchange", "")
 
     def load_settings(self, settings):
         self.binance_symbol = settings["binance_symbol"]
@@ -48,6 +178,11 @@ class SharedState:
         self.binance_lot_size = float(settings["binance_lot_size"])
         self.bybit_tick_size = float(settings["bybit_tick_size"])
         self.bybit_lot_size = float(settings["bybit_lot_size"])
+
+        # Fixed-point grids, quotes/orders carry int64 tick and lot counts, see src/utils/rounding.py
+        self.bybit_ticks = rounder(self.bybit_tick_size)
+        self.bybit_lots = rounder(self.bybit_lot_size)
+
         self.account_size = float(settings["account_size"])
         self.primary_data_feed = str(settings["primary_data_feed"]).upper()
         self.buffer = float(settings["buffer"]) * self.bybit_tick_size
@@ -61,19 +196,137 @@ class SharedState:
         self.minimum_order_size = float(settings["minimum_order_size"])
         self.maximum_order_size = float(settings["maximum_order_size"])
         self.inventory_extreme = float(settings["inventory_extreme"])
+        self.record_feeds = bool(settings["record_feeds"])
+        self.record_dir = str(settings["record_dir"])
+        self.order_transport = str(settings["order_transport"]).upper()
+        self.requote_threshold = float(settings["requote_threshold"])
+        self.requote_skew_threshold = float(settings["requote_skew_threshold"])
+        self.requote_debounce = float(settings["requote_debounce"])
+        self.requote_heartbeat = float(settings["requote_heartbeat"])
+        self.metrics_port = int(settings["metrics_port"])
+        self.latency_report_interval = float(settings["latency_report_interval"])
+        self.trade_flow_window = float(settings["trade_flow_window"])
+        self.vpin_bucket_volume = float(settings["vpin_bucket_volume"])
+        self.vpin_buckets = int(settings["vpin_buckets"])
+        self.large_trade_multiple = float(settings["large_trade_multiple"])
+        self.trade_flow_weight = float(settings["trade_flow_weight"])
+        self.book_imbalance_depths = [int(d) for d in settings["book_imbalance_depths"]]
+        self.book_feature_levels = int(settings["book_feature_levels"])
+        self.book_depletion_halflife = float(settings["book_depletion_halflife"])
+        self.book_feature_weights = {k: float(v) for k, v in settings["book_feature_weights"].items()}
+        self.instruments = [dict(entry) for entry in settings.get("instruments") or []]
+        self.settle_coin = str(settings.get("settle_coin", "USDT")).upper()
+        self.shard_workers = int(settings.get("shard_workers", 0))
+        self.shard_feeds = int(settings.get("shard_feeds", 1))
+        self.shard_book_levels = int(settings.get("shard_book_levels", 50))
+        self.shard_trade_capacity = int(settings.get("shard_trade_capacity", 4096))
+        self.shard_poll_interval = float(settings.get("shard_poll_interval", 0.001))
+        self.shard_heartbeat_timeout = float(settings.get("shard_heartbeat_timeout", 10))
+        self.max_portfolio_delta = float(settings.get("max_portfolio_delta", 0))
+        self.feed_ingestion = str(settings.get("feed_ingestion", "INLINE")).upper()
+        self.use_uvloop = bool(settings.get("use_uvloop", False))
+        self.gc_freeze = bool(settings.get("gc_freeze", True))
+        self.gc_threshold = int(settings.get("gc_threshold", 50000))
+        self.gc_disable_gen2 = bool(settings.get("gc_disable_gen2", False))
+        self.loop_lag_interval = float(settings.get("loop_lag_interval", 0.005))
+        self.loop_lag_threshold = float(settings.get("loop_lag_threshold", 0.005))
+
+        # Passed to every websockets.connect(), 0 turns a limit/ping off
+        self.ws_options = {
+            "max_size": int(settings.get("ws_max_size", 2**22)) or None,
+            "compression": "deflate" if settings.get("ws_compression", False) else None,
+            "ping_interval": float(settings.get("ws_ping_interval", 20)) or None,
+            "ping_timeout": float(settings.get("ws_ping_timeout", 20)) or None,
+        }
+
+    def apply_settings(self, settings: dict) -> None:
+        self.load_settings({**settings, **self.overrides})
+
+    def new_trade_flow(self) -> TradeFlow:
+        return TradeFlow(
+            window=self.trade_flow_window,
+            bucket_volume=self.vpin_bucket_volume,
+            buckets=self.vpin_buckets,
+            large_multiple=self.large_trade_multiple,
+        )
+
+    def new_book_features(self, book, other_book) -> BookFeatures:
+        return BookFeatures(
+            book,
+            other_book,
+            depths=self.book_imbalance_depths,
+            levels=self.book_feature_levels,
+            depletion_halflife=self.book_depletion_halflife,
+            clock=lambda: self.clock(),
+        )
 
     def load_initial_settings(self):
         with open(self.PARAM_DIR, "r") as f:
             settings = yaml.safe_load(f)
-            self.load_settings(settings)
+            self.apply_settings(settings)
 
-    async def refresh_parameters(self):
+    async def refresh_parameters(self, instruments: list = ()):
+        """
+        Reloads parameters.yaml every minute, into this state and any instrument states given
+        """
         while True:
             with open(self.PARAM_DIR, "r") as f:
                 settings = yaml.safe_load(f)
-                self.load_settings(settings)
+                self.apply_settings(settings)
+
+                for ss in instruments:
+                    ss.apply_settings(settings)
+
             await asyncio.sleep(60)
 
+    @property
+    def bybit_mark_price(self) -> float:
+        return self.market.bybit_mark_price
+
+    @bybit_mark_price.setter
+    def bybit_mark_price(self, value: float) -> None:
+        self.market.set(BYBIT_MARK_PRICE, value)
+
+    @property
+    def binance_last_price(self) -> float:
+        return self.market.binance_last_price
+
+    @binance_last_price.setter
+    def binance_last_price(self, value: float) -> None:
+        self.market.set(BINANCE_LAST_PRICE, value)
+
+    @property
+    def volatility_value(self) -> float:
+        return self.market.volatility_value
+
+    @volatility_value.setter
+    def volatility_value(self, value: float) -> None:
+        self.market.set(VOLATILITY_VALUE, value)
+
+    @property
+    def alpha_value(self) -> float:
+        return self.market.alpha_value
+
+    @alpha_value.setter
+    def alpha_value(self, value: float) -> None:
+        self.market.set(ALPHA_VALUE, value)
+
+    @property
+    def inventory_delta(self) -> float:
+        return self.market.inventory_delta
+
+    @inventory_delta.setter
+    def inventory_delta(self, value: float) -> None:
+        self.market.set(INVENTORY_DELTA, value)
+
+    @property
+    def momentum_value(self) -> float:
+        return self.market.momentum_value
+
+    @momentum_value.setter
+    def momentum_value(self, value: float) -> None:
+        self.market.set(MOMENTUM_VALUE, value)
+
     @property
     def binance_mid_price(self):
         return self.calculate_mid_price(self.binance_bba)
@@ -97,5 +350,4 @@ class SharedState:
 
     @staticmethod
     def calculate_weighted_mid_price(bba):
-        imb = bba[0][1] / (bba[0][1] + bba[1][1])
-        return bba[1][0] * imb + bba[0][0] * (1 - imb)
+        return weighted_mid_price(bba)
@@ -0,0 +1,270 @@
+import random
+import time
+
+
+class SimMarket:
+    """
+    Synthetic single-symbol linear market with a random-walk mid, used by the local exchange simulator
+
+    _______________________________________________________________
+
+    -> step() moves the mid, rebuilds {depth} levels a side and prints one random taker trade at the touch \n
+    -> Resting PostOnly orders fill when a trade prints at or through their price \n
+    -> Every call returns plain dicts shaped like Bybit v5 websocket data, the server only wraps and sends them
+    """
+
+    def __init__(self, symbol: str, price: float = 30000.0, tick_size: float = 0.1, depth: int = 50) -> None:
+        self.symbol = symbol
+        self.tick_size = tick_size
+        self.depth = depth
+        self.mid = price
+
+        self.update_id = 0
+        self.bids = {}
+        self.asks = {}
+
+        self.orders = {}  # orderId -> order dict (Bybit v5 shape)
+        self.position = 0.0
+        self.entry_price = 0.0
+        self._next_id = 0
+
+        self.kline_start = 0
+        self.kline = None
+
+        self._rebuild()
+
+    # Market data \
+
+    def _round(self, price: float) -> float:
+        return round(round(price / self.tick_size) * self.tick_size, 10)
+
+    def _rebuild(self) -> tuple[dict, dict]:
+        """
+        Returns the levels that changed since the last rebuild (qty 0 = removed)
+        """
+        best_bid = self._round(self.mid - self.tick_size / 2)
+        best_ask = self._round(best_bid + self.tick_size)
+
+        bids = {
+            self._round(best_bid - i * self.tick_size): round(random.uniform(0.01, 5), 3) for i in range(self.depth)
+        }
+        asks = {
+            self._round(best_ask + i * self.tick_size): round(random.uniform(0.01, 5), 3) for i in range(self.depth)
+        }
+
+        bid_changes = {p: q for p, q in bids.items() if self.bids.get(p) != q}
+        bid_changes.update({p: 0 for p in self.bids if p not in bids})
+        ask_changes = {p: q for p, q in asks.items() if self.asks.get(p) != q}
+        ask_changes.update({p: 0 for p in self.asks if p not in asks})
+
+        self.bids, self.asks = bids, asks
+        self.update_id += 1
+
+        return bid_changes, ask_changes
+
+    @property
+    def best_bid(self) -> float:
+        return max(self.bids)
+
+    @property
+    def best_ask(self) -> float:
+        return min(self.asks)
+
+    def _levels(self, levels: dict, reverse: bool) -> list:
+        return [[str(p), str(q)] for p, q in sorted(levels.items(), reverse=reverse)]
+
+    def book_snapshot(self, depth: int) -> dict:
+        return {
+            "s": self.symbol,
+            "b": self._levels(self.bids, True)[:depth],
+            "a": self._levels(self.asks, False)[:depth],
+            "u": self.update_id,
+            "seq": self.update_id,
+        }
+
+    def ticker(self) -> dict:
+        return {"symbol": self.symbol, "markPrice": str(self._round(self.mid)), "lastPrice": str(self._round(self.mid))}
+
+    def step(self, volatility: float = 2.0) -> tuple[dict, list, list, list]:
+        """
+        Advances the market one update, returns (book delta, trades, order updates, executions)
+        """
+        self.mid = max(self.tick_size, self.mid + random.gauss(0, volatility) * self.tick_size)
+        bid_changes, ask_changes = self._rebuild()
+
+        delta = {
+            "s": self.symbol,
+            "b": self._levels(bid_changes, True),
+            "a": self._levels(ask_changes, False),
+            "u": self.update_id,
+            "seq": self.update_id,
+        }
+
+        taker_side = random.choice(["Buy", "Sell"])
+        price = self.best_ask if taker_side == "Buy" else self.best_bid
+        size = round(random.uniform(0.001, 1), 3)
+        now = int(time.time() * 1000)
+
+        trades = [{"T": now, "s": self.symbol, "S": taker_side, "v": str(size), "p": str(price), "i": str(now)}]
+        self._update_kline(now, price, size)
+
+        order_updates, executions = self._match(taker_side, price, size)
+
+        return delta, trades, order_updates, executions
+
+    def _update_kline(self, now: int, price: float, size: float) -> None:
+        start = now - now % 60_000
+
+        if self.kline is None or start != self.kline_start:
+            self.kline_start = start
+            self.kline = {
+                "start": start,
+                "end": start + 59_999,
+                "interval": "1",
+                "open": price,
+                "high": price,
+                "low": price,
+                "close": price,
+                "volume": 0.0,
+                "turnover": 0.0,
+                "confirm": False,
+            }
+
+        k = self.kline
+        k["high"] = max(k["high"], price)
+        k["low"] = min(k["low"], price)
+        k["close"] = price
+        k["volume"] += size
+        k["turnover"] += size * price
+
+    def kline_data(self, now: int) -> list:
+        k = dict(self.kline)
+        k["confirm"] = now >= k["end"]
+        k["timestamp"] = now
+        return [{key: str(v) if isinstance(v, float) else v for key, v in k.items()}]
+
+    # Orders \
+
+    def _crosses(self, side: str, price: float) -> bool:
+        return price >= self.best_ask if side == "Buy" else price <= self.best_bid
+
+    def create(self, side: str, price: float, qty: float, orderType: str = "Limit", orderLinkId: str = "") -> dict:
+        self._next_id += 1
+        order = {
+            "orderId": f"local-{self._next_id}",
+            "orderLinkId": orderLinkId,
+            "symbol": self.symbol,
+            "side": side,
+            "price": str(price),
+            "qty": str(qty),
+            "orderType": orderType,
+            "timeInForce": "PostOnly",
+            "orderStatus": "New",
+            "cumExecQty": "0",
+            "leavesQty": str(qty),
+            "rejectReason": "EC_NoError",
+        }
+
+        if self._crosses(side, price):
+            order["orderStatus"] = "Cancelled"
+            order["rejectReason"] = "EC_PostOnlyWillTakeLiquidity"
+        else:
+            self.orders[order["orderId"]] = order
+
+        return order
+
+    def amend(self, orderId: str, price: float | None, qty: float | None) -> dict | None:
+        order = self.orders.get(orderId)
+        if order is None:
+            return None
+
+        if price is not None and self._crosses(order["side"], price):
+            order["orderStatus"] = "Cancelled"
+            order["rejectReason"] = "EC_PostOnlyWillTakeLiquidity"
+            return self.orders.pop(orderId)
+
+        if price is not None:
+            order["price"] = str(price)
+        if qty is not None:
+            order["qty"] = str(qty)
+            order["leavesQty"] = str(qty - float(order["cumExecQty"]))
+
+        return order
+
+    def cancel(self, orderId: str) -> dict | None:
+        order = self.orders.pop(orderId, None)
+        if order is not None:
+            order["orderStatus"] = "Cancelled"
+        return order
+
+    def cancel_all(self) -> list:
+        cancelled = [self.cancel(orderId) for orderId in list(self.orders)]
+        return cancelled
+
+    def _match(self, taker_side: str, price: float, size: float) -> tuple[list, list]:
+        order_updates = []
+        executions = []
+
+        for orderId, order in list(self.orders.items()):
+            if size <= 0:
+                break
+
+            side = order["side"]
+            order_price = float(order["price"])
+
+            if side == taker_side:
+                continue
+
+            if (side == "Buy" and order_price < price) or (side == "Sell" and order_price > price):
+                continue
+
+            leaves = float(order["leavesQty"])
+            fill = min(leaves, size)
+            size -= fill
+
+            order["cumExecQty"] = str(float(order["cumExecQty"]) + fill)
+            order["leavesQty"] = str(leaves - fill)
+            order["orderStatus"] = "Filled" if leaves - fill <= 0 else "PartiallyFilled"
+
+            if order["orderStatus"] == "Filled":
+                del self.orders[orderId]
+
+            self._update_position(side, order_price, fill)
+            order_updates.append(dict(order))
+            executions.append(
+                {
+                    "symbol": self.symbol,
+                    "orderId": orderId,
+                    "side": side,
+                    "execPrice": order["price"],
+                    "execQty": str(fill),
+                }
+            )
+
+        return order_updates, executions
+
+    def _update_position(self, side: str, price: float, qty: float) -> None:
+        signed = qty if side == "Buy" else -qty
+        new_position = self.position + signed
+
+        if self.position == 0 or (self.position > 0) != (signed > 0):
+            if new_position != 0 and (new_position > 0) != (self.position > 0):
+                self.entry_price = price
+        else:
+            self.entry_price = (self.entry_price * abs(self.position) + price * qty) / abs(new_position)
+
+        self.position = round(new_position, 10)
+
+    def position_data(self) -> list:
+        side = "Buy" if self.position > 0 else "Sell" if self.position < 0 else ""
+        size = abs(self.position)
+        return [
+            {
+                "symbol": self.symbol,
+                "side": side,
+                "size": str(size),
+                "avgPrice": str(self.entry_price),
+                "positionValue": str(size * self.entry_price),
+                "markPrice": str(self._round(self.mid)),
+            }
+        ]
@@ -0,0 +1,493 @@
+import argparse
+import asyncio
+import random
+import time
+
+import orjson
+from aiohttp import WSMsgType, web
+
+from src.exchanges.bybit.order.endpoints import BaseEndpoints
+from src.exchanges.bybit.websockets.endpoints import WsStreamLinks
+from src.simulator.market import SimMarket
+
+
+def use_local_exchange(address: str) -> None:
+    """
+    Points every Bybit REST client and websocket feed at a local simulator, e.g. '127.0.0.1:8080'
+    """
+    BaseEndpoints.ACTIVE = f"http://{address}"
+    WsStreamLinks.SPOT_PUBLIC_STREAM = f"ws://{address}/v5/public/spot"
+    WsStreamLinks.FUTURES_PUBLIC_STREAM = f"ws://{address}/v5/public/linear"
+    WsStreamLinks.COMBINED_PRIVATE_STREAM = f"ws://{address}/v5/private"
+    WsStreamLinks.TRADE_STREAM = f"ws://{address}/v5/trade"
+
+
+class TokenBucket:
+    def __init__(self, rate: float) -> None:
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+
+        return False
+
+    def reset_ms(self) -> int:
+        wait = max(0.0, (1 - self.tokens) / self.rate)
+        return int((time.time() + wait) * 1000)
+
+
+class LocalExchange:
+    """
+    Local asyncio stand-in for the Bybit v5 endpoints the bot uses
+
+    _______________________________________________________________
+
+    -> REST: order create/amend/cancel (single, batch, cancel-all), /v5/order/realtime, /v5/position/list, market data \n
+    -> Websockets: /v5/public/linear (orderbook, tickers, publicTrade, kline) and /v5/private (order, execution, position) \n
+    -> /v5/trade websocket order entry, rate limited and delayed the same as the REST order endpoints \n
+    -> {latency} (+ up to {jitter}) seconds are added to every REST response \n
+    -> Each endpoint has a {rate_limit} req/s token bucket, reported in the X-Bapi-Limit* headers like Bybit does \n
+    -> {error_rate} of requests fail with a server error, sockets are dropped every {disconnect_interval}s (0 = never)
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        rate_limit: float = 10.0,
+        error_rate: float = 0.0,
+        disconnect_interval: float = 0.0,
+        update_interval: float = 0.1,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.disconnect_interval = disconnect_interval
+        self.update_interval = update_interval
+
+        self.markets = {}
+        self.buckets = {}
+        self.public_sockets = {}  # ws -> set of topics
+        self.private_sockets = {}  # ws -> set of topics
+        self.trade_sockets = set()
+
+        self.trade_ops = {
+            "order.create": ("/v5/order/create", self.create_order),
+            "order.amend": ("/v5/order/amend", self.amend_order),
+            "order.cancel": ("/v5/order/cancel", self.cancel_order),
+            "order.create-batch": ("/v5/order/create-batch", self.create_batch),
+            "order.amend-batch": ("/v5/order/amend-batch", self.amend_batch),
+            "order.cancel-batch": ("/v5/order/cancel-batch", self.cancel_batch),
+        }
+
+    def market(self, symbol: str) -> SimMarket:
+        if symbol not in self.markets:
+            self.markets[symbol] = SimMarket(symbol)
+        return self.markets[symbol]
+
+    # REST plumbing \
+
+    @staticmethod
+    def _reply(result, ret_code: int = 0, ret_msg: str = "OK", ext_info: dict | None = None, headers=None):
+        body = {
+            "retCode": ret_code,
+            "retMsg": ret_msg,
+            "result": result,
+            "retExtInfo": ext_info or {},
+            "time": int(time.time() * 1000),
+        }
+        return web.Response(body=orjson.dumps(body), content_type="application/json", headers=headers)
+
+    def _endpoint(self, handler):
+        """
+        Wraps a REST handler with latency, rate limiting and error injection
+        """
+
+        async def wrapped(request: web.Request):
+            headers, rejection = await self._gate(request.path)
+
+            if rejection is not None:
+                return self._reply({}, *rejection, headers=headers)
+
+            if request.method == "POST":
+                params = orjson.loads(await request.read())
+            else:
+                params = dict(request.query)
+
+            result, ret_code, ret_msg, ext_info = handler(params)
+            return self._reply(result, ret_code, ret_msg, ext_info, headers)
+
+        return wrapped
+
+    async def _gate(self, path: str) -> tuple[dict, tuple | None]:
+        """
+        Latency, rate limiting and error injection shared by REST and the trade stream \n
+        Returns the X-Bapi-Limit* headers and a (retCode, retMsg) rejection or None
+        """
+        await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+
+        bucket = self.buckets.setdefault(path, TokenBucket(self.rate_limit))
+        allowed = bucket.take()
+        headers = {
+            "X-Bapi-Limit": str(int(self.rate_limit)),
+            "X-Bapi-Limit-Status": str(int(bucket.tokens)),
+            "X-Bapi-Limit-Reset-Timestamp": str(bucket.reset_ms()),
+        }
+
+        if not allowed:
+            return headers, (10006, "too many visit")
+
+        if random.random() < self.error_rate:
+            return headers, (10016, "Internal server error")
+
+        return headers, None
+
+    # Orders \
+
+    def _create(self, params: dict) -> dict:
+        market = self.market(params["symbol"])
+        order = market.create(
+            params["side"],
+            float(params.get("price", 0)),
+            float(params["qty"]),
+            params["orderType"],
+            params.get("orderLinkId", ""),
+        )
+        self.publish_private("order", [dict(order)])
+        return order
+
+    def create_order(self, params: dict):
+        order = self._create(params)
+        return {"orderId": order["orderId"], "orderLinkId": order["orderLinkId"]}, 0, "OK", None
+
+    def _amend(self, params: dict) -> dict | None:
+        market = self.market(params["symbol"])
+        price = float(params["price"]) if "price" in params else None
+        qty = float(params["qty"]) if "qty" in params else None
+        order = market.amend(params["orderId"], price, qty)
+
+        if order is not None:
+            self.publish_private("order", [dict(order)])
+
+        return order
+
+    def amend_order(self, params: dict):
+        if self._amend(params) is None:
+            return {}, 110001, "order not exists or too late to replace", None
+        return {"orderId": params["orderId"], "orderLinkId": ""}, 0, "OK", None
+
+    def _cancel(self, params: dict) -> dict | None:
+        order = self.market(params["symbol"]).cancel(params["orderId"])
+
+        if order is not None:
+            self.publish_private("order", [dict(order)])
+
+        return order
+
+    def cancel_order(self, params: dict):
+        if self._cancel(params) is None:
+            return {}, 110001, "order not exists or too late to cancel", None
+        return {"orderId": params["orderId"], "orderLinkId": ""}, 0, "OK", None
+
+    def cancel_all(self, params: dict):
+        cancelled = self.market(params["symbol"]).cancel_all()
+
+        if cancelled:
+            self.publish_private("order", cancelled)
+
+        return {"list": [{"orderId": o["orderId"], "orderLinkId": ""} for o in cancelled]}, 0, "OK", None
+
+    def _batch(self, params: dict, action):
+        results = []
+        codes = []
+
+        for request in params["request"]:
+            request.setdefault("symbol", params.get("symbol"))
+            order = action(request)
+
+            if order is None:
+                results.append({})
+                codes.append({"code": 110001, "msg": "order not exists or too late"})
+            else:
+                results.append({"orderId": order["orderId"], "orderLinkId": order.get("orderLinkId", "")})
+                codes.append({"code": 0, "msg": "OK"})
+
+        return {"list": results}, 0, "OK", {"list": codes}
+
+    def create_batch(self, params: dict):
+        return self._batch(params, self._create)
+
+    def amend_batch(self, params: dict):
+        return self._batch(params, self._amend)
+
+    def cancel_batch(self, params: dict):
+        return self._batch(params, self._cancel)
+
+    # Account / market queries \
+
+    def _list_markets(self, params: dict) -> list:
+        # Without a symbol Bybit lists every symbol of the settle coin, every simulated market here
+        if "symbol" in params:
+            return [self.market(params["symbol"])]
+        return list(self.markets.values())
+
+    def open_orders(self, params: dict):
+        orders = [order for market in self._list_markets(params) for order in market.orders.values()]
+        return {"category": "linear", "list": orders[: int(params.get("limit", 50))]}, 0, "OK", None
+
+    def position_list(self, params: dict):
+        positions = [position for market in self._list_markets(params) for position in market.position_data()]
+        return {"category": "linear", "list": positions}, 0, "OK", None
+
+    def klines(self, params: dict):
+        market = self.market(params["symbol"])
+        now = int(time.time() * 1000)
+        start = now - now % 60_000
+        candles = []
+
+        for i in range(int(params.get("limit", 200))):
+            price = str(market._round(market.mid))
+            candles.append([str(start - i * 60_000), price, price, price, price, "0", "0"])
+
+        return {"category": "linear", "symbol": market.symbol, "list": candles}, 0, "OK", None
+
+    def recent_trades(self, params: dict):
+        return {"category": "linear", "list": []}, 0, "OK", None
+
+    def server_time(self, params: dict):
+        now_ns = time.time_ns()
+        return {"timeSecond": str(now_ns // 1_000_000_000), "timeNano": str(now_ns)}, 0, "OK", None
+
+    # Websockets \
+
+    def publish_private(self, topic: str, data: list) -> None:
+        message = orjson.dumps({"topic": topic, "creationTime": int(time.time() * 1000), "data": data}).decode()
+
+        for ws, topics in list(self.private_sockets.items()):
+            if topic in topics and not ws.closed:
+                asyncio.ensure_future(ws.send_str(message))
+
+    def publish_public(self, topic: str, data, msg_type: str = "delta") -> None:
+        message = None
+
+        for ws, topics in list(self.public_sockets.items()):
+            if topic in topics and not ws.closed:
+                if message is None:
+                    message = orjson.dumps(
+                        {"topic": topic, "type": msg_type, "ts": int(time.time() * 1000), "data": data}
+                    ).decode()
+                asyncio.ensure_future(ws.send_str(message))
+
+    async def _serve_ws(self, request: web.Request, sockets: dict, private: bool):
+        ws = web.WebSocketResponse(heartbeat=20)
+        await ws.prepare(request)
+        sockets[ws] = set()
+
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+
+                req = orjson.loads(msg.data)
+                op = req.get("op")
+
+                if op == "ping":
+                    await ws.send_str(orjson.dumps({"success": True, "ret_msg": "pong", "op": "ping"}).decode())
+
+                elif op == "auth" and private:
+                    await ws.send_str(orjson.dumps({"success": True, "ret_msg": "", "op": "auth"}).decode())
+
+                elif op == "subscribe":
+                    sockets[ws].update(req["args"])
+                    await ws.send_str(orjson.dumps({"success": True, "ret_msg": "", "op": "subscribe"}).decode())
+
+                    if not private:
+                        for topic in req["args"]:
+                            await self._send_initial(ws, topic)
+
+                elif op == "unsubscribe":
+                    sockets[ws].difference_update(req["args"])
+                    await ws.send_str(orjson.dumps({"success": True, "ret_msg": "", "op": "unsubscribe"}).decode())
+
+        finally:
+            sockets.pop(ws, None)
+
+        return ws
+
+    async def _send_initial(self, ws, topic: str) -> None:
+        parts = topic.split(".")
+
+        if parts[0] == "orderbook":
+            market = self.market(parts[2])
+            message = {"topic": topic, "type": "snapshot", "ts": int(time.time() * 1000)}
+            message["data"] = market.book_snapshot(int(parts[1]))
+            await ws.send_str(orjson.dumps(message).decode())
+
+    async def public_ws(self, request: web.Request):
+        return await self._serve_ws(request, self.public_sockets, private=False)
+
+    async def private_ws(self, request: web.Request):
+        return await self._serve_ws(request, self.private_sockets, private=True)
+
+    async def _trade_request(self, ws, req: dict) -> None:
+        route = self.trade_ops.get(req["op"])
+        reply = {"reqId": req.get("reqId"), "op": req["op"], "retExtInfo": {}, "data": {}}
+
+        if route is None:
+            reply.update(retCode=10001, retMsg=f"Unsupported op {req['op']}", header={})
+        else:
+            # Shares the REST endpoint's bucket, like Bybit's per-UID limits
+            path, handler = route
+            headers, rejection = await self._gate(path)
+
+            if rejection is not None:
+                reply["retCode"], reply["retMsg"] = rejection
+            else:
+                result, ret_code, ret_msg, ext_info = handler(req["args"][0])
+                reply.update(retCode=ret_code, retMsg=ret_msg, data=result or {}, retExtInfo=ext_info or {})
+
+            headers["Timenow"] = str(int(time.time() * 1000))
+            reply["header"] = headers
+
+        if not ws.closed:
+            await ws.send_str(orjson.dumps(reply).decode())
+
+    async def trade_ws(self, request: web.Request):
+        """
+        /v5/trade order entry, requests are answered concurrently and matched back by reqId
+        """
+        ws = web.WebSocketResponse(heartbeat=20)
+        await ws.prepare(request)
+        self.trade_sockets.add(ws)
+
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+
+                req = orjson.loads(msg.data)
+                op = req.get("op")
+
+                if op == "ping":
+                    await ws.send_str(orjson.dumps({"op": "pong", "retCode": 0, "retMsg": "OK"}).decode())
+
+                elif op == "auth":
+                    await ws.send_str(orjson.dumps({"op": "auth", "retCode": 0, "retMsg": "OK"}).decode())
+
+                else:
+                    asyncio.ensure_future(self._trade_request(ws, req))
+
+        finally:
+            self.trade_sockets.discard(ws)
+
+        return ws
+
+    # Background loops \
+
+    def _subscribed_symbols(self) -> set:
+        symbols = set()
+        for topics in self.public_sockets.values():
+            symbols.update(topic.rsplit(".", 1)[-1] for topic in topics)
+        return symbols | set(self.markets)
+
+    async def market_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.update_interval)
+            now = int(time.time() * 1000)
+
+            for symbol in self._subscribed_symbols():
+                market = self.market(symbol)
+                delta, trades, order_updates, executions = market.step()
+
+                self.publish_public(f"orderbook.500.{symbol}", delta)
+                self.publish_public(f"orderbook.1.{symbol}", market.book_snapshot(1), "snapshot")
+                self.publish_public(f"publicTrade.{symbol}", trades, "snapshot")
+                self.publish_public(f"tickers.{symbol}", market.ticker(), "snapshot")
+                self.publish_public(f"kline.1.{symbol}", market.kline_data(now), "snapshot")
+
+                if order_updates:
+                    self.publish_private("order", order_updates)
+                    self.publish_private("execution", executions)
+                    self.publish_private("position", market.position_data())
+
+    async def disconnect_loop(self) -> None:
+        while self.disconnect_interval > 0:
+            await asyncio.sleep(self.disconnect_interval)
+
+            for ws in list(self.public_sockets) + list(self.private_sockets) + list(self.trade_sockets):
+                await ws.close()
+
+    async def _start_background(self, app: web.Application):
+        app["tasks"] = [
+            asyncio.create_task(self.market_loop(), name="SimMarket"),
+            asyncio.create_task(self.disconnect_loop(), name="SimDisconnect"),
+        ]
+
+    async def _stop_background(self, app: web.Application):
+        for task in app["tasks"]:
+            task.cancel()
+
+    def app(self) -> web.Application:
+        app = web.Application()
+
+        rest = {
+            "/v5/order/create": self.create_order,
+            "/v5/order/amend": self.amend_order,
+            "/v5/order/cancel": self.cancel_order,
+            "/v5/order/cancel-all": self.cancel_all,
+            "/v5/order/create-batch": self.create_batch,
+            "/v5/order/amend-batch": self.amend_batch,
+            "/v5/order/cancel-batch": self.cancel_batch,
+            "/unified/v3/private/order/create-batch": self.create_batch,
+            "/unified/v3/private/order/replace-batch": self.amend_batch,
+            "/unified/v3/private/order/cancel-batch": self.cancel_batch,
+        }
+
+        for path, handler in rest.items():
+            app.router.add_post(path, self._endpoint(handler))
+
+        app.router.add_get("/v5/order/realtime", self._endpoint(self.open_orders))
+        app.router.add_get("/v5/position/list", self._endpoint(self.position_list))
+        app.router.add_get("/v5/market/kline", self._endpoint(self.klines))
+        app.router.add_get("/v5/market/recent-trade", self._endpoint(self.recent_trades))
+        app.router.add_get("/v5/market/time", self._endpoint(self.server_time))
+
+        app.router.add_get("/v5/public/linear", self.public_ws)
+        app.router.add_get("/v5/public/spot", self.public_ws)
+        app.router.add_get("/v5/private", self.private_ws)
+        app.router.add_get("/v5/trade", self.trade_ws)
+
+        app.on_startup.append(self._start_background)
+        app.on_cleanup.append(self._stop_background)
+
+        return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Bybit v5 exchange simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every REST response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Max random seconds added on top of latency")
+    parser.add_argument("--rate-limit", type=float, default=10.0, help="Requests per second per endpoint")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--disconnect-interval", type=float, default=0.0, help="Seconds between forced ws drops")
+    args = parser.parse_args()
+
+    exchange = LocalExchange(
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limit=args.rate_limit,
+        error_rate=args.error_rate,
+        disconnect_interval=args.disconnect_interval,
+    )
+    web.run_app(exchange.app(), host=args.host, port=args.port)
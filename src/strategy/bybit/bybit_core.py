@@ -1,17 +1,28 @@
 import asyncio
 
+import numpy as np
+
+from src.exchanges.bybit.order.gateway import OrderGateway
+from src.marketstate import MarketFrame
 from src.sharedstate import SharedState
 from src.strategy.bybit.bybit_mm import MarketMaker
 from src.strategy.diff import Diff
 from src.strategy.ws_feeds.bybitmarketdata import BybitMarketData
 from src.strategy.ws_feeds.bybitprivatedata import BybitPrivateData
+from src.strategy.ws_feeds.ingestion import FeedIngestion
 from src.utils.jit_funcs import nabs
 
 
 class DataFeeds:
     def __init__(self, sharedstate: SharedState) -> None:
         self.ss = sharedstate
-        self.bybit_market_data = BybitMarketData(self.ss)
+
+        # Public data on this loop, or off it behind shared memory (see src/strategy/ws_feeds/ingestion.py)
+        if self.ss.feed_ingestion == "INLINE":
+            self.bybit_market_data = BybitMarketData(self.ss)
+        else:
+            self.bybit_market_data = FeedIngestion(self.ss)
+
         self.bybit_private_data = BybitPrivateData(self.ss)
 
     async def start_feeds(self) -> None:
@@ -27,6 +38,31 @@ class Strategy:
         self.ss = sharedstate
         self.market_maker = MarketMaker(self.ss)
         self.diff = Diff(self.ss)
+        self.features = 0.0
+
+    def inputs(self, snap: MarketFrame) -> tuple[np.ndarray, np.ndarray]:
+        """
+        What the quotes depend on, and how far each may move before a requote \n
+        The trade flow and book feature skew is kept for the tick's quotes, so it is computed once
+        """
+        ss = self.ss
+        self.features = self.market_maker.calculate_features.feature_skew()
+        inputs = np.array(
+            [
+                snap.bybit_bba[0, 0],
+                snap.bybit_bba[1, 0],
+                snap.bybit_weighted_mid_price,
+                snap.bybit_mark_price,
+                snap.volatility_value,
+                snap.inventory_delta,
+                self.features,
+            ]
+        )
+        price_tol = ss.requote_threshold * ss.bybit_tick_size
+        tolerance = np.array(
+            [price_tol, price_tol, price_tol, price_tol, ss.bybit_tick_size, 0.0, ss.requote_skew_threshold]
+        )
+        return inputs, tolerance
 
     async def logic(self):
         # Delay to let data feeds warm up
@@ -36,14 +72,31 @@ class Strategy:
         print("Starting strategy...")
 
         while True:
-            # Pause for 5ms to let data feeds update
-            await asyncio.sleep(0.005)
+            # Wait for a market/private update instead of polling
+            forced = await self.ss.requote.wait(self.ss.requote_debounce, self.ss.requote_heartbeat)
+
+            # Portfolio risk halt (see src/shard/supervisor.py), quotes stay pulled until it clears
+            # Orders a diff placed after the halt's cancel_all (or that came back) are pulled on the next wake-up
+            if self.ss.halted:
+                if len(self.ss.current_orders):
+                    await self.diff.order(self.ss).cancel_all()
+                continue
+
+            # One consistent set of inputs for the whole tick, handlers keep writing the live frame
+            snap = self.ss.market.snapshot()
+
+            if not self.ss.requote.moved(*self.inputs(snap), forced):
+                continue
 
             # Generate new orders
-            new_orders = self.market_maker.generate_orders()
+            new_orders = self.market_maker.generate_orders(snap, self.features)
+            self.ss.latency.quote()
 
             # Diff function will manage new order placements, if any
             await self.diff.diff(new_orders)
+            self.ss.latency.finish()
 
     async def run(self):
+        # Open and warm the order connection pool before any quotes go out
+        await OrderGateway.get(self.ss).start()
         await asyncio.gather(DataFeeds(self.ss).start_feeds(), self.logic())
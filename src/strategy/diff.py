@@ -1,131 +1,286 @@
 import asyncio
-from src.utils.jit_funcs import nabs
+
+import numpy as np
+from numba import njit
+
 from src.exchanges.bybit.order.core import Order
 from src.sharedstate import SharedState
 
 
+@njit(nogil=True)
+def _free(k: int, j: int, cur_qty, movable, new_qty, qty_tol, fixed: bool) -> bool:
+    """
+    True if live order k can stay as it is for level j (price already checked), fixed lets unmovable orders count
+    """
+    if movable[k]:
+        return abs(cur_qty[k] - new_qty[j]) <= qty_tol[j]
+    return fixed
+
+
+@njit(nogil=True)
+def _match_free(
+    cur_price, cur_qty, movable, new_price, new_qty, price_tol, qty_tol, lo, hi, owner, level, fixed: bool
+) -> None:
+    """
+    Grows the matching of levels to live orders they can keep untouched to a maximum one (augmenting paths) \n
+    A level takes its nearest free order straight away, it only searches further if every candidate is taken
+    """
+    m = new_price.shape[0]
+    queue = np.empty(m, np.int64)
+    from_level = np.empty(m, np.int64)
+    seen = np.zeros(cur_price.shape[0], np.int64)
+
+    for root in range(m):
+        if level[root] >= 0:
+            continue
+
+        # Direct: nearest free candidate nobody holds
+        best = -1
+        for k in range(lo[root], hi[root]):
+            if owner[k] < 0 and _free(k, root, cur_qty, movable, new_qty, qty_tol, fixed):
+                if best < 0 or abs(cur_price[k] - new_price[root]) < abs(cur_price[best] - new_price[root]):
+                    best = k
+
+        if best >= 0:
+            owner[best] = root
+            level[root] = best
+            continue
+
+        # Otherwise, a level holding a candidate may move on to another order it can keep
+        head = 0
+        tail = 1
+        queue[0] = root
+        stamp = root + 1
+        found = -1
+        at = -1
+
+        while head < tail and found < 0:
+            u = queue[head]
+            head += 1
+
+            for k in range(lo[u], hi[u]):
+                if seen[k] == stamp or not _free(k, u, cur_qty, movable, new_qty, qty_tol, fixed):
+                    continue
+                seen[k] = stamp
+
+                if owner[k] < 0:
+                    found = k
+                    at = u
+                    break
+
+                from_level[owner[k]] = u
+                queue[tail] = owner[k]
+                tail += 1
+
+        # Each level along the path takes the order the next one gives up
+        k = found
+        u = at
+        while k >= 0:
+            released = level[u]
+            owner[k] = u
+            level[u] = k
+            if u == root:
+                break
+            k = released
+            u = from_level[u]
+
+
+@njit(nogil=True)
+def match_side(
+    cur_price: np.ndarray,
+    cur_qty: np.ndarray,
+    movable: np.ndarray,
+    new_price: np.ndarray,
+    new_qty: np.ndarray,
+    price_tol: np.ndarray,
+    qty_tol: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Matches one side's live orders to the desired ladder with the fewest requests
+
+    _______________________________________________________________
+
+    -> Prices/sizes are int64 ticks/lots, prices ascending away from the touch (negate bids) \n
+    -> Tolerances are per desired level, in ticks/lots \n
+    -> Every request is one amend, cancel or create, so the fewest come from the most levels keeping a live order
+       untouched (within both tolerances): a maximum matching, movable orders first \n
+    -> Orders that are not movable (no orderId yet) are then kept by levels within their price tolerance, and
+       otherwise left alone \n
+    -> Levels left over are amended onto the nearest leftover movable order within their price tolerance, the rest
+       are paired in rank order, anything still left is cancelled/created \n
+    -> Returns (amend_cur, amend_new, cancel_cur, create_new) indices
+    """
+    n = cur_price.shape[0]
+    m = new_price.shape[0]
+
+    # Live orders within each level's price tolerance, a slice of the sorted ladder
+    lo = np.searchsorted(cur_price, new_price - price_tol, "left")
+    hi = np.searchsorted(cur_price, new_price + price_tol, "right")
+
+    owner = np.full(n, -1, np.int64)
+    level = np.full(m, -1, np.int64)
+
+    _match_free(cur_price, cur_qty, movable, new_price, new_qty, price_tol, qty_tol, lo, hi, owner, level, False)
+    _match_free(cur_price, cur_qty, movable, new_price, new_qty, price_tol, qty_tol, lo, hi, owner, level, True)
+
+    amend_cur = np.empty(n, np.int64)
+    amend_new = np.empty(n, np.int64)
+    n_amends = 0
+
+    # Qty amends in place, a level nobody could keep untouched takes the nearest leftover order it is on price with
+    for j in range(m):
+        if level[j] >= 0:
+            continue
+
+        best = -1
+        for k in range(lo[j], hi[j]):
+            if owner[k] < 0 and movable[k]:
+                if best < 0 or abs(cur_price[k] - new_price[j]) < abs(cur_price[best] - new_price[j]):
+                    best = k
+
+        if best >= 0:
+            owner[best] = j
+            level[j] = best
+            amend_cur[n_amends] = best
+            amend_new[n_amends] = j
+            n_amends += 1
+
+    # Leftovers are paired in rank order
+    cancel_cur = np.empty(n, np.int64)
+    create_new = np.empty(m, np.int64)
+    n_cancels = 0
+    n_creates = 0
+    j = 0
+
+    for i in range(n):
+        if owner[i] >= 0 or not movable[i]:
+            continue
+
+        while j < m and level[j] >= 0:
+            j += 1
+
+        if j < m:
+            amend_cur[n_amends] = i
+            amend_new[n_amends] = j
+            n_amends += 1
+            j += 1
+        else:
+            cancel_cur[n_cancels] = i
+            n_cancels += 1
+
+    for j in range(j, m):
+        if level[j] < 0:
+            create_new[n_creates] = j
+            n_creates += 1
+
+    return amend_cur[:n_amends], amend_new[:n_amends], cancel_cur[:n_cancels], create_new[:n_creates]
+
+
 class Diff:
-    def __init__(self, sharedstate: SharedState) -> None:
+    # Current orders are read straight from the OrderStore (ss.current_orders), which keeps each side price-sorted
+    # Desired and live ladders are matched per side with match_side, only the difference is sent
+
+    CLOSE_SLOTS = 2  # Levels per side treated as close to the BBA, these must sit exactly on their price
+    ANY_QTY = np.iinfo(np.int64).max  # Qty tolerance of the outer levels, their size is left alone
+
+    def __init__(self, sharedstate: SharedState, order=Order) -> None:
         self.ss = sharedstate
+        self.order = order  # Order, or any class with the same interface (e.g. the backtest's simulated exchange)
 
-    def segregate_orders(self, orders: dict):
-        """Segregate orders based on their side and sort them by price."""
-        buys = []
-        sells = []
-
-        for orderId, details in orders.items():
-            if details["side"] == "Buy":
-                buys.append((orderId, [details["side"], details["price"], details["qty"]]))
-            else:
-                sells.append((orderId, [details["side"], details["price"], details["qty"]]))
-
-        buys.sort(key=lambda x: x[1][1], reverse=True)
-        sells.sort(key=lambda x: x[1][1])
-
-        return buys, sells
-
-    def current_close_to_bba(self):
-        buys, sells = self.segregate_orders(self.ss.current_orders)
-        return buys[:2], sells[:2]
-
-    def current_far_from_bba(self, close_bids, close_asks):
-        close_orders_ids = {order[0] for order in close_bids + close_asks}
-        far_orders = {
-            orderId: info for orderId, info in self.ss.current_orders.items() if orderId not in close_orders_ids
-        }
-        return self.segregate_orders(far_orders)
-
-    def current_all(self):
-        cb, ca = self.current_close_to_bba()
-        fb, fa = self.current_far_from_bba(cb, ca)
-        return cb + ca + fb + fa
-
-    def new_close_to_bba(self, new_orders):
-        return new_orders[:2], new_orders[2:4]
-
-    async def amend_orders(self, old_orders, new_orders):
-        tasks = [
-            asyncio.create_task(Order(self.ss).amend((old[0], new[1], new[2])))
-            for old, new in zip(old_orders, new_orders)
-            if old[1][1] != new[1]
-        ]
-        await asyncio.gather(*tasks)
+        # Requests sent vs what cancelling and resubmitting every changed ladder would have cost
+        self.requests_sent = 0
+        self.requests_saved = 0
+
+        self._tolerances = {}
 
-    async def diff(self, new_orders: list) -> bool:
+    def tolerances(self, m: int) -> tuple[np.ndarray, np.ndarray]:
         """
-        This function checks new orders vs current orders
+        Per level (price, qty) tolerances in ticks/lots, close levels exact, outer levels within the buffer \n
+        Cached per ladder length and settings, the parameters only change on a refresh
+        """
+        key = (m, self.ss.buffer, self.ss.bybit_tick_size)
+        tolerances = self._tolerances.get(key)
+
+        if tolerances is None:
+            price_tol = np.full(m, self.ss.bybit_ticks.to_step(self.ss.buffer), np.int64)
+            qty_tol = np.full(m, self.ANY_QTY, np.int64)
+
+            close = min(self.CLOSE_SLOTS, m)
+            price_tol[:close] = 0
+            qty_tol[:close] = 0
 
-        Checks performed:
+            tolerances = (price_tol, qty_tol)
+            self._tolerances[key] = tolerances
 
-        - No current orders
-            -> Send all orders as batch
+        return tolerances
 
-        - Number of new orders and current are not same
-            -> Cancel all and send all as batch
+    def diff_side(self, current: list, new_orders: list, sign: int) -> tuple[list, list, list]:
+        n = len(current)
+        m = len(new_orders)
 
-        - All are bids/asks and have changed (extreme scenario)
-            -> Cancel all and send all as batch
+        cur_price = np.fromiter((o.price for o in current), np.int64, n) * sign
+        cur_qty = np.fromiter((o.qty for o in current), np.int64, n)
+        movable = np.fromiter((bool(o.orderId) for o in current), np.bool_, n)
+        new_price = np.fromiter((o[1] for o in new_orders), np.int64, m) * sign
+        new_qty = np.fromiter((o[2] for o in new_orders), np.int64, m)
 
-        - 4 close to BBA orders have changed
-            -> Amend changed orders to new price/qty
+        price_tol, qty_tol = self.tolerances(m)
+        amend_cur, amend_new, cancel_cur, create_new = match_side(
+            cur_price, cur_qty, movable, new_price, new_qty, price_tol, qty_tol
+        )
 
-        - Number of bids/asks have changed for outer orders
-            -> Cancel batch and send batch
+        amends = [(current[i].orderId, new_orders[j][1], new_orders[j][2]) for i, j in zip(amend_cur, amend_new)]
+        cancels = [current[i].orderId for i in cancel_cur]
+        creates = [new_orders[j] for j in create_new]
 
-        - Rest outer orders have changed more than buffer
-            -> Cancel changed and send changed as batch
+        return amends, cancels, creates
+
+    def plan(self, new_orders: list) -> tuple[list, list, list]:
+        """
+        Smallest (amends, cancels, creates) taking the live ladder to new_orders
         """
+        store = self.ss.current_orders
 
-        if not self.ss.current_orders:
-            await Order(self.ss).submit_batch(new_orders)
-            return
+        # Each side is listed best first, but the market makers may interleave the two sides
+        new_bids = [order for order in new_orders if order[0] == "Buy"]
+        new_asks = [order for order in new_orders if order[0] != "Buy"]
 
-        # Sorting and segregating orders
-        new_best_bids, new_best_asks = self.new_close_to_bba(new_orders)
-        new_outer_bids, new_outer_asks = self.new_far_from_bba(new_orders)
-        new_all_orders = new_best_bids + new_best_asks + new_outer_bids + new_outer_asks
-
-        current_best_bids, current_best_asks = self.current_close_to_bba()
-        current_outer_bids, current_outer_asks = self.current_far_from_bba(current_best_bids, current_best_asks)
-        current_all_orders = current_best_bids + current_best_asks + current_outer_bids + current_outer_asks
-        current_outer_orders = current_outer_bids + current_outer_asks
-
-        # Perform checks
-        # Second check (reordered for optimization purposes)
-        if len(self.ss.current_orders) < len(new_orders):
-            await Order(self.ss).cancel_all()
-            await Order(self.ss).submit_batch(new_orders)
-            return
+        bid_amends, bid_cancels, bid_creates = self.diff_side(store.bids, new_bids, -1)
+        ask_amends, ask_cancels, ask_creates = self.diff_side(store.asks, new_asks, 1)
 
-        # Third check
-        if len(current_outer_bids) == len(current_outer_orders) or len(current_outer_asks) == len(
-            current_outer_orders
-        ):
-            if new_all_orders != current_all_orders:
-                await Order(self.ss).cancel_all()
-                await Order(self.ss).submit_batch(new_orders)
-            return
+        return bid_amends + ask_amends, bid_cancels + ask_cancels, bid_creates + ask_creates
+
+    async def diff(self, new_orders: list) -> None:
+        """
+        Sends only the amends, cancels and creates needed to turn the live ladder into new_orders
+
+        Matching, per side:
+
+        - Live orders already within tolerance of a desired level are kept
+            -> Close to BBA levels: exactly on price and size (int ticks/lots, no float tolerance needed)
+            -> Outer levels: within the buffer, size is left alone
 
-        # Fourth check
-        if new_best_bids and new_best_asks:
-            await self.amend_orders(current_best_bids, new_best_bids)
-            await self.amend_orders(current_best_asks, new_best_asks)
+        - Leftover live orders are amended onto leftover levels
 
-        # Fifth check
-        if len(current_outer_bids) != len(new_outer_bids) or len(current_outer_asks) != len(new_outer_asks):
-            current_outer_orders_ids = [order[0] for order in current_outer_orders]
-            await Order(self.ss).cancel_batch(current_outer_orders_ids)
-            await Order(self.ss).submit_batch(new_outer_bids + new_outer_asks)
+        - Anything still left over is cancelled (extra orders) or created (missing levels)
+        """
+        amends, cancels, creates = self.plan(new_orders)
+        sent = len(amends) + len(cancels) + len(creates)
+
+        if not sent:
             return
 
-        # Sixth check
-        amend_batches = []
+        self.requests_sent += sent
+        self.requests_saved += len(self.ss.current_orders) + len(new_orders) - sent
 
-        for current, new in zip(current_outer_bids + current_outer_asks, new_outer_bids + new_outer_asks):
-            if nabs(current[1][1] - new[1][1]) > self.ss.buffer:
-                amend_batches.append((current[0], new[1][1], new[1][2]))
+        order = self.order(self.ss)
+        tasks = []
 
-        if amend_batches:
-            await Order(self.ss).amend_batch(amend_batches)
+        if cancels:
+            tasks.append(order.cancel_batch(cancels))
+        if amends:
+            tasks.append(order.amend_batch(amends))
+        if creates:
+            tasks.append(order.submit_batch(creates))
 
-        return
+        await asyncio.gather(*tasks)
@@ -0,0 +1,175 @@
+import math
+import time
+
+import numpy as np
+from numba import njit
+
+from src.exchanges.common.localorderbook import BaseOrderBook
+
+
+@njit(nogil=True)
+def book_vector(
+    bids: np.ndarray,
+    bid_count: int,
+    bid_cum_qty: np.ndarray,
+    bid_cum_notional: np.ndarray,
+    asks: np.ndarray,
+    ask_count: int,
+    ask_cum_qty: np.ndarray,
+    ask_cum_notional: np.ndarray,
+    depths: np.ndarray,
+    levels: int,
+    out: np.ndarray,
+) -> None:
+    """
+    Writes [imbalance per depth..., depth-weighted microprice, slope] of one book into out
+
+    _______________________________________________________________
+
+    -> Imbalance: (bid - ask) / (bid + ask) qty over the best {depth} levels, in [-1, 1] \n
+    -> Microprice: VWAPs of the best {levels} per side, weighted by the opposite side's qty, as log(micro / mid) * 100 \n
+    -> Slope: log(bid / ask) of qty per relative price distance over the best {levels}, > 0 when bids are steeper \n
+    -> Reads the running cum qty/notional the book keeps per delta, so the cost is O(len(depths))
+    """
+    out[:] = 0.0
+
+    if bid_count == 0 or ask_count == 0:
+        return
+
+    n = depths.shape[0]
+
+    for i in range(n):
+        bq = bid_cum_qty[min(depths[i], bid_count) - 1]
+        aq = ask_cum_qty[min(depths[i], ask_count) - 1]
+        out[i] = (bq - aq) / (bq + aq) if bq + aq > 0 else 0.0
+
+    kb = min(levels, bid_count) - 1
+    ka = min(levels, ask_count) - 1
+    bq = bid_cum_qty[kb]
+    aq = ask_cum_qty[ka]
+
+    if bq <= 0 or aq <= 0:
+        return
+
+    best_bid = bids[0, 0]
+    best_ask = asks[0, 0]
+    mid = (best_bid + best_ask) / 2
+
+    bid_vwap = bid_cum_notional[kb] / bq
+    ask_vwap = ask_cum_notional[ka] / aq
+    micro = (ask_vwap * bq + bid_vwap * aq) / (bq + aq)
+    out[n] = np.log(micro / mid) * 100
+
+    # A single level has no distance yet, count it as one basis point
+    bid_dist = max((best_bid - bids[kb, 0]) / mid, 1e-4)
+    ask_dist = max((asks[ka, 0] - best_ask) / mid, 1e-4)
+    out[n + 1] = np.log((bq / bid_dist) / (aq / ask_dist))
+
+
+class BookFeatures:
+    """
+    Order book feature vector for the skew model, read from the local books the feeds keep up to date
+
+    _______________________________________________________________
+
+    -> imbalance_{depth} for every depth, microprice and slope (see book_vector) \n
+    -> depletion: (ask - bid) / (ask + bid) of the qty rate leaving each touch (the books count it per delta),
+       smoothed with a {depletion_halflife}s EWMA, > 0 when asks are being taken faster \n
+    -> basis: log(other mid / book mid) * 100, the other venue's premium over this book, 0 while either is empty \n
+    -> skew(weights) is the dot product with a {name: weight} dict, missing names weigh 0
+    """
+
+    def __init__(
+        self,
+        book: BaseOrderBook,
+        other_book: BaseOrderBook = None,
+        depths: list = (1, 5, 20),
+        levels: int = 20,
+        depletion_halflife: float = 1.0,
+        clock=time.monotonic,
+    ) -> None:
+        self.book = book
+        self.other_book = other_book
+        self.depths = np.array(depths, dtype=np.int64)
+        self.levels = levels
+        self.depletion_halflife = depletion_halflife
+        self.clock = clock  # Seconds, compute() ages the depletion rates by it unless given a time
+
+        self.names = [f"imbalance_{d}" for d in depths] + ["microprice", "slope", "depletion", "basis"]
+        self.values = np.zeros(len(self.names), dtype=np.float64)
+        self._book_values = self.values[: len(depths) + 2]
+
+        self._weights_key = None
+        self._weights = np.zeros(len(self.names), dtype=np.float64)
+
+        # Depletion rates (qty/s)
+        self._last_time = None
+        self._last_depleted = (0.0, 0.0)
+        self.bid_depletion = 0.0
+        self.ask_depletion = 0.0
+
+    def _update_depletion(self, now: float) -> float:
+        book = self.book
+        depleted = (book.bid_depleted, book.ask_depleted)
+
+        if self._last_time is not None and now > self._last_time:
+            dt = now - self._last_time
+            decay = math.exp(-dt * math.log(2) / self.depletion_halflife)
+            bid_rate = (depleted[0] - self._last_depleted[0]) / dt
+            ask_rate = (depleted[1] - self._last_depleted[1]) / dt
+            self.bid_depletion = decay * self.bid_depletion + (1 - decay) * bid_rate
+            self.ask_depletion = decay * self.ask_depletion + (1 - decay) * ask_rate
+
+        self._last_time = now
+        self._last_depleted = depleted
+
+        total = self.bid_depletion + self.ask_depletion
+        return (self.ask_depletion - self.bid_depletion) / total if total > 0 else 0.0
+
+    def _basis(self) -> float:
+        other = self.other_book
+
+        if other is None or not other.mid_price or not self.book.mid_price:
+            return 0.0
+
+        return math.log(other.mid_price / self.book.mid_price) * 100
+
+    def compute(self, now: float = None) -> np.ndarray:
+        bids, bid_count, bid_cum_qty, bid_cum_notional = self.book.side_state(True)
+        asks, ask_count, ask_cum_qty, ask_cum_notional = self.book.side_state(False)
+
+        book_vector(
+            bids,
+            bid_count,
+            bid_cum_qty,
+            bid_cum_notional,
+            asks,
+            ask_count,
+            ask_cum_qty,
+            ask_cum_notional,
+            self.depths,
+            self.levels,
+            self._book_values,
+        )
+
+        self.values[-2] = self._update_depletion(self.clock() if now is None else now)
+        self.values[-1] = self._basis()
+        return self.values
+
+    def weights(self, weights: dict) -> np.ndarray:
+        """
+        Weight vector in feature order, rebuilt only when the settings dict changes
+        """
+        key = tuple(sorted(weights.items()))
+
+        if key != self._weights_key:
+            self._weights[:] = [float(weights.get(name, 0.0)) for name in self.names]
+            self._weights_key = key
+
+        return self._weights
+
+    def skew(self, weights: dict) -> float:
+        return float(self.compute() @ self.weights(weights))
+
+    def features(self) -> dict:
+        return dict(zip(self.names, self.values.tolist()))
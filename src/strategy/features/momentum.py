@@ -2,20 +2,20 @@ import numpy as np
 from numba import njit
 from src.indicators.ema import ema
 
+# Lags (in klines) the trend EMA is sampled at, the longest is also its window
+TREND_LENGTHS = np.array([10, 25, 50, 100, 200])
+
 
 @njit
-def trend_feature(closes, lengths):
+def trend_from_lags(curr_price, ema_values):
     """
-    Make sure lengths are fed in from longest to shortest
+    Weighted log distance of the price from an EMA sampled at several lags, in the order of the lengths
     """
-    curr_price = closes[-1]
-    n = len(lengths)
+    n = len(ema_values)
     vals = np.empty(n, dtype=np.float64)
 
-    all_ema = ema(closes, max(lengths))
-
     for i in range(n):
-        ema_val = all_ema[-lengths[i]]
+        ema_val = ema_values[i]
 
         # Safety check
         if ema_val == 0:
@@ -28,3 +28,27 @@ def trend_feature(closes, lengths):
     trend_val = np.sum(vals * weights) / np.sum(weights)
 
     return trend_val
+
+
+@njit
+def trend_feature(closes, lengths):
+    """
+    Make sure lengths are fed in from longest to shortest
+    """
+    curr_price = closes[-1]
+    n = len(lengths)
+    ema_values = np.empty(n, dtype=np.float64)
+
+    all_ema = ema(closes, max(lengths))
+
+    for i in range(n):
+        ema_values[i] = all_ema[-lengths[i]]
+
+    return trend_from_lags(curr_price, ema_values)
+
+
+def streaming_trend_feature(ema_state, lengths):
+    """
+    trend_feature over an EmaState fed with every close, O(len(lengths)) per call
+    """
+    return trend_from_lags(ema_state.last, ema_state.at_lags(lengths))
@@ -0,0 +1,263 @@
+import numpy as np
+from numba import njit
+
+# Rows of the window ring
+T_TIME = 0
+T_SIGNED = 1
+T_QTY = 2
+T_NOTIONAL = 3
+T_LARGE = 4
+
+# Window sums
+S_SIGNED = 0
+S_VOLUME = 1
+S_NOTIONAL = 2
+S_COUNT = 3
+S_LARGE = 4
+
+# VPIN state
+V_BUY = 0
+V_SELL = 1
+V_FILLED = 2
+V_POS = 3
+V_SUM = 4
+
+# Large trade state
+L_EWMA = 0
+L_SEEN = 1
+L_LAST_TIME = 2
+L_LAST_SIGNED = 3
+
+
+@njit(nogil=True)
+def flow_expire(ring: np.ndarray, idx: np.ndarray, sums: np.ndarray, cutoff_ms: float) -> None:
+    """
+    Drops trades older than the cutoff from the window ring and its sums (and the oldest one if the ring is full)
+    """
+    capacity = ring.shape[1]
+    head = idx[0]
+    tail = idx[1]
+
+    while tail < head and (ring[T_TIME, tail % capacity] < cutoff_ms or head - tail >= capacity):
+        j = tail % capacity
+        sums[S_SIGNED] -= ring[T_SIGNED, j]
+        sums[S_VOLUME] -= ring[T_QTY, j]
+        sums[S_NOTIONAL] -= ring[T_NOTIONAL, j]
+        sums[S_COUNT] -= 1
+        sums[S_LARGE] -= ring[T_LARGE, j]
+        tail += 1
+
+    # An empty window restarts from exact zeros, float error can't outlive the trades it came from
+    if tail == head:
+        sums[:] = 0.0
+
+    idx[1] = tail
+
+
+@njit(nogil=True)
+def flow_update(
+    ring: np.ndarray,
+    idx: np.ndarray,
+    sums: np.ndarray,
+    buckets: np.ndarray,
+    vpin: np.ndarray,
+    large: np.ndarray,
+    window_ms: float,
+    bucket_volume: float,
+    large_alpha: float,
+    large_multiple: float,
+    time_ms: float,
+    side: float,
+    price: float,
+    qty: float,
+) -> None:
+    """
+    Folds one trade into every trade-flow feature, nothing is allocated
+
+    _______________________________________________________________
+
+    -> ring holds the trades inside the time window, sums their signed qty / qty / notional / count / large signed qty,
+       trades older than {window_ms} are evicted from the tail (a full ring evicts early) \n
+    -> VPIN: volume is cut into buckets of {bucket_volume}, each closed bucket's |buy - sell| / volume is kept for
+       the last len(buckets) buckets (a trade spanning buckets is split) \n
+    -> A trade is large if its qty exceeds {large_multiple} x the EWMA trade size (seen before it)
+    """
+    capacity = ring.shape[1]
+    signed = side * qty
+
+    # Large trade, judged against the sizes before this one
+    is_large = large[L_SEEN] >= 1.0 / large_alpha and qty > large_multiple * large[L_EWMA]
+    large[L_EWMA] = qty if large[L_SEEN] == 0 else large_alpha * qty + (1 - large_alpha) * large[L_EWMA]
+    large[L_SEEN] += 1
+    if is_large:
+        large[L_LAST_TIME] = time_ms
+        large[L_LAST_SIGNED] = signed
+
+    flow_expire(ring, idx, sums, time_ms - window_ms)
+
+    head = idx[0]
+    j = head % capacity
+    ring[T_TIME, j] = time_ms
+    ring[T_SIGNED, j] = signed
+    ring[T_QTY, j] = qty
+    ring[T_NOTIONAL, j] = price * qty
+    ring[T_LARGE, j] = signed if is_large else 0.0
+
+    sums[S_SIGNED] += signed
+    sums[S_VOLUME] += qty
+    sums[S_NOTIONAL] += price * qty
+    sums[S_COUNT] += 1
+    sums[S_LARGE] += ring[T_LARGE, j]
+
+    idx[0] = head + 1
+
+    # Volume buckets
+    if bucket_volume <= 0:
+        return
+
+    n_buckets = buckets.shape[0]
+    remaining = qty
+
+    while remaining > 0:
+        room = bucket_volume - vpin[V_BUY] - vpin[V_SELL]
+        fill = min(room, remaining)
+
+        if side > 0:
+            vpin[V_BUY] += fill
+        else:
+            vpin[V_SELL] += fill
+        remaining -= fill
+
+        # Closed within float error of the bucket size, so a tiny leftover can't spin this loop
+        if vpin[V_BUY] + vpin[V_SELL] >= bucket_volume * (1 - 1e-9):
+            k = int(vpin[V_POS]) % n_buckets
+            imbalance = abs(vpin[V_BUY] - vpin[V_SELL]) / bucket_volume
+
+            if vpin[V_FILLED] >= n_buckets:
+                vpin[V_SUM] -= buckets[k]
+            else:
+                vpin[V_FILLED] += 1
+
+            buckets[k] = imbalance
+            vpin[V_SUM] += imbalance
+            vpin[V_POS] = k + 1
+            vpin[V_BUY] = 0.0
+            vpin[V_SELL] = 0.0
+
+
+class TradeFlow:
+    """
+    Streaming trade-flow features of one venue, updated per trade in preallocated state
+
+    _______________________________________________________________
+
+    -> Time windowed ({window}s): signed volume, volume, VWAP, arrival rate (trades/s), flow imbalance and the
+       signed volume of large trades \n
+    -> VPIN style toxicity over the last {buckets} volume buckets of {bucket_volume} (0 = off) \n
+    -> Large trades are {large_multiple}x the EWMA trade size (span {size_span} trades) \n
+    -> Every read is O(1), the window sums are kept up to date as trades arrive, expire() also ages them out while
+       no trades arrive
+    """
+
+    def __init__(
+        self,
+        window: float = 5.0,
+        bucket_volume: float = 0.0,
+        buckets: int = 50,
+        large_multiple: float = 5.0,
+        size_span: int = 500,
+        capacity: int = 10_000,
+    ) -> None:
+        self.window = window
+        self.bucket_volume = bucket_volume
+        self.large_multiple = large_multiple
+        self.large_alpha = 2 / float(size_span + 1)
+
+        self._ring = np.zeros((5, capacity), dtype=np.float64)
+        self._idx = np.zeros(2, dtype=np.int64)
+        self._sums = np.zeros(5, dtype=np.float64)
+        self._buckets = np.zeros(max(buckets, 1), dtype=np.float64)
+        self._vpin = np.zeros(5, dtype=np.float64)
+        self._large = np.zeros(4, dtype=np.float64)
+
+        self.last_time = 0.0
+
+    def on_trade(self, time_ms: float, side: float, price: float, qty: float) -> None:
+        """
+        side: +1 taker buy, -1 taker sell
+        """
+        self.last_time = time_ms
+
+        flow_update(
+            self._ring,
+            self._idx,
+            self._sums,
+            self._buckets,
+            self._vpin,
+            self._large,
+            self.window * 1000,
+            self.bucket_volume,
+            self.large_alpha,
+            self.large_multiple,
+            time_ms,
+            side,
+            price,
+            qty,
+        )
+
+    def expire(self, now_ms: float) -> None:
+        flow_expire(self._ring, self._idx, self._sums, now_ms - self.window * 1000)
+
+    @property
+    def signed_volume(self) -> float:
+        return float(self._sums[S_SIGNED])
+
+    @property
+    def volume(self) -> float:
+        return float(self._sums[S_VOLUME])
+
+    @property
+    def trade_count(self) -> int:
+        return int(self._sums[S_COUNT])
+
+    @property
+    def vwap(self) -> float:
+        return float(self._sums[S_NOTIONAL] / self._sums[S_VOLUME]) if self._sums[S_VOLUME] > 0 else 0.0
+
+    @property
+    def arrival_rate(self) -> float:
+        return float(self._sums[S_COUNT]) / self.window
+
+    @property
+    def imbalance(self) -> float:
+        """
+        Signed / total volume over the window, in [-1, 1]
+        """
+        return float(self._sums[S_SIGNED] / self._sums[S_VOLUME]) if self._sums[S_VOLUME] > 0 else 0.0
+
+    @property
+    def large_signed_volume(self) -> float:
+        return float(self._sums[S_LARGE])
+
+    @property
+    def last_large(self) -> tuple[float, float]:
+        """
+        (time ms, signed qty) of the latest large trade
+        """
+        return float(self._large[L_LAST_TIME]), float(self._large[L_LAST_SIGNED])
+
+    @property
+    def vpin(self) -> float:
+        filled = self._vpin[V_FILLED]
+        return float(self._vpin[V_SUM] / filled) if filled else 0.0
+
+    def features(self) -> dict:
+        return {
+            "signed_volume": self.signed_volume,
+            "volume": self.volume,
+            "vwap": self.vwap,
+            "arrival_rate": self.arrival_rate,
+            "imbalance": self.imbalance,
+            "large_signed_volume": self.large_signed_volume,
+            "vpin": self.vpin,
+        }
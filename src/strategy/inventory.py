@@ -7,13 +7,19 @@ class Inventory:
 
     def calculate_delta(self, data) -> None:
         """
-        Calculates the current position delta relative to account size
+        Sets the current position delta relative to account size \n
+        data is the full position of the symbol (empty if flat), each update replaces the delta
         """
 
         acc_size = self.ss.account_size
         val = 0
 
-        for position_data in data:
+        # The private stream reports every symbol's positions, a message about others leaves ours as it is
+        positions = [p for p in data if p.get("symbol", self.ss.bybit_symbol) == self.ss.bybit_symbol]
+        if data and not positions:
+            return
+
+        for position_data in positions:
             side = position_data["side"]
 
             if not side:
@@ -26,4 +32,4 @@ class Inventory:
             elif side == "Sell":
                 val -= value
 
-        self.ss.inventory_delta += val / acc_size
+        self.ss.inventory_delta = val / acc_size
@@ -0,0 +1,74 @@
+import asyncio
+
+from src.exchanges.bybit.order.gateway import OrderGateway
+from src.sharedstate import SharedState
+from src.strategy.binance.binance_core import Strategy as BinanceStrategy
+from src.strategy.bybit.bybit_core import Strategy as BybitStrategy
+from src.strategy.ws_feeds.multimarketdata import BinanceMultiMarketData, BybitMultiMarketData
+from src.strategy.ws_feeds.multiprivatedata import BybitMultiPrivateData
+
+
+def instrument_states(sharedstate: SharedState) -> list[SharedState]:
+    """
+    One SharedState per entry of {instruments}, sharing the process' latency tracer
+    """
+    states = []
+
+    for overrides in sharedstate.instruments:
+        ss = SharedState(overrides)
+        ss.latency = sharedstate.latency
+        states.append(ss)
+
+    return states
+
+
+def instrument_strategies(states: list[SharedState]) -> list:
+    """
+    Each instrument's strategy loop, Binance or Bybit led by its {primary_data_feed}
+    """
+    return [BinanceStrategy(ss) if ss.primary_data_feed == "BINANCE" else BybitStrategy(ss) for ss in states]
+
+
+class Strategy:
+    """
+    Quotes every configured instrument from one process
+
+    _______________________________________________________________
+
+    -> Each instrument runs its own Bybit/Binance strategy loop on its own state, books and requote trigger \n
+    -> Public data comes from one websocket per venue (Binance only for BINANCE led instruments), private data from
+       one private websocket \n
+    -> Orders of all instruments go through the one OrderGateway of the API key, so connection pools and the
+       scheduler's rate limit buckets are shared \n
+    -> Parameters are reloaded for every instrument from one read of parameters.yaml
+    """
+
+    def __init__(self, sharedstate: SharedState) -> None:
+        self.ss = sharedstate
+        self.states = instrument_states(sharedstate)
+
+        self.strategies = instrument_strategies(self.states)
+
+        self.bybit_market_data = BybitMultiMarketData(self.states)
+        self.bybit_private_data = BybitMultiPrivateData(self.states)
+
+        binance_states = [ss for ss in self.states if ss.primary_data_feed == "BINANCE"]
+        self.binance_market_data = BinanceMultiMarketData(binance_states) if binance_states else None
+
+    async def start_feeds(self) -> None:
+        feeds = [self.bybit_market_data.start_feed(), self.bybit_private_data.start_feed()]
+
+        if self.binance_market_data is not None:
+            feeds.append(self.binance_market_data.start_feed())
+
+        await asyncio.gather(*feeds)
+
+    async def run(self):
+        # One gateway for every instrument, opened and warmed before any quotes go out
+        await OrderGateway.get(self.ss).start()
+
+        await asyncio.gather(
+            self.ss.refresh_parameters(self.states),
+            self.start_feeds(),
+            *[strategy.logic() for strategy in self.strategies],
+        )
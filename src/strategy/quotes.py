@@ -0,0 +1,314 @@
+import numpy as np
+from numba import njit
+
+from src.utils.rounding import STEP_EPS
+
+
+@njit(nogil=True)
+def split_skew(skew: float, inventory_delta: float, inventory_extreme: float) -> tuple[float, float]:
+    """
+    Splits the feature skew into (bid, ask) skews in [0, 1], leaning against the inventory
+
+    _______________________________________________________________
+
+    -> Positive skew goes to the bids, negative skew to the asks \n
+    -> Inventory within bounds is added to the side that reduces it \n
+    -> Inventory beyond the extreme maxes out that side's skew (one sided quoting)
+    """
+    bid_skew = min(skew, 1.0) if skew >= 0 else 0.0
+    ask_skew = max(skew, -1.0) if skew < 0 else 0.0
+
+    if inventory_delta < 0:
+        bid_skew += inventory_delta
+    if inventory_delta > 0:
+        ask_skew -= inventory_delta
+
+    if inventory_delta < -inventory_extreme:
+        bid_skew = 1.0
+    if inventory_delta > inventory_extreme:
+        ask_skew = 1.0
+
+    return abs(bid_skew), abs(ask_skew)
+
+
+@njit(nogil=True)
+def write_side(
+    prices: np.ndarray,
+    sizes: np.ndarray,
+    offset: int,
+    n: int,
+    price_start: float,
+    price_end: float,
+    size_start: float,
+    size_end: float,
+    tick_size: float,
+    lot_size: float,
+    is_bid: bool,
+) -> None:
+    """
+    Writes n linearly spaced levels as ticks/lots into prices/sizes[offset: offset + n] \n
+    Prices round away from the touch (bids down, asks up), sizes round down
+    """
+    if n <= 0:
+        return
+
+    price_step = (price_end - price_start) / (n - 1) if n > 1 else 0.0
+    size_step = (size_end - size_start) / (n - 1) if n > 1 else 0.0
+
+    for i in range(n):
+        price = (price_start + price_step * i) / tick_size
+        size = (size_start + size_step * i) / lot_size
+
+        prices[offset + i] = int(np.floor(price + STEP_EPS)) if is_bid else int(np.ceil(price - STEP_EPS))
+        sizes[offset + i] = int(np.floor(size + STEP_EPS))
+
+
+@njit(nogil=True)
+def bybit_quotes(
+    best_bid: float,
+    best_ask: float,
+    volatility: float,
+    skew: float,
+    inventory_delta: float,
+    inventory_extreme: float,
+    tick_size: float,
+    lot_size: float,
+    target_spread: float,
+    min_size: float,
+    max_size: float,
+    num_orders: int,
+    prices: np.ndarray,
+    sizes: np.ndarray,
+) -> tuple[int, int]:
+    """
+    Quote ladder of the Bybit-led MarketMaker, bids then asks written as ticks/lots into prices/sizes
+
+    _______________________________________________________________
+
+    -> Either side's skew at 1 quotes that side alone (both if both), {num_orders} levels one tick apart, fixed size \n
+    -> Otherwise the more skewed side is pinned a tick from the opposite touch, the other side sits {target_spread}
+       behind its own touch \n
+    -> The bids always get the larger share of levels, growing with whichever side's skew is larger \n
+    -> Each side spans half the volatility, shrunk by its skew, sizes ramp from the (skewed) minimum to the maximum \n
+    -> prices/sizes need room for 2 * {num_orders} levels, returns (num_bids, num_asks)
+    """
+    bid_skew, ask_skew = split_skew(skew, inventory_delta, inventory_extreme)
+
+    if bid_skew >= 1 or ask_skew >= 1:
+        fixed_size = (min_size + max_size / 2) / 2
+        num_bids = num_orders if bid_skew >= 1 else 0
+        num_asks = num_orders if ask_skew >= 1 else 0
+
+        write_side(
+            prices,
+            sizes,
+            0,
+            num_bids,
+            best_bid,
+            best_bid - tick_size * num_bids,
+            fixed_size,
+            fixed_size,
+            tick_size,
+            lot_size,
+            True,
+        )
+        write_side(
+            prices,
+            sizes,
+            num_bids,
+            num_asks,
+            best_ask,
+            best_ask + tick_size * num_asks,
+            fixed_size,
+            fixed_size,
+            tick_size,
+            lot_size,
+            False,
+        )
+        return num_bids, num_asks
+
+    base_range = volatility / 2
+    num_bids = int((num_orders / 2) * (1 + max(bid_skew, ask_skew)))
+    num_asks = num_orders - num_bids
+
+    bid_lower = best_bid - base_range * (1 - bid_skew)
+    ask_upper = best_ask + base_range * (1 - ask_skew)
+
+    if bid_skew >= ask_skew:
+        bid_top = best_ask - tick_size
+        ask_top = best_ask + target_spread
+    else:
+        ask_top = best_bid + tick_size
+        bid_top = best_bid - target_spread
+
+    bid_min = min_size * (1 + bid_skew**0.5) if bid_skew >= ask_skew else min_size
+    ask_min = min_size * (1 + ask_skew**0.5) if ask_skew > bid_skew else min_size
+
+    write_side(
+        prices,
+        sizes,
+        0,
+        num_bids,
+        bid_top,
+        bid_lower,
+        bid_min,
+        max_size * (1 - bid_skew),
+        tick_size,
+        lot_size,
+        True,
+    )
+    write_side(
+        prices,
+        sizes,
+        num_bids,
+        num_asks,
+        ask_top,
+        ask_upper,
+        ask_min,
+        max_size * (1 - ask_skew),
+        tick_size,
+        lot_size,
+        False,
+    )
+    return num_bids, num_asks
+
+
+@njit(nogil=True)
+def binance_quotes(
+    best_bid: float,
+    best_ask: float,
+    volatility: float,
+    skew: float,
+    inventory_delta: float,
+    inventory_extreme: float,
+    tick_size: float,
+    lot_size: float,
+    target_spread: float,
+    min_size: float,
+    max_size: float,
+    num_orders: int,
+    prices: np.ndarray,
+    sizes: np.ndarray,
+) -> tuple[int, int]:
+    """
+    Quote ladder of the Binance-led MarketMaker, bids then asks written as ticks/lots into prices/sizes
+
+    _______________________________________________________________
+
+    -> A bid skew at 1 quotes bids alone (else an ask skew at 1 quotes asks alone), one tick apart, fixed size \n
+    -> Otherwise the more skewed side is pinned a tick from the opposite touch and the other side sits
+       {target_spread} from it, the more skewed side gets more levels \n
+    -> The more skewed side's sizes ramp from its skewed minimum to its skewed maximum, the other side's span the
+       full min/max size \n
+    -> prices/sizes need room for {num_orders} levels, returns (num_bids, num_asks)
+    """
+    bid_skew, ask_skew = split_skew(skew, inventory_delta, inventory_extreme)
+    fixed_size = (min_size + max_size / 2) / 2
+
+    if bid_skew >= 1:
+        write_side(
+            prices,
+            sizes,
+            0,
+            num_orders,
+            best_bid,
+            best_bid - tick_size * num_orders,
+            fixed_size,
+            fixed_size,
+            tick_size,
+            lot_size,
+            True,
+        )
+        return num_orders, 0
+
+    if ask_skew >= 1:
+        write_side(
+            prices,
+            sizes,
+            0,
+            num_orders,
+            best_ask,
+            best_ask + tick_size * num_orders,
+            fixed_size,
+            fixed_size,
+            tick_size,
+            lot_size,
+            False,
+        )
+        return 0, num_orders
+
+    base_range = volatility / 2
+
+    if bid_skew >= ask_skew:
+        bid_top = best_ask - tick_size
+        ask_top = bid_top + target_spread
+        num_bids = int(num_orders / 2 * (1 + bid_skew))
+        num_asks = num_orders - num_bids
+
+        bid_sizes = (min_size * (1 + bid_skew**0.5), max_size * (1 - bid_skew))
+        ask_sizes = (min_size, max_size)
+    else:
+        ask_top = best_bid + tick_size
+        bid_top = ask_top - target_spread
+        num_asks = int(num_orders / 2 * (1 + ask_skew))
+        num_bids = num_orders - num_asks
+
+        bid_sizes = (min_size, max_size)
+        ask_sizes = (min_size * (1 + ask_skew**0.5), max_size * (1 - ask_skew))
+
+    bid_lower = bid_top - base_range * (1 - bid_skew)
+    ask_upper = ask_top + base_range * (1 - ask_skew)
+
+    write_side(
+        prices,
+        sizes,
+        0,
+        num_bids,
+        bid_top,
+        bid_lower,
+        bid_sizes[0],
+        bid_sizes[1],
+        tick_size,
+        lot_size,
+        True,
+    )
+    write_side(
+        prices,
+        sizes,
+        num_bids,
+        num_asks,
+        ask_top,
+        ask_upper,
+        ask_sizes[0],
+        ask_sizes[1],
+        tick_size,
+        lot_size,
+        False,
+    )
+    return num_bids, num_asks
+
+
+class QuoteBuffers:
+    """
+    Preallocated tick/lot output of a quote kernel, regrown only if {num_orders} is raised on a refresh
+    """
+
+    def __init__(self, capacity: int = 0) -> None:
+        self.prices = np.zeros(capacity, np.int64)
+        self.sizes = np.zeros(capacity, np.int64)
+
+    def reserve(self, capacity: int) -> None:
+        if self.prices.shape[0] < capacity:
+            self.prices = np.zeros(capacity, np.int64)
+            self.sizes = np.zeros(capacity, np.int64)
+
+    def orders(self, num_bids: int, num_asks: int) -> list[list]:
+        """
+        [side, price ticks, qty lots] lists as taken by Diff
+        """
+        prices = self.prices[: num_bids + num_asks].tolist()
+        sizes = self.sizes[: num_bids + num_asks].tolist()
+
+        orders = [["Buy", p, q] for p, q in zip(prices[:num_bids], sizes[:num_bids])]
+        orders.extend(["Sell", p, q] for p, q in zip(prices[num_bids:], sizes[num_bids:]))
+        return orders
@@ -0,0 +1,67 @@
+import asyncio
+
+import numpy as np
+
+
+class RequoteTrigger:
+    """
+    Wakes the strategy loop when market or private data arrives, instead of polling
+
+    _______________________________________________________________
+
+    -> Feeds call signal() after each relevant update, private updates (fills, order changes) use force=True \n
+    -> Signals that arrive while a diff is in flight collapse into one wake-up \n
+    -> After a wake-up the feeds get {debounce}s to deliver the rest of a burst before quotes are computed \n
+    -> moved() gates market wake-ups on the strategy's inputs moving by more than their tolerance \n
+    -> With no signals at all, the loop still wakes every {heartbeat}s
+    """
+
+    def __init__(self) -> None:
+        self._event = asyncio.Event()
+        self._forced = True  # The first wake-up always quotes
+        self._last_inputs = None
+
+        # Counters
+        self.signals = 0
+        self.wakeups = 0
+        self.requotes = 0
+
+    def signal(self, force: bool = False) -> None:
+        self.signals += 1
+
+        if force:
+            self._forced = True
+
+        self._event.set()
+
+    async def wait(self, debounce: float = 0.0, heartbeat: float = 1.0) -> bool:
+        """
+        Returns once there is something to react to, True if the requote must not be gated
+        """
+        try:
+            await asyncio.wait_for(self._event.wait(), heartbeat)
+        except asyncio.TimeoutError:
+            self._forced = True
+
+        if debounce > 0:
+            await asyncio.sleep(debounce)
+
+        self._event.clear()
+        self.wakeups += 1
+
+        forced, self._forced = self._forced, False
+        return forced
+
+    def moved(self, inputs: np.ndarray, tolerance: np.ndarray, forced: bool = False) -> bool:
+        """
+        True if any input moved past its tolerance since the last requote, the inputs then become the reference
+        """
+        last = self._last_inputs
+
+        if not forced and last is not None and last.shape == inputs.shape:
+            if not (np.abs(inputs - last) > tolerance).any():
+                return False
+
+        self._last_inputs = inputs.copy()
+        self.requotes += 1
+        return True
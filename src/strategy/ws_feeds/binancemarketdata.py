@@ -4,47 +4,92 @@ import orjson
 import websockets
 
 from src.exchanges.binance.public.client import PublicClient
-from src.exchanges.binance.websockets.handlers.orderbook import BinanceBBAHandler
+from src.exchanges.binance.websockets.handlers.orderbook import BinanceBBAHandler, BinanceBookSync
 from src.exchanges.binance.websockets.handlers.trades import BinanceTradesHandler, BinanceTradesInit
 from src.exchanges.binance.websockets.public import PublicWs
+from src.recorder.capture import FeedRecorder
 from src.sharedstate import SharedState
+from src.utils.latency import FRAME_RECV, HANDLER_DONE, PARSE_DONE
 
 
 class BinanceMarketData:
     def __init__(self, sharedstate: SharedState) -> None:
         self.ss = sharedstate
+        self.recorder = None
+        self.book_sync = BinanceBookSync(self.ss.binance_book, PublicClient(self.ss).orderbook_snapshot)
 
         # Dictionary to map streams to their respective handlers.
         self.stream_handler_map = {
-            "Orderbook": self.ss.binance_book.process_data,
+            "Orderbook": self.book_sync.process,
             "BBA": BinanceBBAHandler(self.ss).process,
             "Trades": BinanceTradesHandler(self.ss).process,
         }
 
-    async def initialize_data(self):
-        init_ob = await PublicClient(self.ss).orderbook_snapshot(500)
-        self.ss.binance_book.process_snapshot(init_ob)
+        self.streams = ["Orderbook", "BBA", "Trades"]
+        self.requote_streams = {"Orderbook", "BBA"}
+        self.url, self.topics = PublicWs(self.ss).multi_stream_request(self.streams)
+        self.topic_stream_map = dict(zip(self.topics, self.streams))
+        self.book_sync.stream = self.topics[self.streams.index("Orderbook")]
 
+    async def initialize_data(self):
+        # Orderbook snapshot is loaded by the book sync once diffs start buffering
         init_trades = await PublicClient(self.ss).trades_snapshot(1000)
         BinanceTradesInit(self.ss, init_trades).process()
 
+    def process_frame(self, frame):
+        """
+        Parses one raw frame and routes it to its handler, shared by the live feed and replays
+        """
+        recv = orjson.loads(frame)
+        self.ss.latency.stamp(PARSE_DONE)
+
+        if "success" not in recv:
+            self.process(recv)
+
+    def process_snapshot_frame(self, frame):
+        """
+        Replays one recorded REST orderbook snapshot (the "binance_snapshot" feed) into the book sync
+        """
+        self.book_sync.load_recorded(orjson.loads(frame))
+
+    def replay(self, driver) -> None:
+        """
+        Adds this feed to a ReplayDriver, the depth stream is rebuilt from the recorded snapshots, never a live one \n
+        Sessions recorded without snapshots leave the Binance book empty (unsynced), BBA and trades still replay
+        """
+        self.book_sync.replaying = True
+        driver.add_feed("binance_public", self.process_frame)
+        driver.add_feed("binance_snapshot", self.process_snapshot_frame)
+
+    def process(self, recv: dict):
+        """
+        Routes one parsed message to its handler, the multi-instrument feed calls it per symbol
+        """
+        stream = self.topic_stream_map.get(recv["stream"])
+        handler = self.stream_handler_map.get(stream)
+        if handler:
+            handler(recv)
+            self.ss.latency.stamp(HANDLER_DONE)
+
+            if stream in self.requote_streams:
+                self.ss.requote.signal()
+
     async def binance_data_feed(self):
         await self.initialize_data()
 
-        streams = ["Orderbook", "BBA", "Trades"]
-        url, topics = PublicWs(self.ss).multi_stream_request(streams)
-
-        async for websocket in websockets.connect(url):
-            print(f"{datetime.now().strftime('%H:%S.%f')[:12]}: Subscribed to BINANCE {topics} feeds...")
+        async for websocket in websockets.connect(self.url, **self.ss.ws_options):
+            print(f"{datetime.now().strftime('%H:%S.%f')[:12]}: Subscribed to BINANCE {self.topics} feeds...")
+            self.book_sync.reset()
 
             try:
                 while True:
-                    recv = orjson.loads(await websocket.recv())
+                    frame = await websocket.recv()
+                    self.ss.latency.stamp(FRAME_RECV)
 
-                    if "success" not in recv:
-                        handler = self.stream_handler_map.get(recv["stream"])
-                        if handler:
-                            handler(recv)
+                    if self.recorder is not None:
+                        self.recorder.record(frame)
+
+                    self.process_frame(frame)
 
             except websockets.ConnectionClosed:
                 continue
@@ -53,4 +98,12 @@ class BinanceMarketData:
                 raise
 
     async def start_feed(self):
+        if self.ss.record_feeds:
+            self.recorder = FeedRecorder(self.ss.record_dir, "binance_public")
+            self.recorder.start()
+
+            # REST snapshots the depth stream is rebuilt from, a replay needs them too
+            self.book_sync.recorder = FeedRecorder(self.ss.record_dir, "binance_snapshot")
+            self.book_sync.recorder.start()
+
         await self.binance_data_feed()
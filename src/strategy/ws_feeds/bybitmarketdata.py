@@ -6,54 +6,101 @@ import websockets
 from src.exchanges.bybit.get.public import BybitPublicClient
 from src.exchanges.bybit.websockets.endpoints import WsStreamLinks
 from src.exchanges.bybit.websockets.handlers.kline import BybitKlineProcessor
-from src.exchanges.bybit.websockets.handlers.orderbook import BybitBBAHandler
+from src.exchanges.bybit.websockets.handlers.orderbook import BybitBBAHandler, BybitBookSync
 from src.exchanges.bybit.websockets.handlers.ticker import BybitTickerHandler
 from src.exchanges.bybit.websockets.handlers.trades import BybitTradesHandler, BybitTradesInit
 from src.exchanges.bybit.websockets.public import PublicWs
+from src.recorder.capture import FeedRecorder
 from src.sharedstate import SharedState
+from src.utils.latency import FRAME_RECV, HANDLER_DONE, PARSE_DONE
 
 
 class BybitMarketData:
     def __init__(self, sharedstate: SharedState) -> None:
         self.ss = sharedstate
+        self.websocket = None
+        self.recorder = None
+        self.book_sync = BybitBookSync(self.ss.bybit_book, self.resubscribe_book)
 
         # Dictionary to map topics to their respective handlers.
         self.topic_handler_map = {
-            "Orderbook": self.ss.bybit_book.process_data,
+            "Orderbook": self.book_sync.process,
             "BBA": BybitBBAHandler(self.ss).process,
             "Trades": BybitTradesHandler(self.ss).process,
             "Ticker": BybitTickerHandler(self.ss).process,
             "Kline": BybitKlineProcessor(self.ss).process,
         }
 
+        self.streams = ["Orderbook", "BBA", "Trades", "Ticker", "Kline"]
+        self.requote_streams = {"Orderbook", "BBA", "Ticker", "Kline"}
+        self.req, self.topics = PublicWs(self.ss).multi_stream_request(
+            self.streams, depth=500, interval=self.ss.bybit_kline_interval
+        )
+        self.topic_stream_map = dict(zip(self.topics, self.streams))
+
     async def initialize_data(self):
-        init_kline_data = await BybitPublicClient(self.ss).klines(1)
-        BybitKlineProcessor(self.ss, init_kline_data).process()
+        init_kline_data = await BybitPublicClient(self.ss).klines(self.ss.bybit_kline_interval)
+        BybitKlineProcessor(self.ss, init_kline_data, self.ss.bybit_kline_interval)
 
         init_trades = await BybitPublicClient(self.ss).trades(1000)
         BybitTradesInit(self.ss, init_trades).process()
 
+    async def resubscribe_book(self):
+        """
+        Drops and re-adds only the orderbook topic, Bybit replies with a fresh snapshot
+        """
+        if self.websocket is None:
+            return
+
+        public_ws = PublicWs(self.ss)
+        req, topics = public_ws.multi_stream_request(["Orderbook"], depth=500)
+        await self.websocket.send(public_ws.unsubscribe_request(topics))
+        await self.websocket.send(req)
+
+    def process_frame(self, frame):
+        """
+        Parses one raw frame and routes it to its handler, shared by the live feed and replays
+        """
+        recv = orjson.loads(frame)
+        self.ss.latency.stamp(PARSE_DONE)
+
+        if "success" in recv:
+            return
+
+        self.process(recv)
+
+    def process(self, recv: dict):
+        """
+        Routes one parsed message to its handler, the multi-instrument feed calls it per symbol
+        """
+        stream = self.topic_stream_map.get(recv["topic"])
+        handler = self.topic_handler_map.get(stream)
+        if handler:
+            handler(recv)
+            self.ss.latency.stamp(HANDLER_DONE)
+
+            if stream in self.requote_streams:
+                self.ss.requote.signal()
+
     async def bybit_data_feed(self):
         await self.initialize_data()
 
-        streams = ["Orderbook", "BBA", "Trades", "Ticker", "Kline"]
-        req, topics = PublicWs(self.ss).multi_stream_request(streams, depth=500, interval=1)
-
-        async for websocket in websockets.connect(WsStreamLinks.FUTURES_PUBLIC_STREAM):
-            print(f"{datetime.now().strftime('%H:%S.%f')[:12]}: Subscribed to BYBIT {topics} feed...")
+        async for websocket in websockets.connect(WsStreamLinks.FUTURES_PUBLIC_STREAM, **self.ss.ws_options):
+            print(f"{datetime.now().strftime('%H:%S.%f')[:12]}: Subscribed to BYBIT {self.topics} feed...")
+            self.websocket = websocket
+            self.book_sync.reset()
 
             try:
-                await websocket.send(req)
+                await websocket.send(self.req)
 
                 while True:
-                    recv = orjson.loads(await websocket.recv())
+                    frame = await websocket.recv()
+                    self.ss.latency.stamp(FRAME_RECV)
 
-                    if "success" in recv:
-                        continue
+                    if self.recorder is not None:
+                        self.recorder.record(frame)
 
-                    handler = self.topic_handler_map.get(recv["topic"])
-                    if handler:
-                        handler(recv["data"])
+                    self.process_frame(frame)
 
             except websockets.ConnectionClosed:
                 continue
@@ -62,4 +109,8 @@ class BybitMarketData:
                 raise
 
     async def start_feed(self):
+        if self.ss.record_feeds:
+            self.recorder = FeedRecorder(self.ss.record_dir, "bybit_public")
+            self.recorder.start()
+
         await self.bybit_data_feed()
@@ -10,7 +10,9 @@ from src.exchanges.bybit.websockets.handlers.execution import BybitExecutionHand
 from src.exchanges.bybit.websockets.handlers.order import BybitOrderHandler
 from src.exchanges.bybit.websockets.handlers.position import BybitPositionHandler
 from src.exchanges.bybit.websockets.private import PrivateWs
+from src.recorder.capture import FeedRecorder
 from src.sharedstate import SharedState
+from src.utils.latency import FRAME_RECV, HANDLER_DONE, PARSE_DONE
 
 
 class BybitPrivateData:
@@ -20,6 +22,7 @@ class BybitPrivateData:
         self.api_secret = self.ss.api_secret
         self.symbol = self.ss.bybit_symbol
         self.private_ws = PrivateWs(self.api_key, self.api_secret)
+        self.recorder = None
 
         # Create a dictionary to map topics to handlers
         self.topic_handler_map = {
@@ -28,13 +31,13 @@ class BybitPrivateData:
             "Order": BybitOrderHandler,
         }
 
+        self.req, self.topics = self.private_ws.multi_stream_request(["Position", "Execution", "Order"])
+        self.topic_stream_map = dict(zip(self.topics, ["Position", "Execution", "Order"]))
+
     async def open_orders_sync(self):
         while True:
             recv = await BybitPrivateClient(self.ss).open_orders()
-            data = recv["result"]["list"]
-            self.ss.current_orders = {
-                o["orderId"]: {"price": float(o["price"]), "qty": float(o["qty"]), "side": o["side"]} for o in data
-            }
+            self.ss.current_orders.reconcile(recv["result"]["list"])
             await asyncio.sleep(0.5)
 
     async def current_position_sync(self):
@@ -44,24 +47,41 @@ class BybitPrivateData:
             BybitPositionHandler(self.ss, data).process()
             await asyncio.sleep(0.5)
 
+    def process_frame(self, frame):
+        """
+        Parses one raw frame and routes it to its handler, shared by the live feed and replays
+        """
+        recv = orjson.loads(frame)
+        self.ss.latency.stamp(PARSE_DONE)
+
+        if "success" in recv:
+            return
+
+        data = recv["data"]
+        handler_cls = self.topic_handler_map.get(self.topic_stream_map.get(recv["topic"]))
+        if handler_cls:
+            handler_cls(self.ss, data).process()
+            self.ss.latency.stamp(HANDLER_DONE)
+
+            # Fills and order changes always get a fresh look at the quotes
+            self.ss.requote.signal(force=True)
+
     async def privatefeed(self):
-        req, topics = self.private_ws.multi_stream_request(["Position", "Execution", "Order"])
-        print(f"{datetime.now().strftime('%H:%S.%f')[:12]}: Subscribed to BYBIT {topics} feeds...")
+        print(f"{datetime.now().strftime('%H:%S.%f')[:12]}: Subscribed to BYBIT {self.topics} feeds...")
 
-        async for websocket in websockets.connect(WsStreamLinks.COMBINED_PRIVATE_STREAM):
+        async for websocket in websockets.connect(WsStreamLinks.COMBINED_PRIVATE_STREAM, **self.ss.ws_options):
             try:
                 await websocket.send(self.private_ws.auth())
-                await websocket.send(req)
+                await websocket.send(self.req)
 
                 while True:
-                    recv = orjson.loads(await websocket.recv())
-                    if "success" in recv:
-                        continue
+                    frame = await websocket.recv()
+                    self.ss.latency.stamp(FRAME_RECV)
 
-                    data = recv["data"]
-                    handler_cls = self.topic_handler_map.get(recv["topic"])
-                    if handler_cls:
-                        handler_cls(self.ss, data).process()
+                    if self.recorder is not None:
+                        self.recorder.record(frame)
+
+                    self.process_frame(frame)
 
             except websockets.ConnectionClosed:
                 continue
@@ -70,5 +90,9 @@ class BybitPrivateData:
                 raise
 
     async def start_feed(self):
+        if self.ss.record_feeds:
+            self.recorder = FeedRecorder(self.ss.record_dir, "bybit_private")
+            self.recorder.start()
+
         tasks = [self.open_orders_sync(), self.current_position_sync(), self.privatefeed()]
         await asyncio.gather(*tasks)
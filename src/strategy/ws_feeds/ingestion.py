@@ -0,0 +1,96 @@
+import asyncio
+import os
+import threading
+from multiprocessing import get_context
+
+from src.shard.feed import run_feed
+from src.shard.shm import InstrumentBlock
+from src.shard.subscriber import ShardSubscriber
+from src.sharedstate import SharedState
+
+
+class FeedIngestion:
+    """
+    Runs the public market data feeds (receive, parse, book updates) off the strategy's event loop
+
+    _______________________________________________________________
+
+    -> THREAD: the feeds run on their own event loop in a thread, PROCESS: in a child process (no shared GIL) \n
+    -> Either way they write into one shared memory block (see src/shard/shm.py), market frame and books under
+       seqlocks, trades through a single producer ring, and this loop copies what moved into the local state \n
+    -> THREAD wakes this loop once per burst of published messages, PROCESS polls every {shard_poll_interval}s \n
+    -> The strategy's own books/bba/trades are only written here, on its loop, so its synchronous reads stay
+       consistent as with the inline feeds
+    """
+
+    def __init__(self, sharedstate: SharedState) -> None:
+        self.ss = sharedstate
+        self.mode = sharedstate.feed_ingestion
+        if self.mode not in ("THREAD", "PROCESS"):
+            raise ValueError(f"feed_ingestion must be INLINE, THREAD or PROCESS, got {self.mode}")
+
+        self.name = f"smm_{os.getpid()}_feed"
+
+        self.block = InstrumentBlock.create(self.name, sharedstate.shard_book_levels, sharedstate.shard_trade_capacity)
+        self.subscriber = ShardSubscriber(sharedstate, self.block)
+
+        self.loop = None
+        self.worker = None
+        self._woken = asyncio.Event()
+        self._wake_pending = False
+
+    def wake(self) -> None:
+        """
+        Called on the feed thread, at most one wake-up is queued on the strategy's loop at a time
+        """
+        if not self._wake_pending:
+            self._wake_pending = True
+            self.loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self) -> None:
+        self._wake_pending = False
+        self._woken.set()
+
+    def start(self) -> None:
+        # The feed side builds its state from the same parameters.yaml, {} keeps every setting as it is
+        args = ([{}], [self.name])
+
+        if self.mode == "THREAD":
+            self.loop = asyncio.get_running_loop()
+            self.worker = threading.Thread(target=run_feed, args=(*args, self.wake), name="FeedIngestion", daemon=True)
+        else:
+            self.worker = get_context("spawn").Process(target=run_feed, args=args, daemon=True)
+
+        self.worker.start()
+
+    async def wait(self) -> None:
+        if self.mode == "PROCESS":
+            await asyncio.sleep(self.ss.shard_poll_interval)
+            return
+
+        # Bounded, so a dead feed thread is still noticed
+        try:
+            await asyncio.wait_for(self._woken.wait(), self.ss.requote_heartbeat)
+        except asyncio.TimeoutError:
+            pass
+
+        self._woken.clear()
+
+    async def start_feed(self) -> None:
+        self.start()
+
+        try:
+            while True:
+                await self.wait()
+
+                if self.subscriber.poll():
+                    self.ss.requote.signal()
+
+                if not self.worker.is_alive():
+                    raise RuntimeError(f"Feed ingestion {self.mode.lower()} exited")
+
+        finally:
+            if self.mode == "PROCESS" and self.worker.is_alive():
+                self.worker.terminate()
+
+            self.block.close()
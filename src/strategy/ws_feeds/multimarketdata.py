@@ -0,0 +1,203 @@
+import asyncio
+from datetime import datetime
+
+import orjson
+import websockets
+
+from src.exchanges.binance.websockets.public import PublicWs as BinancePublicWs
+from src.exchanges.bybit.websockets.endpoints import WsStreamLinks
+from src.exchanges.bybit.websockets.public import PublicWs as BybitPublicWs
+from src.recorder.capture import FeedRecorder
+from src.sharedstate import SharedState
+from src.strategy.ws_feeds.binancemarketdata import BinanceMarketData
+from src.strategy.ws_feeds.bybitmarketdata import BybitMarketData
+from src.utils.latency import FRAME_RECV, PARSE_DONE
+
+
+class BybitMultiMarketData:
+    """
+    One Bybit public websocket for many instruments
+
+    _______________________________________________________________
+
+    -> Every instrument keeps its own BybitMarketData (handlers, book sync, requote trigger), only the socket
+       is shared \n
+    -> Frames are parsed once and routed by topic to the instrument's feed, one dict lookup per frame \n
+    -> Topics are subscribed {SUBSCRIBE_BATCH} per request, within Bybit's args limit
+    """
+
+    SUBSCRIBE_BATCH = 10
+
+    def __init__(self, states: list[SharedState]) -> None:
+        self.ss = states[0]
+        self.websocket = None
+        self.recorder = None
+        self.feeds = [BybitMarketData(ss) for ss in states]
+
+        self.topic_feed_map = {topic: feed for feed in self.feeds for topic in feed.topics}
+        self.topics = list(self.topic_feed_map)
+
+        public_ws = BybitPublicWs(self.ss)
+        self.reqs = [
+            public_ws.subscribe_request(self.topics[i : i + self.SUBSCRIBE_BATCH])
+            for i in range(0, len(self.topics), self.SUBSCRIBE_BATCH)
+        ]
+
+    async def initialize_data(self):
+        await asyncio.gather(*[feed.initialize_data() for feed in self.feeds])
+
+    def process_frame(self, frame):
+        recv = orjson.loads(frame)
+        self.ss.latency.stamp(PARSE_DONE)
+
+        if "success" in recv:
+            return
+
+        feed = self.topic_feed_map.get(recv["topic"])
+        if feed is not None:
+            feed.process(recv)
+            self.routed(feed, recv)
+
+    def routed(self, feed: BybitMarketData, recv: dict):
+        """
+        Called after each message an instrument's feed handled, a hook for publishers (see src/shard/feed.py)
+        """
+
+    async def bybit_data_feed(self):
+        await self.initialize_data()
+
+        async for websocket in websockets.connect(WsStreamLinks.FUTURES_PUBLIC_STREAM, **self.ss.ws_options):
+            print(
+                f"{datetime.now().strftime('%H:%S.%f')[:12]}: Subscribed to BYBIT {len(self.topics)} topics "
+                f"for {len(self.feeds)} instruments..."
+            )
+            self.websocket = websocket
+
+            # Book resyncs resubscribe through the shared socket
+            for feed in self.feeds:
+                feed.websocket = websocket
+                feed.book_sync.reset()
+
+            try:
+                for req in self.reqs:
+                    await websocket.send(req)
+
+                while True:
+                    frame = await websocket.recv()
+                    self.ss.latency.stamp(FRAME_RECV)
+
+                    if self.recorder is not None:
+                        self.recorder.record(frame)
+
+                    self.process_frame(frame)
+
+            except websockets.ConnectionClosed:
+                continue
+            except Exception as e:
+                print(e)
+                raise
+
+    async def start_feed(self):
+        if self.ss.record_feeds:
+            self.recorder = FeedRecorder(self.ss.record_dir, "bybit_public")
+            self.recorder.start()
+
+        await self.bybit_data_feed()
+
+
+class BinanceMultiMarketData:
+    """
+    One Binance combined stream for many instruments, routed by stream name to each instrument's BinanceMarketData
+    """
+
+    def __init__(self, states: list[SharedState]) -> None:
+        self.ss = states[0]
+        self.recorder = None
+        self.feeds = [BinanceMarketData(ss) for ss in states]
+
+        self.topic_feed_map = {topic: feed for feed in self.feeds for topic in feed.topics}
+        self.topics = list(self.topic_feed_map)
+        self.url = BinancePublicWs(self.ss).stream_url(self.topics)
+        self.snapshot_recorder = None
+
+    async def initialize_data(self):
+        await asyncio.gather(*[feed.initialize_data() for feed in self.feeds])
+
+    def process_frame(self, frame):
+        recv = orjson.loads(frame)
+        self.ss.latency.stamp(PARSE_DONE)
+
+        if "success" in recv:
+            return
+
+        feed = self.topic_feed_map.get(recv["stream"])
+        if feed is not None:
+            feed.process(recv)
+            self.routed(feed, recv)
+
+    def process_snapshot_frame(self, frame):
+        """
+        Replays one recorded REST orderbook snapshot into its instrument's book sync, routed by depth stream name
+        """
+        recv = orjson.loads(frame)
+        feed = self.topic_feed_map.get(recv["stream"])
+
+        if feed is not None:
+            feed.book_sync.load_recorded(recv)
+
+    def replay(self, driver) -> None:
+        """
+        Adds the instruments' feeds to a ReplayDriver, see BinanceMarketData.replay
+        """
+        for feed in self.feeds:
+            feed.book_sync.replaying = True
+
+        driver.add_feed("binance_public", self.process_frame)
+        driver.add_feed("binance_snapshot", self.process_snapshot_frame)
+
+    def routed(self, feed: BinanceMarketData, recv: dict):
+        """
+        Called after each message an instrument's feed handled, a hook for publishers (see src/shard/feed.py)
+        """
+
+    async def binance_data_feed(self):
+        await self.initialize_data()
+
+        async for websocket in websockets.connect(self.url, **self.ss.ws_options):
+            print(
+                f"{datetime.now().strftime('%H:%S.%f')[:12]}: Subscribed to BINANCE {len(self.topics)} streams "
+                f"for {len(self.feeds)} instruments..."
+            )
+
+            for feed in self.feeds:
+                feed.book_sync.reset()
+
+            try:
+                while True:
+                    frame = await websocket.recv()
+                    self.ss.latency.stamp(FRAME_RECV)
+
+                    if self.recorder is not None:
+                        self.recorder.record(frame)
+
+                    self.process_frame(frame)
+
+            except websockets.ConnectionClosed:
+                continue
+            except Exception as e:
+                print(e)
+                raise
+
+    async def start_feed(self):
+        if self.ss.record_feeds:
+            self.recorder = FeedRecorder(self.ss.record_dir, "binance_public")
+            self.recorder.start()
+
+            # One snapshot recorder for every instrument's book sync, records are tagged with the depth stream
+            self.snapshot_recorder = FeedRecorder(self.ss.record_dir, "binance_snapshot")
+            self.snapshot_recorder.start()
+
+            for feed in self.feeds:
+                feed.book_sync.recorder = self.snapshot_recorder
+
+        await self.binance_data_feed()
@@ -0,0 +1,87 @@
+import asyncio
+
+import orjson
+
+from src.exchanges.bybit.get.private import BybitPrivateClient
+from src.exchanges.bybit.websockets.handlers.position import BybitPositionHandler
+from src.sharedstate import SharedState
+from src.strategy.ws_feeds.bybitprivatedata import BybitPrivateData
+from src.utils.latency import HANDLER_DONE, PARSE_DONE
+
+
+def by_symbol(items: list) -> dict:
+    grouped = {}
+
+    for item in items:
+        grouped.setdefault(item["symbol"], []).append(item)
+
+    return grouped
+
+
+class BybitMultiPrivateData(BybitPrivateData):
+    """
+    One private websocket and one reconcile loop for many instruments on the same account
+
+    _______________________________________________________________
+
+    -> Position/execution/order messages are split by symbol and handled against that instrument's state, only
+       the instruments they touch get a requote \n
+    -> Open orders and positions are polled with one {settle_coin} wide (paged) request each, not one per symbol \n
+    -> Messages for symbols that aren't quoted are ignored
+    """
+
+    def __init__(self, states: list[SharedState]) -> None:
+        super().__init__(states[0])
+        self.states = {ss.bybit_symbol: ss for ss in states}
+        self.settle_coin = self.ss.settle_coin
+
+    async def open_orders_sync(self):
+        client = BybitPrivateClient(self.ss)
+
+        while True:
+            orders = await client.settle_open_orders(self.settle_coin)
+
+            # A failed page leaves the stores as they are, reconciling against a partial list would drop orders
+            if orders is not None:
+                grouped = by_symbol(orders)
+
+                for symbol, ss in self.states.items():
+                    ss.current_orders.reconcile(grouped.get(symbol, []))
+
+            await asyncio.sleep(0.5)
+
+    async def current_position_sync(self):
+        client = BybitPrivateClient(self.ss)
+
+        while True:
+            positions = await client.settle_positions(self.settle_coin)
+
+            if positions is not None:
+                grouped = by_symbol(positions)
+
+                for symbol, ss in self.states.items():
+                    BybitPositionHandler(ss, grouped.get(symbol, [])).process()
+
+            await asyncio.sleep(0.5)
+
+    def process_frame(self, frame):
+        recv = orjson.loads(frame)
+        self.ss.latency.stamp(PARSE_DONE)
+
+        if "success" in recv:
+            return
+
+        handler_cls = self.topic_handler_map.get(self.topic_stream_map.get(recv["topic"]))
+        if not handler_cls:
+            return
+
+        for symbol, data in by_symbol(recv["data"]).items():
+            ss = self.states.get(symbol)
+
+            if ss is not None:
+                handler_cls(ss, data).process()
+
+                # Fills and order changes always get a fresh look at the quotes
+                ss.requote.signal(force=True)
+
+        self.ss.latency.stamp(HANDLER_DONE)
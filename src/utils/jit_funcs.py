@@ -25,6 +25,14 @@ def npower(value: float, n: int) -> float:
     return value**n  # using ** for power is often faster with Numba
 
 
+@njit(float64(float64))
+def nabs(value: float) -> float:
+    """
+    Return the absolute value of a number
+    """
+    return value if value >= 0 else -value
+
+
 @njit(float64[:](float64, float64, int32))  # return type is a 1D array of float64
 def linspace(start: float, end: float, n: int) -> np.ndarray:
     step = (end - start) / (n - 1)
@@ -0,0 +1,162 @@
+import asyncio
+import math
+import time
+
+import numpy as np
+
+
+class LatencyHistogram:
+    """
+    Fixed-size log-bucketed histogram of latencies, cheap enough to record on every request
+
+    _______________________________________________________________
+
+    -> {buckets_per_decade} buckets per power of 10 between 1us and {max_seconds}, ~2% relative resolution at 100 \n
+    -> Values outside the range are clamped into the first/last bucket \n
+    -> record() takes seconds, percentiles are reported back in seconds
+    """
+
+    def __init__(self, max_seconds: float = 10.0, buckets_per_decade: int = 100) -> None:
+        self.buckets_per_decade = buckets_per_decade
+        self.decades = math.log10(max_seconds * 1e6)
+        self.counts = np.zeros(int(self.decades * buckets_per_decade) + 1, dtype=np.int64)
+
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        micros = seconds * 1e6
+        i = int(math.log10(micros) * self.buckets_per_decade) if micros > 1.0 else 0
+        self.counts[min(i, self.counts.shape[0] - 1)] += 1
+
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """
+        Upper edge of the bucket holding the q-th (0-100) percentile, in seconds
+        """
+        if self.count == 0:
+            return 0.0
+
+        rank = max(1, math.ceil(self.count * q / 100))
+        i = int(np.searchsorted(np.cumsum(self.counts), rank))
+        return min(10 ** ((i + 1) / self.buckets_per_decade) / 1e6, self.max)
+
+    def reset(self) -> None:
+        self.counts[:] = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "p999": self.percentile(99.9),
+            "max": self.max,
+        }
+
+
+# Hot path stages, in the order a market update turns into an acknowledged order
+FRAME_RECV, PARSE_DONE, HANDLER_DONE, QUOTE_DONE, DIFF_DONE = range(5)
+
+# (histogram name, from stage, to stage) recorded for every requote
+CYCLE_SEGMENTS = (
+    ("parse", FRAME_RECV, PARSE_DONE),
+    ("handler", PARSE_DONE, HANDLER_DONE),
+    ("quote", HANDLER_DONE, QUOTE_DONE),
+    ("diff", QUOTE_DONE, DIFF_DONE),
+    ("frame_to_diff", FRAME_RECV, DIFF_DONE),
+)
+
+
+class LatencyTracer:
+    """
+    Monotonic stamps along the tick-to-trade path, folded into LatencyHistograms off the hot path
+
+    _______________________________________________________________
+
+    -> Feeds stamp every frame (receive, parse, handler), a stamp is one perf_counter_ns() into a preallocated list \n
+    -> quote() freezes the stamps of the frame the requote acts on, finish() records the cycle's segments \n
+    -> request_sent()/request_acked() time each order request and tick-to-trade from the frozen frame \n
+    -> All of it runs on the event loop thread, so the histograms need no locking
+    """
+
+    def __init__(self) -> None:
+        self.frame = [0, 0, 0]
+        self.cycle = [0, 0, 0, 0, 0]
+
+        names = [name for name, _, _ in CYCLE_SEGMENTS] + ["request", "tick_to_trade", "tick_to_ack"]
+        self.histograms = {name: LatencyHistogram() for name in names}
+
+    def stamp(self, stage: int) -> None:
+        self.frame[stage] = time.perf_counter_ns()
+
+    def quote(self) -> None:
+        cycle = self.cycle
+        cycle[QUOTE_DONE] = time.perf_counter_ns()
+        cycle[FRAME_RECV], cycle[PARSE_DONE], cycle[HANDLER_DONE] = self.frame
+
+    def finish(self) -> None:
+        cycle = self.cycle
+        cycle[DIFF_DONE] = time.perf_counter_ns()
+
+        if cycle[FRAME_RECV] == 0:
+            return
+
+        for name, start, end in CYCLE_SEGMENTS:
+            if cycle[end] >= cycle[start]:
+                self.histograms[name].record((cycle[end] - cycle[start]) / 1e9)
+
+    def request_sent(self) -> int:
+        sent = time.perf_counter_ns()
+        frame_recv = self.cycle[FRAME_RECV]
+
+        if frame_recv:
+            self.histograms["tick_to_trade"].record((sent - frame_recv) / 1e9)
+
+        return sent
+
+    def request_acked(self, sent: int) -> None:
+        acked = time.perf_counter_ns()
+        self.histograms["request"].record((acked - sent) / 1e9)
+
+        frame_recv = self.cycle[FRAME_RECV]
+        if frame_recv:
+            self.histograms["tick_to_ack"].record((acked - frame_recv) / 1e9)
+
+    def summary(self) -> dict:
+        return {name: histogram.summary() for name, histogram in self.histograms.items()}
+
+    def reset(self) -> None:
+        for histogram in self.histograms.values():
+            histogram.reset()
+
+    def dump(self) -> str:
+        """
+        Table of every histogram in microseconds
+        """
+        lines = [f"{'segment':<14}{'count':>9}{'p50':>10}{'p90':>10}{'p99':>10}{'p99.9':>10}{'max':>10}"]
+
+        for name, s in self.summary().items():
+            lines.append(
+                f"{name:<14}{s['count']:>9}"
+                + "".join(f"{s[k] * 1e6:>10.1f}" for k in ("p50", "p90", "p99", "p999", "max"))
+            )
+
+        return "\n".join(lines)
+
+    async def report(self, interval: float) -> None:
+        """
+        Prints the table every {interval}s
+        """
+        while True:
+            await asyncio.sleep(interval)
+            print(self.dump())
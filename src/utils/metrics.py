@@ -0,0 +1,51 @@
+import orjson
+from aiohttp import web
+
+
+class MetricsServer:
+    """
+    Local HTTP endpoint serving the bot's live metrics as JSON
+
+    _______________________________________________________________
+
+    -> Sources are registered as name -> zero argument callable returning something orjson can serialize \n
+    -> GET /metrics returns every source, GET /metrics/{name} a single one \n
+    -> Binds to localhost by default, it is meant for a dashboard or curl on the same box
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 9100) -> None:
+        self.host = host
+        self.port = port
+        self.sources = {}
+        self._runner = None
+
+    def add(self, name: str, source) -> None:
+        self.sources[name] = source
+
+    async def _all(self, request: web.Request):
+        body = {name: source() for name, source in self.sources.items()}
+        return web.Response(body=orjson.dumps(body, option=orjson.OPT_SERIALIZE_NUMPY), content_type="application/json")
+
+    async def _one(self, request: web.Request):
+        source = self.sources.get(request.match_info["name"])
+
+        if source is None:
+            raise web.HTTPNotFound()
+
+        body = orjson.dumps(source(), option=orjson.OPT_SERIALIZE_NUMPY)
+        return web.Response(body=body, content_type="application/json")
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/metrics", self._all)
+        app.router.add_get("/metrics/{name}", self._one)
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        print(f"Metrics served on http://{self.host}:{self.port}/metrics")
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
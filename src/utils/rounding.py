@@ -1,11 +1,109 @@
+import math
 from decimal import Decimal
+from functools import lru_cache
 
+import numpy as np
 
-def round_step_size(quantity: float, step_size: float) -> float:
+# Rounding modes
+DOWN = 0
+UP = 1
+NEAREST = 2
+AWAY = 3  # Away from the touch: bids down, asks up
+TOWARD = 4  # Toward the touch: bids up, asks down
+
+# Absorbs float error in value / step (e.g. 100.3 / 0.1 = 1002.9999999999999) without ever moving a full step
+STEP_EPS = 1e-6
+
+
+class StepRounder:
     """
-    Originally from binance.helpers.round_step_size
+    Fixed-point grid for one exchange step (tick or lot size), prices/sizes are carried as int step counts
+
+    _______________________________________________________________
+
+    -> The step is split once into an integer and a power of 10 (0.1 -> 1 / 10), no Decimal or str on the hot path \n
+    -> to_steps()/to_step() give step counts (int64 arrays / ints), to_values()/to_value() turn them back into floats
+       equal to float("<exact decimal>") \n
+    -> format()/format_step() give payload-ready strings with exactly the step's number of decimals
+    """
+
+    def __init__(self, step: float) -> None:
+        exponent = Decimal(str(step)).normalize().as_tuple().exponent
+        self.decimals = max(0, -exponent)
+        self.scale = 10**self.decimals
+        self.step_int = int(round(step * self.scale))
+        self.step = self.step_int / self.scale
+
+    def to_steps(self, values: np.ndarray, mode: int = NEAREST) -> np.ndarray:
+        steps = np.asarray(values, dtype=np.float64) / self.step
+
+        if mode == DOWN:
+            steps = np.floor(steps + STEP_EPS)
+        elif mode == UP:
+            steps = np.ceil(steps - STEP_EPS)
+        else:
+            steps = np.rint(steps)
+
+        return steps.astype(np.int64)
+
+    def to_step(self, value: float, mode: int = NEAREST) -> int:
+        steps = value / self.step
+
+        if mode == DOWN:
+            return math.floor(steps + STEP_EPS)
+        if mode == UP:
+            return math.ceil(steps - STEP_EPS)
+        return round(steps)
+
+    def to_values(self, steps: np.ndarray) -> np.ndarray:
+        return (steps * self.step_int) / self.scale
 
-    Rounds a float to a given step size
+    def to_value(self, step: int) -> float:
+        return (step * self.step_int) / self.scale
+
+    def parse(self, value: str) -> int:
+        """
+        Step count of a decimal string as sent by the exchange
+        """
+        return round(float(value) / self.step)
+
+    def round(self, values: np.ndarray, mode: int = NEAREST) -> np.ndarray:
+        return self.to_values(self.to_steps(values, mode))
+
+    @staticmethod
+    def side_mode(side: str, mode: int) -> int:
+        if mode == AWAY:
+            return DOWN if side == "Buy" else UP
+        if mode == TOWARD:
+            return UP if side == "Buy" else DOWN
+        return mode
+
+    def side_steps(self, values: np.ndarray, side: str, mode: int = AWAY) -> np.ndarray:
+        """
+        Directional step counts of one side's prices, AWAY never rounds a quote through the touch
+        """
+        return self.to_steps(values, self.side_mode(side, mode))
+
+    def round_side(self, values: np.ndarray, side: str, mode: int = AWAY) -> np.ndarray:
+        return self.round(values, self.side_mode(side, mode))
+
+    def format_step(self, step: int) -> str:
+        units = step * self.step_int
+
+        if self.decimals == 0:
+            return str(units)
+
+        sign = "-" if units < 0 else ""
+        whole, frac = divmod(abs(units), self.scale)
+        return f"{sign}{whole}.{frac:0{self.decimals}d}"
+
+    def format(self, steps: np.ndarray) -> list[str]:
+        return [self.format_step(step) for step in steps.tolist()]
+
+
+@lru_cache(maxsize=None)
+def rounder(step: float) -> StepRounder:
+    """
+    Shared StepRounder per step size
     """
-    quantity = Decimal(str(quantity))
-    return float(quantity - quantity % Decimal(str(step_size)))
+    return StepRounder(step)
@@ -0,0 +1,142 @@
+import asyncio
+import gc
+import os
+import selectors
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+
+from src.utils.latency import LatencyHistogram
+
+# Gen 2 threshold that is never reached, full collections then only happen if asked for
+GEN2_OFF = 2**31 - 1
+
+# Frames of the event loop itself, left out of stall reports
+LOOP_INTERNALS = (os.path.dirname(asyncio.__file__), selectors.__file__)
+
+
+def run(main, use_uvloop: bool = False):
+    """
+    asyncio.run(main), on uvloop if asked for and installed
+    """
+    if use_uvloop:
+        try:
+            import uvloop
+
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        except ImportError:
+            print("uvloop is not installed (pip install uvloop), running on the default asyncio loop")
+
+    return asyncio.run(main)
+
+
+def tune_gc(freeze: bool, threshold: int, disable_gen2: bool) -> None:
+    """
+    Call once startup is done, right before trading
+
+    _______________________________________________________________
+
+    -> freeze: one full collection, then everything alive (modules, compiled kernels, books, settings) moves to the
+       permanent generation and is never traversed again \n
+    -> threshold: allocations between gen 0 collections, higher means fewer (slightly longer) pauses \n
+    -> disable_gen2: no full collections while trading, cyclic garbage that reaches gen 2 stays until exit
+    """
+    if freeze:
+        gc.collect()
+        gc.freeze()
+
+    _, gen1, gen2 = gc.get_threshold()
+    gc.set_threshold(threshold, gen1, GEN2_OFF if disable_gen2 else gen2)
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop runs a callback, and names whatever held it up
+
+    _______________________________________________________________
+
+    -> A task sleeping {interval}s records how much later than asked it woke into a histogram (the "loop_lag"
+       metric), the delay every other callback on the loop saw at that moment \n
+    -> A watchdog thread checks the task's heartbeat, once it is {threshold}s old the loop is stalled and the task
+       that is running and its stack are printed, while it is still running \n
+    -> GC pauses are timed per generation, a stall that lines up with one is the collector, not a handler \n
+    -> The watchdog needs the GIL, so a stall is reported within about sys.getswitchinterval() of crossing
+       {threshold}s, code that holds the GIL without switching is reported once it lets go
+    """
+
+    def __init__(self, interval: float = 0.005, threshold: float = 0.005) -> None:
+        self.interval = interval
+        self.threshold = threshold
+
+        self.lag = LatencyHistogram()
+        self.gc_pauses = {gen: LatencyHistogram() for gen in range(3)}
+        self.stalls = {}  # Task name -> stalls reported while it was running
+
+        self.loop = None
+        self._thread_id = None
+        self._beat = 0.0
+        self._reported = 0.0
+        self._gc_start = 0.0
+
+    def _on_gc(self, phase: str, info: dict) -> None:
+        if phase == "start":
+            self._gc_start = time.perf_counter()
+        else:
+            self.gc_pauses[info["generation"]].record(time.perf_counter() - self._gc_start)
+
+    def _report(self, stalled: float) -> None:
+        task = asyncio.current_task(self.loop)
+        frame = sys._current_frames().get(self._thread_id)
+
+        # Caught in the loop's own machinery (e.g. a late wake-up from select), no handler to blame
+        if task is None and (frame is None or frame.f_code.co_filename.startswith(LOOP_INTERNALS)):
+            return
+
+        name = task.get_name() if task is not None else "<callback>"
+        self.stalls[name] = self.stalls.get(name, 0) + 1
+
+        stack = [entry for entry in traceback.extract_stack(frame) if not entry.filename.startswith(LOOP_INTERNALS)]
+        stack = "".join(traceback.format_list(stack[-8:]))
+
+        print(
+            f"{datetime.now().strftime('%H:%S.%f')[:12]}: Event loop stalled {stalled * 1e3:.1f} ms in {name} "
+            f"({task.get_coro().__qualname__ if task is not None else 'no task'})\n{stack}"
+        )
+
+    def _watch(self) -> None:
+        while True:
+            time.sleep(self.threshold)
+            beat = self._beat
+            stalled = time.perf_counter() - beat
+
+            # Once per stall, the heartbeat moves on when the loop gets back to the monitor
+            if stalled > self.interval + self.threshold and beat != self._reported:
+                self._reported = beat
+                self._report(stalled)
+
+    async def run(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        self._beat = time.perf_counter()
+
+        gc.callbacks.append(self._on_gc)
+        threading.Thread(target=self._watch, name="LoopLagWatchdog", daemon=True).start()
+
+        interval = self.interval
+
+        while True:
+            expected = time.perf_counter() + interval
+            await asyncio.sleep(interval)
+
+            now = time.perf_counter()
+            self.lag.record(max(now - expected, 0.0))
+            self._beat = now
+
+    def summary(self) -> dict:
+        return {
+            "lag": self.lag.summary(),
+            "gc": {f"gen{gen}": histogram.summary() for gen, histogram in self.gc_pauses.items()},
+            "stalls": dict(self.stalls),
+        }